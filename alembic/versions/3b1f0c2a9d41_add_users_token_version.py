@@ -0,0 +1,29 @@
+"""add users token_version
+
+Revision ID: 3b1f0c2a9d41
+Revises: e2f8bbdc4b28
+Create Date: 2026-10-18 10:05:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '3b1f0c2a9d41'
+down_revision: Union[str, Sequence[str], None] = 'e2f8bbdc4b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'users',
+        sa.Column('token_version', sa.Integer(), nullable=False, server_default=sa.text('0'))
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,66 @@
+"""sync change tracking: updated_at and change_seq
+
+Revision ID: 7c4e2d1a8b53
+Revises: 3b1f0c2a9d41
+Create Date: 2026-10-18 11:20:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '7c4e2d1a8b53'
+down_revision: Union[str, Sequence[str], None] = '3b1f0c2a9d41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRACKED_TABLES = ('medications', 'intake_history')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Общая последовательность изменений: один курсор покрывает обе таблицы
+    op.execute("CREATE SEQUENCE sync_change_seq")
+
+    op.execute("""
+        CREATE FUNCTION sync_touch_row() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := now();
+            NEW.change_seq := nextval('sync_change_seq');
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    for table in TRACKED_TABLES:
+        op.add_column(
+            table,
+            sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False)
+        )
+        op.add_column(
+            table,
+            sa.Column('change_seq', sa.BigInteger(), server_default=sa.text("nextval('sync_change_seq')"), nullable=False)
+        )
+        op.execute(f"""
+            CREATE TRIGGER {table}_sync_touch
+            BEFORE INSERT OR UPDATE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION sync_touch_row()
+        """)
+
+    op.create_index('ix_medications_patient_id_change_seq', 'medications', ['patient_id', 'change_seq'])
+    op.create_index('ix_intake_history_medication_id_change_seq', 'intake_history', ['medication_id', 'change_seq'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_intake_history_medication_id_change_seq', table_name='intake_history')
+    op.drop_index('ix_medications_patient_id_change_seq', table_name='medications')
+
+    for table in TRACKED_TABLES:
+        op.execute(f"DROP TRIGGER {table}_sync_touch ON {table}")
+        op.drop_column(table, 'change_seq')
+        op.drop_column(table, 'updated_at')
+
+    op.execute("DROP FUNCTION sync_touch_row()")
+    op.execute("DROP SEQUENCE sync_change_seq")
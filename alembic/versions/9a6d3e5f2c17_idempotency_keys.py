@@ -0,0 +1,38 @@
+"""idempotency keys for sync push
+
+Revision ID: 9a6d3e5f2c17
+Revises: 7c4e2d1a8b53
+Create Date: 2026-10-18 13:10:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '9a6d3e5f2c17'
+down_revision: Union[str, Sequence[str], None] = '7c4e2d1a8b53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('user_uuid', sa.String(), sa.ForeignKey('users.uuid', ondelete='CASCADE'), primary_key=True),
+        sa.Column('key', sa.String(), primary_key=True),
+        sa.Column('request_hash', sa.String(), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=False),
+        sa.Column('response', postgresql.JSONB(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('expires_at', sa.TIMESTAMP(timezone=True), nullable=False)
+    )
+    op.create_index('ix_idempotency_keys_expires_at', 'idempotency_keys', ['expires_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_idempotency_keys_expires_at', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
@@ -0,0 +1,50 @@
+"""purge markers in sync_tombstones for dropped intake_history partitions
+
+Revision ID: a4c8e1f5b372
+Revises: f3b6d8a2c419
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c8e1f5b372'
+down_revision: Union[str, Sequence[str], None] = 'f3b6d8a2c419'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Удаление раздела целиком — одна отметка на пациента вместо следа на строку:
+    # клиент удаляет локальную историю приёма раньше purged_before
+    op.add_column('sync_tombstones', sa.Column('purged_before', sa.TIMESTAMP(timezone=True), nullable=True))
+    op.alter_column('sync_tombstones', 'entity_id', nullable=True)
+    op.drop_constraint('valid_entity_type', 'sync_tombstones', type_='check')
+    op.create_check_constraint(
+        'valid_entity_type',
+        'sync_tombstones',
+        "entity_type IN ('medication', 'intake_history', 'intake_history_purge')"
+    )
+    op.create_check_constraint(
+        'valid_purge_marker',
+        'sync_tombstones',
+        "(entity_type = 'intake_history_purge') = (purged_before IS NOT NULL) "
+        "AND (entity_type = 'intake_history_purge' OR entity_id IS NOT NULL)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM sync_tombstones WHERE entity_type = 'intake_history_purge'")
+    op.drop_constraint('valid_purge_marker', 'sync_tombstones', type_='check')
+    op.drop_constraint('valid_entity_type', 'sync_tombstones', type_='check')
+    op.create_check_constraint(
+        'valid_entity_type',
+        'sync_tombstones',
+        "entity_type IN ('medication', 'intake_history')"
+    )
+    op.alter_column('sync_tombstones', 'entity_id', nullable=False)
+    op.drop_column('sync_tombstones', 'purged_before')
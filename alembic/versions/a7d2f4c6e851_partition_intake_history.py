@@ -0,0 +1,178 @@
+"""monthly range partitioning of intake_history by scheduled_time
+
+Revision ID: a7d2f4c6e851
+Revises: f1c3e5a7b942
+Create Date: 2026-10-18 20:15:00.000000
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d2f4c6e851'
+down_revision: Union[str, Sequence[str], None] = 'f1c3e5a7b942'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Дальше вперёд разделы создаёт задача maintain_intake_partitions
+PARTITIONS_AHEAD_MONTHS = 3
+
+COLUMNS = (
+    "id, medication_id, scheduled_time, taken_time, status, notes, "
+    "created_at, updated_at, change_seq"
+)
+
+DAILY_ADHERENCE_TRIGGERS = {
+    'insert': "NEW TABLE AS new_rows",
+    'update': "OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    'delete': "OLD TABLE AS old_rows",
+}
+
+TOMBSTONE_FUNCTION = """
+    CREATE OR REPLACE FUNCTION sync_intake_tombstone() RETURNS trigger AS $$
+    BEGIN
+        {skip}
+        INSERT INTO sync_tombstones (entity_type, entity_id, patient_id)
+        SELECT 'intake_history', OLD.id, m.patient_id
+        FROM medications m
+        WHERE m.id = OLD.medication_id;
+        RETURN OLD;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+# Перенос строк между разделами (из default в новый раздел) — не удаление
+TOMBSTONE_SKIP = """
+        IF current_setting('mai.skip_tombstones', true) = 'on' THEN
+            RETURN OLD;
+        END IF;
+"""
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_triggers() -> None:
+    op.execute("""
+        CREATE TRIGGER intake_history_sync_touch
+        BEFORE INSERT OR UPDATE ON intake_history
+        FOR EACH ROW EXECUTE FUNCTION sync_touch_row()
+    """)
+    op.execute("""
+        CREATE TRIGGER intake_history_sync_tombstone
+        AFTER DELETE ON intake_history
+        FOR EACH ROW EXECUTE FUNCTION sync_intake_tombstone()
+    """)
+    for event, referencing in DAILY_ADHERENCE_TRIGGERS.items():
+        op.execute(f"""
+            CREATE TRIGGER intake_history_daily_adherence_{event}
+            AFTER {event.upper()} ON intake_history
+            REFERENCING {referencing}
+            FOR EACH STATEMENT EXECUTE FUNCTION daily_adherence_on_{event}()
+        """)
+
+
+def _create_indexes() -> None:
+    op.create_index('ix_intake_history_medication_id_change_seq', 'intake_history', ['medication_id', 'change_seq'])
+    op.create_index('ix_intake_history_created_at', 'intake_history', ['created_at'])
+
+
+def _detach_old_table(old_name: str) -> None:
+    """Освобождает имена индексов и последовательность под новую таблицу."""
+    op.execute(f"ALTER TABLE intake_history RENAME TO {old_name}")
+    op.execute("ALTER SEQUENCE intake_history_id_seq OWNED BY NONE")
+    op.execute(f"ALTER INDEX intake_history_pkey RENAME TO {old_name}_pkey")
+    op.execute(
+        "ALTER INDEX uq_intake_history_medication_id_scheduled_time "
+        f"RENAME TO {old_name}_uq"
+    )
+    op.execute("DROP INDEX ix_intake_history_medication_id_change_seq")
+    op.execute("DROP INDEX ix_intake_history_created_at")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _detach_old_table('intake_history_unpartitioned')
+    op.execute("DROP INDEX ix_intake_history_id")
+
+    # PK и UNIQUE секционированной таблицы обязаны включать ключ секционирования
+    op.execute("""
+        CREATE TABLE intake_history (
+            id BIGINT NOT NULL DEFAULT nextval('intake_history_id_seq'),
+            medication_id BIGINT NOT NULL REFERENCES medications (id) ON DELETE CASCADE,
+            scheduled_time TIMESTAMP WITH TIME ZONE NOT NULL,
+            taken_time TIMESTAMP WITH TIME ZONE NOT NULL,
+            status TEXT NOT NULL,
+            notes TEXT,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            change_seq BIGINT NOT NULL DEFAULT nextval('sync_change_seq'),
+            CONSTRAINT intake_history_pkey PRIMARY KEY (id, scheduled_time),
+            CONSTRAINT uq_intake_history_medication_id_scheduled_time UNIQUE (medication_id, scheduled_time),
+            CONSTRAINT valid_status CHECK (status IN ('taken', 'skipped'))
+        ) PARTITION BY RANGE (scheduled_time)
+    """)
+    op.execute("ALTER SEQUENCE intake_history_id_seq OWNED BY intake_history.id")
+    op.execute("CREATE TABLE intake_history_default PARTITION OF intake_history DEFAULT")
+
+    # Разделы по месяцам (UTC): от самой ранней записи до PARTITIONS_AHEAD_MONTHS вперёд
+    oldest = op.get_bind().execute(
+        sa.text("SELECT min(scheduled_time) FROM intake_history_unpartitioned")
+    ).scalar()
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    month = min(oldest.astimezone(timezone.utc).date().replace(day=1), current) if oldest else current
+    last = _add_months(current, PARTITIONS_AHEAD_MONTHS)
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(f"""
+            CREATE TABLE intake_history_p{month:%Y_%m} PARTITION OF intake_history
+            FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{upper.isoformat()} 00:00:00+00')
+        """)
+        month = upper
+
+    # Перенос до создания триггеров: change_seq, updated_at и сводка не меняются
+    op.execute(f"""
+        INSERT INTO intake_history ({COLUMNS})
+        SELECT {COLUMNS} FROM intake_history_unpartitioned
+    """)
+    op.execute("DROP TABLE intake_history_unpartitioned")
+
+    _create_indexes()
+    op.execute(TOMBSTONE_FUNCTION.format(skip=TOMBSTONE_SKIP))
+    _create_triggers()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _detach_old_table('intake_history_partitioned')
+
+    op.create_table(
+        'intake_history',
+        sa.Column('id', sa.BigInteger(), server_default=sa.text("nextval('intake_history_id_seq')"), primary_key=True),
+        sa.Column('medication_id', sa.BigInteger(), sa.ForeignKey('medications.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('scheduled_time', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('taken_time', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('status', sa.Text(), nullable=False),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('change_seq', sa.BigInteger(), server_default=sa.text("nextval('sync_change_seq')"), nullable=False),
+        sa.CheckConstraint("status IN ('taken', 'skipped')", name='valid_status'),
+        sa.UniqueConstraint('medication_id', 'scheduled_time', name='uq_intake_history_medication_id_scheduled_time')
+    )
+    op.execute("ALTER SEQUENCE intake_history_id_seq OWNED BY intake_history.id")
+    op.create_index(op.f('ix_intake_history_id'), 'intake_history', ['id'], unique=False)
+
+    op.execute(f"""
+        INSERT INTO intake_history ({COLUMNS})
+        SELECT {COLUMNS} FROM intake_history_partitioned
+    """)
+    op.execute("DROP TABLE intake_history_partitioned")
+
+    _create_indexes()
+    op.execute(TOMBSTONE_FUNCTION.format(skip=""))
+    _create_triggers()
@@ -0,0 +1,77 @@
+"""sync tombstones for deleted rows
+
+Revision ID: b5e8f1c3d742
+Revises: 9a6d3e5f2c17
+Create Date: 2026-10-18 14:30:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e8f1c3d742'
+down_revision: Union[str, Sequence[str], None] = '9a6d3e5f2c17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'sync_tombstones',
+        sa.Column('id', sa.BigInteger(), primary_key=True),
+        sa.Column('entity_type', sa.Text(), nullable=False),
+        sa.Column('entity_id', sa.BigInteger(), nullable=False),
+        sa.Column('patient_id', sa.String(), nullable=False),
+        sa.Column('change_seq', sa.BigInteger(), server_default=sa.text("nextval('sync_change_seq')"), nullable=False),
+        sa.Column('deleted_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.CheckConstraint("entity_type IN ('medication', 'intake_history')", name='valid_entity_type')
+    )
+    op.create_index('ix_sync_tombstones_patient_id_change_seq', 'sync_tombstones', ['patient_id', 'change_seq'])
+    op.create_index('ix_sync_tombstones_deleted_at', 'sync_tombstones', ['deleted_at'])
+
+    op.execute("""
+        CREATE FUNCTION sync_medication_tombstone() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO sync_tombstones (entity_type, entity_id, patient_id)
+            VALUES ('medication', OLD.id, OLD.patient_id);
+            RETURN OLD;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # При каскадном удалении препарата родитель уже не виден: приёмы
+    # покрываются следом препарата, отдельные следы не пишутся.
+    op.execute("""
+        CREATE FUNCTION sync_intake_tombstone() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO sync_tombstones (entity_type, entity_id, patient_id)
+            SELECT 'intake_history', OLD.id, m.patient_id
+            FROM medications m
+            WHERE m.id = OLD.medication_id;
+            RETURN OLD;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER medications_sync_tombstone
+        AFTER DELETE ON medications
+        FOR EACH ROW EXECUTE FUNCTION sync_medication_tombstone()
+    """)
+    op.execute("""
+        CREATE TRIGGER intake_history_sync_tombstone
+        AFTER DELETE ON intake_history
+        FOR EACH ROW EXECUTE FUNCTION sync_intake_tombstone()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER intake_history_sync_tombstone ON intake_history")
+    op.execute("DROP TRIGGER medications_sync_tombstone ON medications")
+    op.execute("DROP FUNCTION sync_intake_tombstone()")
+    op.execute("DROP FUNCTION sync_medication_tombstone()")
+
+    op.drop_index('ix_sync_tombstones_deleted_at', table_name='sync_tombstones')
+    op.drop_index('ix_sync_tombstones_patient_id_change_seq', table_name='sync_tombstones')
+    op.drop_table('sync_tombstones')
@@ -0,0 +1,35 @@
+"""checkpoints for the batched retention engine
+
+Revision ID: b9e2d5f7a318
+Revises: a7d2f4c6e851
+Create Date: 2026-10-18 21:30:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9e2d5f7a318'
+down_revision: Union[str, Sequence[str], None] = 'a7d2f4c6e851'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'retention_checkpoints',
+        sa.Column('entity', sa.Text(), primary_key=True),
+        sa.Column('cutoff', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('last_key', postgresql.JSONB(), nullable=True),
+        sa.Column('deleted_rows', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('started_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('retention_checkpoints')
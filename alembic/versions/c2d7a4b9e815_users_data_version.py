@@ -0,0 +1,29 @@
+"""users data_version for conditional GET
+
+Revision ID: c2d7a4b9e815
+Revises: b5e8f1c3d742
+Create Date: 2026-10-18 15:40:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2d7a4b9e815'
+down_revision: Union[str, Sequence[str], None] = 'b5e8f1c3d742'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'users',
+        sa.Column('data_version', sa.BigInteger(), nullable=False, server_default=sa.text('0'))
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'data_version')
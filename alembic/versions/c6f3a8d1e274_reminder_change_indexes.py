@@ -0,0 +1,34 @@
+"""indexes for the reminder dispatcher change feed
+
+Revision ID: c6f3a8d1e274
+Revises: b9e2d5f7a318
+Create Date: 2026-10-18 22:40:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6f3a8d1e274'
+down_revision: Union[str, Sequence[str], None] = 'b9e2d5f7a318'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Опрос изменений всех пациентов: change_seq > позиции, без patient_id
+    op.create_index('ix_medications_change_seq', 'medications', ['change_seq'])
+    op.create_index(
+        'ix_sync_tombstones_medication_change_seq',
+        'sync_tombstones',
+        ['change_seq'],
+        postgresql_where=sa.text("entity_type = 'medication'")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sync_tombstones_medication_change_seq', table_name='sync_tombstones')
+    op.drop_index('ix_medications_change_seq', table_name='medications')
@@ -0,0 +1,41 @@
+"""unique invitation codes
+
+Revision ID: c8d3f6a1e947
+Revises: a4c8e1f5b372
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8d3f6a1e947'
+down_revision: Union[str, Sequence[str], None] = 'a4c8e1f5b372'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # До уникального индекса код мог повториться: из дублей остаётся одна
+    # строка — неиспользованная с самым поздним сроком, остальные удаляются
+    op.execute("""
+        DELETE FROM invitation_codes AS ic
+        USING (
+            SELECT id, row_number() OVER (
+                PARTITION BY code ORDER BY is_used, expires_at DESC, id
+            ) AS rn
+            FROM invitation_codes
+        ) AS ranked
+        WHERE ic.id = ranked.id AND ranked.rn > 1
+    """)
+    # Уникальность, объявленная в модели (unique=True, index=True)
+    op.drop_index('ix_invitation_codes_code', table_name='invitation_codes')
+    op.create_index('ix_invitation_codes_code', 'invitation_codes', ['code'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_invitation_codes_code', table_name='invitation_codes')
+    op.create_index('ix_invitation_codes_code', 'invitation_codes', ['code'])
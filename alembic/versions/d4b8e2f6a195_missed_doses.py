@@ -0,0 +1,46 @@
+"""missed dose events and job watermarks
+
+Revision ID: d4b8e2f6a195
+Revises: c6f3a8d1e274
+Create Date: 2026-10-18 23:20:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4b8e2f6a195'
+down_revision: Union[str, Sequence[str], None] = 'c6f3a8d1e274'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'missed_doses',
+        sa.Column('id', sa.BigInteger(), primary_key=True),
+        sa.Column('medication_id', sa.BigInteger(), sa.ForeignKey('medications.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('patient_id', sa.String(), nullable=False),
+        sa.Column('scheduled_time', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('detected_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.UniqueConstraint('medication_id', 'scheduled_time', name='uq_missed_doses_medication_id_scheduled_time')
+    )
+    op.create_index('ix_missed_doses_patient_id_scheduled_time', 'missed_doses', ['patient_id', 'scheduled_time'])
+    op.create_index('ix_missed_doses_scheduled_time', 'missed_doses', ['scheduled_time'])
+
+    op.create_table(
+        'job_watermarks',
+        sa.Column('job', sa.Text(), primary_key=True),
+        sa.Column('processed_until', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('job_watermarks')
+    op.drop_index('ix_missed_doses_scheduled_time', table_name='missed_doses')
+    op.drop_index('ix_missed_doses_patient_id_scheduled_time', table_name='missed_doses')
+    op.drop_table('missed_doses')
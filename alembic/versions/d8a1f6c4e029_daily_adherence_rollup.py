@@ -0,0 +1,105 @@
+"""daily adherence rollup maintained by intake_history triggers
+
+Revision ID: d8a1f6c4e029
+Revises: c2d7a4b9e815
+Create Date: 2026-10-18 17:10:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8a1f6c4e029'
+down_revision: Union[str, Sequence[str], None] = 'c2d7a4b9e815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Вклад строки intake_history в сводку: день по UTC и +1/-1 к статусу
+_CONTRIBUTION = """
+    SELECT medication_id,
+           (scheduled_time AT TIME ZONE 'UTC')::date AS day,
+           {sign}(status = 'taken')::int AS taken,
+           {sign}(status = 'skipped')::int AS skipped
+    FROM {rows}
+"""
+
+# event -> таблицы переходов, доступные триггеру
+TRIGGER_EVENTS = {
+    'insert': ('new_rows',),
+    'update': ('old_rows', 'new_rows'),
+    'delete': ('old_rows',),
+}
+
+
+def _apply_delta_function(event: str, sources: tuple[str, ...]) -> str:
+    contributions = " UNION ALL ".join(
+        _CONTRIBUTION.format(sign="-" if rows == 'old_rows' else "", rows=rows)
+        for rows in sources
+    )
+    # JOIN с medications отбрасывает строки, удалённые каскадом вместе с препаратом
+    return f"""
+        CREATE FUNCTION daily_adherence_on_{event}() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO daily_adherence (medication_id, day, taken, skipped)
+            SELECT d.medication_id, d.day, sum(d.taken), sum(d.skipped)
+            FROM ({contributions}) d
+            JOIN medications m ON m.id = d.medication_id
+            GROUP BY d.medication_id, d.day
+            HAVING sum(d.taken) <> 0 OR sum(d.skipped) <> 0
+            ON CONFLICT (medication_id, day) DO UPDATE
+            SET taken = daily_adherence.taken + EXCLUDED.taken,
+                skipped = daily_adherence.skipped + EXCLUDED.skipped,
+                updated_at = now();
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """
+
+
+def _referencing(sources: tuple[str, ...]) -> str:
+    return " ".join(
+        f"{'OLD' if rows == 'old_rows' else 'NEW'} TABLE AS {rows}" for rows in sources
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'daily_adherence',
+        sa.Column('medication_id', sa.BigInteger(), sa.ForeignKey('medications.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('taken', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('skipped', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('medication_id', 'day')
+    )
+
+    op.execute("""
+        INSERT INTO daily_adherence (medication_id, day, taken, skipped)
+        SELECT medication_id,
+               (scheduled_time AT TIME ZONE 'UTC')::date,
+               count(*) FILTER (WHERE status = 'taken'),
+               count(*) FILTER (WHERE status = 'skipped')
+        FROM intake_history
+        GROUP BY 1, 2
+    """)
+
+    # Триггеры уровня оператора: пакет из /sync/push — один upsert на день
+    for event, sources in TRIGGER_EVENTS.items():
+        op.execute(_apply_delta_function(event, sources))
+        op.execute(f"""
+            CREATE TRIGGER intake_history_daily_adherence_{event}
+            AFTER {event.upper()} ON intake_history
+            REFERENCING {_referencing(sources)}
+            FOR EACH STATEMENT EXECUTE FUNCTION daily_adherence_on_{event}()
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for event in TRIGGER_EVENTS:
+        op.execute(f"DROP TRIGGER intake_history_daily_adherence_{event} ON intake_history")
+        op.execute(f"DROP FUNCTION daily_adherence_on_{event}()")
+
+    op.drop_table('daily_adherence')
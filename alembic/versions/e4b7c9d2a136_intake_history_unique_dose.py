@@ -0,0 +1,44 @@
+"""unique intake_history (medication_id, scheduled_time)
+
+Revision ID: e4b7c9d2a136
+Revises: d8a1f6c4e029
+Create Date: 2026-10-18 18:05:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b7c9d2a136'
+down_revision: Union[str, Sequence[str], None] = 'd8a1f6c4e029'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Дубликаты из прежних гонок: остаётся последняя изменённая запись.
+    # Удаление проходит через триггеры — клиенты получат следы удалений,
+    # сводка daily_adherence скорректируется.
+    op.execute("""
+        DELETE FROM intake_history a
+        USING intake_history b
+        WHERE a.medication_id = b.medication_id
+          AND a.scheduled_time = b.scheduled_time
+          AND (a.updated_at, a.id) < (b.updated_at, b.id)
+    """)
+    op.create_unique_constraint(
+        'uq_intake_history_medication_id_scheduled_time',
+        'intake_history',
+        ['medication_id', 'scheduled_time']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(
+        'uq_intake_history_medication_id_scheduled_time',
+        'intake_history',
+        type_='unique'
+    )
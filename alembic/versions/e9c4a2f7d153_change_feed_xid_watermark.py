@@ -0,0 +1,66 @@
+"""change feed watermark: writer transaction id on changed rows and tombstones
+
+Revision ID: e9c4a2f7d153
+Revises: d4b8e2f6a195
+Create Date: 2026-10-19 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e9c4a2f7d153'
+down_revision: Union[str, Sequence[str], None] = 'd4b8e2f6a195'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHANGE_TABLES = ('medications', 'intake_history', 'sync_tombstones')
+CURRENT_XID = "pg_current_xact_id()::text::bigint"
+
+TOUCH_FUNCTION = """
+    CREATE OR REPLACE FUNCTION sync_touch_row() RETURNS trigger AS $$
+    BEGIN
+        NEW.updated_at := now();
+        NEW.change_seq := nextval('sync_change_seq');
+        {xid}
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # change_seq выдаётся при выполнении оператора, а не при commit: курсор
+    # по нему пропускает изменения, зафиксированные не по порядку. Курсором
+    # становится xmin снимка чтения, а строки помечаются xid записавшей транзакции
+    for table in CHANGE_TABLES:
+        # Существующие строки старше любого курсора: 0 без перезаписи таблицы
+        op.add_column(
+            table,
+            sa.Column('change_xid', sa.BigInteger(), server_default=sa.text('0'), nullable=False)
+        )
+        op.alter_column(table, 'change_xid', server_default=sa.text(CURRENT_XID))
+    op.execute(TOUCH_FUNCTION.format(xid=f"NEW.change_xid := {CURRENT_XID};"))
+
+    op.drop_index('ix_medications_patient_id_change_seq', table_name='medications')
+    op.execute("DROP INDEX ix_intake_history_medication_id_change_seq")
+    op.drop_index('ix_sync_tombstones_patient_id_change_seq', table_name='sync_tombstones')
+    op.create_index('ix_medications_patient_id_change_xid', 'medications', ['patient_id', 'change_xid'])
+    op.create_index('ix_intake_history_medication_id_change_xid', 'intake_history', ['medication_id', 'change_xid'])
+    op.create_index('ix_sync_tombstones_patient_id_change_xid', 'sync_tombstones', ['patient_id', 'change_xid'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sync_tombstones_patient_id_change_xid', table_name='sync_tombstones')
+    op.execute("DROP INDEX ix_intake_history_medication_id_change_xid")
+    op.drop_index('ix_medications_patient_id_change_xid', table_name='medications')
+    op.create_index('ix_sync_tombstones_patient_id_change_seq', 'sync_tombstones', ['patient_id', 'change_seq'])
+    op.create_index('ix_intake_history_medication_id_change_seq', 'intake_history', ['medication_id', 'change_seq'])
+    op.create_index('ix_medications_patient_id_change_seq', 'medications', ['patient_id', 'change_seq'])
+
+    op.execute(TOUCH_FUNCTION.format(xid=""))
+    for table in CHANGE_TABLES:
+        op.drop_column(table, 'change_xid')
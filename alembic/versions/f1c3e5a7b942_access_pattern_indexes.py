@@ -0,0 +1,52 @@
+"""indexes for friend lookups, invitation codes and cleanup
+
+Revision ID: f1c3e5a7b942
+Revises: e4b7c9d2a136
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c3e5a7b942'
+down_revision: Union[str, Sequence[str], None] = 'e4b7c9d2a136'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# medications.patient_id и intake_history.medication_id уже покрыты
+# ведущими колонками ix_*_change_seq и uq_intake_history_medication_id_scheduled_time
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Пациент мед-друга: каждый запрос мед-друга и FK users.relation_id
+    op.create_index('ix_users_relation_id', 'users', ['relation_id'])
+
+    # Поиск кода при привязке. Неуникальный: в таблице могут быть дубли,
+    # уникальность вводится отдельно (c8d3f6a1e947) после их удаления
+    op.create_index('ix_invitation_codes_code', 'invitation_codes', ['code'])
+
+    # cleanup_old_data: is_used OR expires_at < now — BitmapOr двух индексов
+    op.create_index('ix_invitation_codes_expires_at', 'invitation_codes', ['expires_at'])
+    op.create_index(
+        'ix_invitation_codes_is_used',
+        'invitation_codes',
+        ['is_used'],
+        postgresql_where=sa.text('is_used')
+    )
+
+    # cleanup_old_data: удаление по created_at
+    op.create_index('ix_medications_created_at', 'medications', ['created_at'])
+    op.create_index('ix_intake_history_created_at', 'intake_history', ['created_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_intake_history_created_at', table_name='intake_history')
+    op.drop_index('ix_medications_created_at', table_name='medications')
+    op.drop_index('ix_invitation_codes_is_used', table_name='invitation_codes')
+    op.drop_index('ix_invitation_codes_expires_at', table_name='invitation_codes')
+    op.drop_index('ix_invitation_codes_code', table_name='invitation_codes')
+    op.drop_index('ix_users_relation_id', table_name='users')
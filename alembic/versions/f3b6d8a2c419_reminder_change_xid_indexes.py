@@ -0,0 +1,43 @@
+"""reminder dispatcher change feed keyed by writer transaction id
+
+Revision ID: f3b6d8a2c419
+Revises: e9c4a2f7d153
+Create Date: 2026-10-19 11:10:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b6d8a2c419'
+down_revision: Union[str, Sequence[str], None] = 'e9c4a2f7d153'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Опрос изменений всех пациентов: change_xid >= водяного знака, страницы по (change_xid, id)
+    op.drop_index('ix_sync_tombstones_medication_change_seq', table_name='sync_tombstones')
+    op.drop_index('ix_medications_change_seq', table_name='medications')
+    op.create_index('ix_medications_change_xid_id', 'medications', ['change_xid', 'id'])
+    op.create_index(
+        'ix_sync_tombstones_medication_change_xid_id',
+        'sync_tombstones',
+        ['change_xid', 'id'],
+        postgresql_where=sa.text("entity_type = 'medication'")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sync_tombstones_medication_change_xid_id', table_name='sync_tombstones')
+    op.drop_index('ix_medications_change_xid_id', table_name='medications')
+    op.create_index('ix_medications_change_seq', 'medications', ['change_seq'])
+    op.create_index(
+        'ix_sync_tombstones_medication_change_seq',
+        'sync_tombstones',
+        ['change_seq'],
+        postgresql_where=sa.text("entity_type = 'medication'")
+    )
@@ -1,16 +1,36 @@
 # app/auth/api/auth.py
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import get_current_user
-from app.auth.crud.user import create_user
+from app.core.config import settings
+from app.core.credential_cache import credential_cache
+from app.core.security import authenticate_user, get_current_user, get_service_account
+from app.core.tokens import TokenError, create_token, decode_token, token_revocations
+from app.auth.crud.user import bump_token_version, create_user, create_users_bulk, get_user_by_uuid
 from app.db.session import db_helper
 from app.auth.models.user import User
-from app.auth.schemas.auth import UserCreateRequest, UserCreateResponse  
+from app.auth.schemas.auth import (
+    BulkUserCreateRequest,
+    BulkUserCreateResult,
+    TokenPairResponse,
+    TokenRefreshRequest,
+    UserCreateRequest,
+    UserCreateResponse,
+    UserLoginRequest,
+)
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def _token_pair(user: User) -> TokenPairResponse:
+    return TokenPairResponse(
+        access_token=create_token(user, "access"),
+        refresh_token=create_token(user, "refresh"),
+        expires_in=settings.jwt.access_ttl_seconds,
+    )
+
+
 @router.post("/register", response_model=UserCreateResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserCreateRequest,
@@ -21,4 +41,103 @@ async def register(
         uuid=user.uuid,
         username=user.username,
         password=raw_password  
-    )
\ No newline at end of file
+    )
+
+
+@router.post(
+    "/register/bulk",
+    status_code=status.HTTP_201_CREATED,
+    response_class=StreamingResponse,
+    responses={201: {"content": {"application/x-ndjson": {}}}},
+)
+async def register_bulk(
+    data: BulkUserCreateRequest,
+    service_account: User = Depends(get_service_account),
+):
+    """
+    Массовая регистрация пациентов (для клиник) — только для служебных
+    учётных записей.
+    Ответ — NDJSON: по строке BulkUserCreateResult на каждый username в порядке
+    запроса. Пользователи создаются и фиксируются порциями, строки порции
+    отправляются сразу после её commit. Конфликты не прерывают пакет.
+    """
+    chunk_size = settings.password_pool.bulk_chunk_size
+
+    async def results():
+        seen: set[str] = set()
+        # Сессия зависимости закрывается до отправки тела — открываем свою.
+        async with db_helper.session_factory() as session:
+            for start in range(0, len(data.usernames), chunk_size):
+                chunk = data.usernames[start:start + chunk_size]
+                created = await create_users_bulk(
+                    session, [username for username in dict.fromkeys(chunk) if username not in seen]
+                )
+                for username in chunk:
+                    if username in seen:
+                        result = BulkUserCreateResult(
+                            username=username, status="conflict", detail="Duplicate username in request"
+                        )
+                    elif username in created:
+                        uuid_, password = created[username]
+                        result = BulkUserCreateResult(
+                            username=username, status="created", uuid=uuid_, password=password
+                        )
+                    else:
+                        result = BulkUserCreateResult(
+                            username=username, status="conflict", detail="Username already exists"
+                        )
+                    seen.add(username)
+                    yield result.model_dump_json(exclude_none=True) + "\n"
+
+    return StreamingResponse(
+        results(),
+        status_code=status.HTTP_201_CREATED,
+        media_type="application/x-ndjson",
+    )
+
+
+@router.post("/login", response_model=TokenPairResponse)
+async def login(
+    data: UserLoginRequest,
+    db: AsyncSession = Depends(db_helper.session_dependency),
+):
+    """Обменять uuid/пароль на пару access/refresh токенов."""
+    user = await authenticate_user(db, data.uuid, data.password)
+    # Версию берём из БД: logout в другом воркере не сбрасывает здешний кэш
+    await db.refresh(user, ["token_version"])
+    return _token_pair(user)
+
+
+@router.post("/refresh", response_model=TokenPairResponse)
+async def refresh(
+    data: TokenRefreshRequest,
+    db: AsyncSession = Depends(db_helper.session_dependency),
+):
+    """Выпустить новую пару токенов по refresh-токену."""
+    invalid_exc = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        claims = decode_token(data.refresh_token, "refresh")
+    except TokenError:
+        raise invalid_exc
+
+    user = await get_user_by_uuid(db, claims["sub"])
+    if not user or user.token_version != claims.get("ver"):
+        if user:
+            token_revocations.revoke_below(user.uuid, user.token_version)
+        raise invalid_exc
+    return _token_pair(user)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    db: AsyncSession = Depends(db_helper.session_dependency),
+    current_user: User = Depends(get_current_user),
+):
+    """Отозвать все токены текущего пользователя."""
+    version = await bump_token_version(db, current_user.uuid)
+    token_revocations.revoke_below(current_user.uuid, version)
+    credential_cache.invalidate(current_user.uuid)
@@ -3,6 +3,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.auth.models.user import User
+from app.medicines.crud.events import RELATION_CHANGED, notify_patient_event
 
 async def get_patient_by_friend_id(db: AsyncSession, friend_id: int) -> User | None:
     """Находит пациента, привязанного к ID мед-друга."""
@@ -17,6 +18,8 @@ async def get_friend_by_id(db: AsyncSession, friend_id: int) -> User | None:
 async def update_patient_relation(db: AsyncSession, patient: User, friend_id: int | None) -> None:
     """Обновляет или удаляет связь мед-друга у пациента."""
     patient.relation_id = friend_id
+    # Поток событий прежнего мед-друга закрывается во всех воркерах
+    await notify_patient_event(db, patient.uuid, RELATION_CHANGED, {})
     await db.commit()
 
 async def get_patient_id_for_current_friend(db: AsyncSession, friend_id: int) -> int | None:
@@ -1,14 +1,16 @@
 # app/auth/crud/user.py
 import secrets
+import uuid as uuid_pkg
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
 from app.auth.models.user import User
-from app.auth.utils.password import hash_password
+from app.auth.utils.password import hash_password_async, hash_passwords_bulk_async
 
 
 async def create_user(db: AsyncSession, username: str) -> tuple[User, str]:  
     raw_password = secrets.token_urlsafe(8)
-    hashed_password = hash_password(raw_password)
+    hashed_password = await hash_password_async(raw_password, wait=True)
 
     user = User(
         username=username,  
@@ -21,7 +23,52 @@ async def create_user(db: AsyncSession, username: str) -> tuple[User, str]:
     return user, raw_password
 
 
+async def create_users_bulk(
+    db: AsyncSession, usernames: list[str]
+) -> dict[str, tuple[str, str]]:
+    """
+    Создаёт порцию пользователей одним INSERT ... ON CONFLICT DO NOTHING RETURNING
+    и фиксирует её. Возвращает {username: (uuid, пароль)} только для созданных;
+    занятые username молча пропускаются. Размер порции ограничивает вызывающий
+    (PASSWORD_POOL_BULK_CHUNK_SIZE).
+    """
+    if not usernames:
+        return {}
+    raw_passwords = [secrets.token_urlsafe(8) for _ in usernames]
+    hashed_passwords = await hash_passwords_bulk_async(raw_passwords)
+
+    rows = [
+        {"uuid": str(uuid_pkg.uuid4()), "username": username, "hash_password": hashed}
+        for username, hashed in zip(usernames, hashed_passwords)
+    ]
+    stmt = (
+        insert(User)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=[User.username])
+        .returning(User.uuid, User.username)
+    )
+    result = await db.execute(stmt)
+    await db.commit()
+
+    passwords = dict(zip(usernames, raw_passwords))
+    return {row.username: (row.uuid, passwords[row.username]) for row in result}
+
+
 async def get_user_by_uuid(db: AsyncSession, uuid_: str) -> User | None:
     stmt = select(User).where(User.uuid == uuid_)
     result = await db.execute(stmt)
-    return result.scalar_one_or_none()
\ No newline at end of file
+    return result.scalar_one_or_none()
+
+
+async def bump_token_version(db: AsyncSession, uuid_: str) -> int:
+    """Увеличивает версию токенов пользователя, отзывая все выданные токены."""
+    stmt = (
+        update(User)
+        .where(User.uuid == uuid_)
+        # last_synced_time явно сохраняем, иначе сработает его onupdate
+        .values(token_version=User.token_version + 1, last_synced_time=User.last_synced_time)
+        .returning(User.token_version)
+    )
+    result = await db.execute(stmt)
+    await db.commit()
+    return result.scalar_one()
@@ -3,7 +3,7 @@
 import datetime
 import uuid as uuid_pkg
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Integer, ForeignKey, DateTime, Boolean, TIMESTAMP
+from sqlalchemy import String, Integer, ForeignKey, DateTime, Boolean, TIMESTAMP, Index, text
 from app.db.base import Base
 
 
@@ -17,5 +17,9 @@ class InvitationCode(Base):
     )
     code: Mapped[str] = mapped_column(String, unique=True, index=True)
     med_friend_id: Mapped[str] = mapped_column(String, ForeignKey("users.uuid"), nullable=False)
-    expires_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
-    is_used: Mapped[bool] = mapped_column(Boolean, default=False)
\ No newline at end of file
+    expires_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, index=True)
+    is_used: Mapped[bool] = mapped_column(Boolean, default=False)
+
+    __table_args__ = (
+        Index("ix_invitation_codes_is_used", "is_used", postgresql_where=text("is_used")),
+    )
\ No newline at end of file
@@ -1,6 +1,6 @@
 import uuid as uuid_pkg
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, TIMESTAMP, ForeignKey
+from sqlalchemy import String, TIMESTAMP, ForeignKey, Integer, BigInteger
 from sqlalchemy.sql import func
 from app.db.base import Base
 from datetime import datetime
@@ -21,7 +21,24 @@ class User(Base):
     relation_id: Mapped[str | None] = mapped_column(
         String,
         ForeignKey("users.uuid"),
-        nullable=True
+        nullable=True,
+        index=True
+    )
+
+    # Версия токенов: увеличение отзывает все выданные access/refresh токены
+    token_version: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        default=0,
+        server_default="0"
+    )
+
+    # Версия данных пациента (препараты, история приёма): ETag для чтения
+    data_version: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        server_default="0"
     )
 
 
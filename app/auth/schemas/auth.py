@@ -1,10 +1,15 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
+from typing import Literal
 
 class UserCreateRequest(BaseModel):
     username: str 
 
 
+class BulkUserCreateRequest(BaseModel):
+    usernames: list[str] = Field(min_length=1, max_length=5000)
+
+
 class UserCreateResponse(BaseModel):
     uuid: str
     username: str
@@ -14,6 +19,14 @@ class UserCreateResponse(BaseModel):
         from_attributes = True
 
 
+class BulkUserCreateResult(BaseModel):
+    username: str
+    status: Literal["created", "conflict"]
+    uuid: str | None = None
+    password: str | None = None
+    detail: str | None = None
+
+
 class UserLoginRequest(BaseModel):
     uuid: str
     password: str
@@ -26,4 +39,15 @@ class UserLoginResponse(BaseModel):
     last_synced_time: datetime | None 
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class TokenPairResponse(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+    expires_in: int
+
+
+class TokenRefreshRequest(BaseModel):
+    refresh_token: str
@@ -28,6 +28,8 @@ async def add_friend_by_code(db: AsyncSession, patient: User, code: str) -> None
         raise FriendServiceError("Этот код-приглашение уже был использован.")
     
     med_friend_id = invitation.med_friend_id
+    # Пользователь мог прийти из кэша учётных данных — перечитываем связь из БД.
+    await db.refresh(patient, ["relation_id"])
 
     if med_friend_id == patient.uuid: 
         raise FriendServiceError("Вы не можете добавить себя в качестве мед-друга.")
@@ -44,6 +46,7 @@ async def add_friend_by_code(db: AsyncSession, patient: User, code: str) -> None
 
 async def remove_friend_for_patient(db: AsyncSession, patient: User) -> None:
     """Пациент удаляет своего мед-друга."""
+    await db.refresh(patient, ["relation_id"])
     if patient.relation_id is None:
         raise FriendServiceError("У вас нет назначенного мед-друга.")
     await crud_friend.update_patient_relation(db, patient, None)
@@ -57,6 +60,8 @@ async def unsubscribe_from_patient(db: AsyncSession, med_friend: User) -> None:
     
 async def get_med_friend_info(db: AsyncSession, patient: User) -> dict[str, str | None]:
     """Готовит данные о мед-друге для ответа API."""
+    # Связь не берётся из токена или кэша учётных данных — только из БД
+    await db.refresh(patient, ["relation_id"])
     if not patient.relation_id:
         return {"uuid": None, "username": None, "message": "Мед-друг не назначен."}
     
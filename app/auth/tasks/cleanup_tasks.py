@@ -1,12 +1,13 @@
 # app/auth/tasks/cleanup_tasks.py
 import datetime
 import logging
-from sqlalchemy import delete
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth.models.invitation import InvitationCode
-from app.medicines.models.intake import IntakeHistory
-from app.medicines.models.medication import Medication
+from app.medicines.services.retention_service import retention_policies, run_retention
+from app.medicines.services.archive_service import archive_expiring
+from app.medicines.crud.data_version import bump_data_version
+from app.medicines.crud.partitions import drop_expired_intake_partitions
+from app.medicines.services.read_model import read_model_cache
+from app.core.config import settings
 from app.db.session import db_helper
 
 logging.basicConfig(level=logging.INFO)
@@ -14,42 +15,55 @@ logger = logging.getLogger(__name__)
 
 async def cleanup_old_data():
     """
-    Ежедневная очистка данных:
-    - Удаляет просроченные/использованные коды-приглашения
-    - Удаляет IntakeHistory и Medication старше 60 дней (2 месяца)
+    Ежедневная очистка данных по срокам хранения (RetentionSettings):
+    - Выгружает удаляемые IntakeHistory и Medication в архив (ARCHIVE_DIR);
+      при ошибке выгрузки очистка не выполняется
+    - Удаляет разделы IntakeHistory, чей месяц целиком старше
+      INTAKE_HISTORY_RETENTION_DAYS — одна короткая транзакция
+    - Остальное удаляет пакетами с паузами, с продолжением после сбоя
+      (services.retention_service): использованные/просроченные коды-приглашения,
+      просроченные ключи идемпотентности /sync/push, IntakeHistory вне разделов,
+      Medication старше MEDICATIONS_RETENTION_DAYS и следы удалений старше
+      SYNC_TOMBSTONE_RETENTION_DAYS
     """
     logger.info("Запуск ежедневной очистки данных...")
 
-    async with db_helper.session_factory() as session: 
-        try:
-            now = datetime.datetime.now(datetime.timezone.utc)
-
-            stmt_codes = delete(InvitationCode).where(
-                (InvitationCode.is_used == True) | (InvitationCode.expires_at < now)
-            )
-            result_codes = await session.execute(stmt_codes)
+    # Одни границы для архива и удаления: в архив попадает всё, что будет удалено
+    now = datetime.datetime.now(datetime.timezone.utc)
+    policies = {policy.entity: policy for policy in retention_policies()}
+    intake_cutoff = policies["intake_history_default"].cutoff(now)
+    medications_cutoff = policies["medications"].cutoff(now)
 
-            two_months_ago = now - datetime.timedelta(days=60)
-            stmt_intake = delete(IntakeHistory).where(
-                IntakeHistory.created_at < two_months_ago
-            )
-            result_intake = await session.execute(stmt_intake)
+    if settings.archive.enabled:
+        try:
+            await archive_expiring(db_helper.session_factory, intake_cutoff, medications_cutoff)
+        except Exception as e:
+            logger.error(f"Ошибка архивации, очистка отменена: {e}")
+            raise
 
-            stmt_meds = delete(Medication).where(
-                Medication.created_at < two_months_ago
+    async with db_helper.session_factory() as session:
+        try:
+            dropped_partitions, affected_patients = (
+                await drop_expired_intake_partitions(session, intake_cutoff)
             )
-            result_meds = await session.execute(stmt_meds)
 
+            # Пациенты, чьи данные изменятся: им нужно сменить версию данных (ETag)
+            await bump_data_version(session, affected_patients)
             await session.commit()
-
-            logger.info(
-                f" Очистка завершена:\n"
-                f"   — Коды: {result_codes.rowcount}\n"
-                f"   — История приёма: {result_intake.rowcount}\n"
-                f"   — Рецепты: {result_meds.rowcount}"
-            )
+            read_model_cache.invalidate(affected_patients)
 
         except Exception as e:
             logger.error(f"Ошибка в cleanup_old_data: {e}")
             await session.rollback()
             raise
+
+    runs = await run_retention(db_helper.session_factory, now)
+
+    logger.info(
+        f" Очистка завершена:\n"
+        f"   — Разделы истории приёма: {', '.join(dropped_partitions) or 'нет'}\n"
+        + "\n".join(
+            f"   — {entity}: {run['deleted']} строк, {run['rows_per_second']} строк/с"
+            for entity, run in runs.items()
+        )
+    )
@@ -1,7 +1,16 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
 from passlib.context import CryptContext
 
+from app.core.config import settings
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -9,3 +18,100 @@ def hash_password(password: str) -> str:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordPoolBusy(Exception):
+    """Очередь задач хеширования переполнена."""
+    pass
+
+
+class PasswordHasherPool:
+    """
+    Пул потоков для bcrypt. bcrypt отпускает GIL, поэтому потоки
+    работают параллельно на разных ядрах, а event loop не блокируется.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: ThreadPoolExecutor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self.pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+
+    def _ensure_started(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="bcrypt"
+            )
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+    async def run(self, fn: Callable[..., T], *args, wait: bool = False) -> T:
+        """
+        Выполняет fn в пуле. При переполненной очереди бросает
+        PasswordPoolBusy, либо ждёт свободного места, если wait=True.
+        """
+        self._ensure_started()
+        if not wait and self._slots.locked():
+            self.rejected += 1
+            raise PasswordPoolBusy("Слишком много одновременных проверок пароля")
+
+        async with self._slots:
+            self.pending += 1
+            self.submitted += 1
+            started = time.perf_counter()
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, fn, *args)
+            finally:
+                self.busy_seconds += time.perf_counter() - started
+                self.pending -= 1
+                self.completed += 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._slots = None
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_ms": round(self.busy_seconds * 1000 / self.completed, 2) if self.completed else 0.0,
+        }
+
+
+password_pool = PasswordHasherPool(
+    workers=settings.password_pool.workers,
+    max_pending=settings.password_pool.max_pending,
+)
+
+
+# Отдельный пул массовой регистрации: её хеши не вытесняют проверки при входе
+bulk_password_pool = PasswordHasherPool(
+    workers=settings.password_pool.bulk_workers,
+    max_pending=settings.password_pool.bulk_chunk_size,
+)
+
+
+async def hash_password_async(password: str, wait: bool = False) -> str:
+    return await password_pool.run(hash_password, password, wait=wait)
+
+
+async def hash_passwords_bulk_async(passwords: list[str]) -> list[str]:
+    """Хеши порции паролей в пуле массовой регистрации (ждёт свободного места)."""
+    return await asyncio.gather(
+        *(bulk_password_pool.run(hash_password, p, wait=True) for p in passwords)
+    )
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_pool.run(verify_password, plain_password, hashed_password)
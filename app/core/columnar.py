@@ -0,0 +1,176 @@
+# app/core/columnar.py
+"""
+Простой колоночный формат архива.
+
+Файл .mcol — последовательность групп строк; в группе каждая колонка
+записана отдельным gzip-сжатым JSON-массивом. Рядом лежит манифест
+.mcol.json: колонки, их типы и для каждой группы — смещения колонок
+и диапазон ключа сортировки. Строки в файле упорядочены по ключу, поэтому
+чтение по значению ключа пропускает чужие группы и распаковывает только
+нужные колонки одной группы за раз.
+"""
+import bisect
+import json
+import os
+import gzip
+from datetime import date, datetime, time, timezone
+from pathlib import Path
+from typing import Any, Iterator, Mapping, Sequence
+
+FORMAT_VERSION = 1
+MAGIC = b"MAICOL1\n"
+MANIFEST_SUFFIX = ".json"
+
+_DECODERS = {
+    "datetime": datetime.fromisoformat,
+    "date": date.fromisoformat,
+    "time": time.fromisoformat,
+}
+
+
+def _type_name(value: Any) -> str | None:
+    # datetime — подкласс date, проверяется первым
+    for name, cls in (("datetime", datetime), ("date", date), ("time", time)):
+        if isinstance(value, cls):
+            return name
+    return None
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    raise TypeError(f"Unsupported archive value: {type(value).__name__}")
+
+
+class ColumnarWriter:
+    """
+    Пишет один файл. append копит строки в памяти, flush сбрасывает группу
+    на диск (блокирующий ввод-вывод — вызывать вне event loop).
+    Файл пишется во временный и переименовывается в close вместе
+    с манифестом: наличие манифеста означает, что файл записан целиком.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        columns: Sequence[str],
+        sort_key: str,
+        row_group_size: int,
+        meta: Mapping[str, Any] | None = None,
+    ):
+        self.path = path
+        self.columns = list(columns)
+        self.sort_key = sort_key
+        self.row_group_size = row_group_size
+        self.meta = dict(meta or {})
+        self.rows = 0
+        self._types: dict[str, str] = {}
+        self._buffer: dict[str, list] = {column: [] for column in self.columns}
+        self._groups: list[dict] = []
+        self._tmp = path.with_name(path.name + ".tmp")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self._tmp, "wb")
+        self._file.write(MAGIC)
+
+    @property
+    def full(self) -> bool:
+        return len(self._buffer[self.sort_key]) >= self.row_group_size
+
+    def append(self, row: Mapping[str, Any]) -> None:
+        for column in self.columns:
+            value = row[column]
+            if column not in self._types and value is not None:
+                type_name = _type_name(value)
+                if type_name:
+                    self._types[column] = type_name
+            self._buffer[column].append(value)
+
+    def flush(self) -> None:
+        keys = self._buffer[self.sort_key]
+        if not keys:
+            return
+        chunks = {}
+        for column in self.columns:
+            raw = json.dumps(self._buffer[column], default=_encode_value, separators=(",", ":"))
+            data = gzip.compress(raw.encode())
+            chunks[column] = [self._file.tell(), len(data)]
+            self._file.write(data)
+        self._groups.append({"rows": len(keys), "min": keys[0], "max": keys[-1], "chunks": chunks})
+        self.rows += len(keys)
+        self._buffer = {column: [] for column in self.columns}
+
+    def close(self) -> dict:
+        self.flush()
+        self._file.close()
+        manifest = {
+            **self.meta,
+            "format": FORMAT_VERSION,
+            "file": self.path.name,
+            "rows": self.rows,
+            "columns": self.columns,
+            "types": self._types,
+            "sort_key": self.sort_key,
+            "row_groups": self._groups,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        os.replace(self._tmp, self.path)
+        manifest_path = self.path.with_name(self.path.name + MANIFEST_SUFFIX)
+        manifest_tmp = manifest_path.with_name(manifest_path.name + ".tmp")
+        manifest_tmp.write_text(json.dumps(manifest, separators=(",", ":")))
+        os.replace(manifest_tmp, manifest_path)
+        return manifest
+
+    def abort(self) -> None:
+        self._file.close()
+        self._tmp.unlink(missing_ok=True)
+
+
+def read_manifest(manifest_path: Path) -> dict:
+    manifest = json.loads(manifest_path.read_text())
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported archive format in {manifest_path}")
+    return manifest
+
+
+def data_path(manifest_path: Path) -> Path:
+    return manifest_path.with_name(manifest_path.name[: -len(MANIFEST_SUFFIX)])
+
+
+def scan(
+    manifest_path: Path, key: Any, columns: Sequence[str] | None = None
+) -> Iterator[dict]:
+    """
+    Строки файла с заданным значением ключа сортировки. В памяти —
+    не больше одной группы выбранных колонок.
+    """
+    manifest = read_manifest(manifest_path)
+    sort_key = manifest["sort_key"]
+    columns = list(columns or manifest["columns"])
+    types = manifest["types"]
+
+    with open(data_path(manifest_path), "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not an archive file: {f.name}")
+
+        def read_chunk(group: dict, column: str) -> list:
+            offset, length = group["chunks"][column]
+            f.seek(offset)
+            values = json.loads(gzip.decompress(f.read(length)))
+            decode = _DECODERS.get(types.get(column))
+            if decode:
+                values = [None if value is None else decode(value) for value in values]
+            return values
+
+        for group in manifest["row_groups"]:
+            if not group["min"] <= key <= group["max"]:
+                continue
+            keys = read_chunk(group, sort_key)
+            lo, hi = bisect.bisect_left(keys, key), bisect.bisect_right(keys, key)
+            if lo == hi:
+                continue
+            values = {
+                column: (keys if column == sort_key else read_chunk(group, column))[lo:hi]
+                for column in columns
+            }
+            for i in range(hi - lo):
+                yield {column: values[column][i] for column in columns}
@@ -1,14 +1,140 @@
 from pydantic_settings import BaseSettings
 from pydantic import BaseModel
 import os
+import secrets
 
 class DbSettings(BaseModel):
     url: str = os.getenv("DATABASE_URL", "postgresql+asyncpg://postgres:postgres@db:5432/maisafe")
     echo: bool = True
 
 
+class AuthCacheSettings(BaseModel):
+    max_size: int = int(os.getenv("AUTH_CACHE_MAX_SIZE", "10000"))
+    ttl_seconds: float = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "300"))
+
+
+class PasswordPoolSettings(BaseModel):
+    workers: int = int(os.getenv("PASSWORD_POOL_WORKERS", str(os.cpu_count() or 2)))
+    max_pending: int = int(os.getenv("PASSWORD_POOL_MAX_PENDING", "64"))
+    # Массовая регистрация хеширует в отдельном пуле порциями по bulk_chunk_size,
+    # не занимая места проверок пароля при входе. По умолчанию — половина ядер:
+    # вторая половина остаётся проверкам пароля
+    bulk_workers: int = int(os.getenv("PASSWORD_POOL_BULK_WORKERS", str(max((os.cpu_count() or 2) // 2, 1))))
+    bulk_chunk_size: int = int(os.getenv("PASSWORD_POOL_BULK_CHUNK_SIZE", "50"))
+
+
+class ServiceAccountSettings(BaseModel):
+    # uuid служебных учётных записей (через запятую): им доступна массовая регистрация
+    uuids: frozenset[str] = frozenset(
+        uuid.strip() for uuid in os.getenv("SERVICE_ACCOUNT_UUIDS", "").split(",") if uuid.strip()
+    )
+
+
+class JwtSettings(BaseModel):
+    # Без JWT_SECRET ключ генерируется при старте: токены живут до рестарта.
+    secret: str = os.getenv("JWT_SECRET") or secrets.token_urlsafe(32)
+    algorithm: str = os.getenv("JWT_ALGORITHM", "HS256")
+    access_ttl_seconds: int = int(os.getenv("JWT_ACCESS_TTL_SECONDS", "900"))
+    refresh_ttl_seconds: int = int(os.getenv("JWT_REFRESH_TTL_SECONDS", str(30 * 24 * 3600)))
+    # Отзывы access-токенов в памяти процесса, каждый живёт access_ttl_seconds
+    revocations_max_size: int = int(os.getenv("JWT_REVOCATIONS_MAX_SIZE", "100000"))
+
+
+class IdempotencySettings(BaseModel):
+    ttl_seconds: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+    cache_size: int = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+
+
+class SyncSettings(BaseModel):
+    # Курсор старше срока хранения следов удалений требует полной выгрузки
+    tombstone_retention_days: int = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "30"))
+
+
+class AnalyticsSettings(BaseModel):
+    # Ключ кэша включает версию данных пациента; TTL ограничивает лишь
+    # устаревание счётчика пропусков, зависящего от текущего времени
+    cache_size: int = int(os.getenv("ANALYTICS_CACHE_SIZE", "1024"))
+    cache_ttl_seconds: float = float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "300"))
+
+
+class ReadModelSettings(BaseModel):
+    max_patients: int = int(os.getenv("READ_MODEL_MAX_PATIENTS", "1000"))
+    # Суммарный бюджет строк на процесс и предел для одного пациента:
+    # более длинные истории читаются из БД постранично, мимо кэша
+    max_rows: int = int(os.getenv("READ_MODEL_MAX_ROWS", "500000"))
+    max_patient_rows: int = int(os.getenv("READ_MODEL_MAX_PATIENT_ROWS", "20000"))
+
+
+class RetentionSettings(BaseModel):
+    # intake_history секционирована по месяцам scheduled_time: раздел
+    # удаляется целиком, когда весь его месяц старше срока хранения
+    intake_history_days: int = int(os.getenv("INTAKE_HISTORY_RETENTION_DAYS", "60"))
+    intake_partitions_ahead_months: int = int(os.getenv("INTAKE_PARTITIONS_AHEAD_MONTHS", "3"))
+    # Сроки хранения остальных сущностей; для кодов и ключей идемпотентности —
+    # запас после истечения expires_at
+    medications_days: int = int(os.getenv("MEDICATIONS_RETENTION_DAYS", "60"))
+    invitation_codes_days: int = int(os.getenv("INVITATION_CODES_RETENTION_DAYS", "0"))
+    idempotency_keys_days: int = int(os.getenv("IDEMPOTENCY_KEYS_RETENTION_DAYS", "0"))
+    # Очистка идёт пакетами по первичному ключу, commit на пакет
+    batch_size: int = int(os.getenv("RETENTION_BATCH_SIZE", "1000"))
+    batch_sleep_seconds: float = float(os.getenv("RETENTION_BATCH_SLEEP_SECONDS", "0.2"))
+
+
+class ArchiveSettings(BaseModel):
+    # Перед удалением по сроку хранения строки выгружаются в файлы архива
+    enabled: bool = os.getenv("ARCHIVE_ENABLED", "true").lower() == "true"
+    dir: str = os.getenv("ARCHIVE_DIR", "archive")
+    fetch_size: int = int(os.getenv("ARCHIVE_FETCH_SIZE", "5000"))
+    row_group_size: int = int(os.getenv("ARCHIVE_ROW_GROUP_SIZE", "10000"))
+
+
+class ReminderSettings(BaseModel):
+    enabled: bool = os.getenv("REMINDERS_ENABLED", "true").lower() == "true"
+    # Приёмы загружаются в колесо таймеров на horizon вперёд порциями по refill
+    horizon_minutes: int = int(os.getenv("REMINDER_HORIZON_MINUTES", "120"))
+    refill_minutes: int = int(os.getenv("REMINDER_REFILL_MINUTES", "15"))
+    tick_seconds: float = float(os.getenv("REMINDER_TICK_SECONDS", "1"))
+    # Изменения препаратов подхватываются по водяному знаку xid
+    poll_seconds: float = float(os.getenv("REMINDER_POLL_SECONDS", "5"))
+    batch_size: int = int(os.getenv("REMINDER_BATCH_SIZE", "500"))
+    page_size: int = int(os.getenv("REMINDER_PAGE_SIZE", "5000"))
+    # log — только журнал; webhook — POST пакета JSON на webhook_url
+    sink: str = os.getenv("REMINDER_SINK", "log")
+    webhook_url: str = os.getenv("REMINDER_WEBHOOK_URL", "http://localhost:9000/reminders")
+    webhook_timeout_seconds: float = float(os.getenv("REMINDER_WEBHOOK_TIMEOUT_SECONDS", "5"))
+
+
+class MissedDoseSettings(BaseModel):
+    # Приём считается пропущенным, если записи нет через grace после срока
+    grace_minutes: int = int(os.getenv("MISSED_DOSE_GRACE_MINUTES", "60"))
+    interval_minutes: int = int(os.getenv("MISSED_DOSE_INTERVAL_MINUTES", "15"))
+    # Окно одного запуска: после простоя отставание догоняется за несколько запусков
+    max_window_hours: int = int(os.getenv("MISSED_DOSE_MAX_WINDOW_HOURS", "24"))
+
+
+class EventStreamSettings(BaseModel):
+    # Очередь подписчика: переполнение — медленный клиент, поток закрывается
+    queue_size: int = int(os.getenv("EVENT_STREAM_QUEUE_SIZE", "100"))
+    heartbeat_seconds: float = float(os.getenv("EVENT_STREAM_HEARTBEAT_SECONDS", "15"))
+    max_subscribers: int = int(os.getenv("EVENT_STREAM_MAX_SUBSCRIBERS", "10000"))
+    reconnect_seconds: float = float(os.getenv("EVENT_STREAM_RECONNECT_SECONDS", "5"))
+
+
 class Settings(BaseSettings):
     db: DbSettings = DbSettings()
+    auth_cache: AuthCacheSettings = AuthCacheSettings()
+    password_pool: PasswordPoolSettings = PasswordPoolSettings()
+    service_accounts: ServiceAccountSettings = ServiceAccountSettings()
+    jwt: JwtSettings = JwtSettings()
+    idempotency: IdempotencySettings = IdempotencySettings()
+    sync: SyncSettings = SyncSettings()
+    analytics: AnalyticsSettings = AnalyticsSettings()
+    read_model: ReadModelSettings = ReadModelSettings()
+    retention: RetentionSettings = RetentionSettings()
+    archive: ArchiveSettings = ArchiveSettings()
+    reminders: ReminderSettings = ReminderSettings()
+    missed_doses: MissedDoseSettings = MissedDoseSettings()
+    event_stream: EventStreamSettings = EventStreamSettings()
 
 
 settings = Settings()
@@ -0,0 +1,84 @@
+# app/core/credential_cache.py
+import hashlib
+import hmac
+import secrets
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.auth.models.user import User
+from app.core.cache import LRUTTLCache
+from app.core.config import settings
+
+# Ключ процесса: в памяти лежит только HMAC пароля, а не сам пароль
+# и не перебираемый offline sha256.
+_DIGEST_KEY = secrets.token_bytes(32)
+
+
+def password_digest(password: str) -> bytes:
+    return hmac.new(_DIGEST_KEY, password.encode(), hashlib.sha256).digest()
+
+
+async def attach_user_snapshot(db: AsyncSession, **columns) -> User:
+    """
+    Возвращает User, привязанный к сессии, без SELECT в БД.
+    Непереданные колонки остаются незагруженными: под AsyncSession их
+    читают явно через db.refresh(user, [...]), обращение без refresh
+    поднимает MissingGreenlet.
+    """
+    user = User(**columns)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
+
+class CachedUser:
+    """
+    Снимок пользователя, чьи учётные данные уже проверены bcrypt.
+    Хранит только uuid и username: relation_id (привязка мед-друга) и
+    token_version (logout) меняются в любом процессе, а кэш сбрасывается
+    только в своём, поэтому их читают из БД — пути друзей и /auth/login.
+    """
+    __slots__ = ("uuid", "username", "password_digest")
+
+    def __init__(self, user: User, password_digest: bytes):
+        self.uuid: str = user.uuid
+        self.username: str = user.username
+        self.password_digest = password_digest
+
+    async def attach(self, db: AsyncSession) -> User:
+        return await attach_user_snapshot(db, uuid=self.uuid, username=self.username)
+
+
+class CredentialCache:
+    """Кэш проверенных пар (uuid, пароль) -> снимок пользователя."""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self._cache: LRUTTLCache[CachedUser] = LRUTTLCache(max_size, ttl_seconds)
+
+    def lookup(self, uuid_: str, password: str) -> CachedUser | None:
+        entry = self._cache.get(uuid_)
+        if entry is None:
+            return None
+        if not hmac.compare_digest(entry.password_digest, password_digest(password)):
+            # Другой пароль — проверяем заново через bcrypt.
+            return None
+        return entry
+
+    def store(self, user: User, password: str) -> None:
+        self._cache.set(user.uuid, CachedUser(user, password_digest(password)))
+
+    def invalidate(self, uuid_: str) -> None:
+        """Сбрасывает запись; вызывать при смене пароля или версии токенов."""
+        self._cache.pop(uuid_)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        return self._cache.stats()
+
+
+credential_cache = CredentialCache(
+    max_size=settings.auth_cache.max_size,
+    ttl_seconds=settings.auth_cache.ttl_seconds,
+)
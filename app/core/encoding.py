@@ -0,0 +1,145 @@
+# app/core/encoding.py
+import gzip
+import json
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+# Необязательные кодеки: включаются, если пакет установлен в окружении.
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.mai.columnar+json"
+MSGPACK = "application/x-msgpack"
+
+# Тело меньше порога не сжимается: заголовки и CPU дороже выигрыша
+COMPRESSION_THRESHOLD = 1024
+GZIP_LEVEL = 5
+ZSTD_LEVEL = 3
+
+_MEDIA_ALIASES = {
+    "application/msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+}
+
+
+def _parse_header_values(header: str | None) -> list[tuple[str, float]]:
+    """Разбирает Accept / Accept-Encoding с учётом q, по убыванию q."""
+    if not header:
+        return []
+    values = []
+    for part in header.split(","):
+        token, *params = [p.strip() for p in part.split(";")]
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            values.append((token.lower(), q))
+    return sorted(values, key=lambda item: item[1], reverse=True)
+
+
+def available_formats() -> list[str]:
+    formats = [JSON, COLUMNAR_JSON]
+    if msgpack is not None:
+        formats.append(MSGPACK)
+    return formats
+
+
+def available_encodings() -> list[str]:
+    encodings = ["gzip"]
+    if zstandard is not None:
+        encodings.insert(0, "zstd")
+    return encodings
+
+
+def choose_format(accept: str | None) -> str:
+    formats = available_formats()
+    for media_type, _ in _parse_header_values(accept):
+        media_type = _MEDIA_ALIASES.get(media_type, media_type)
+        if media_type in formats:
+            return media_type
+    return JSON
+
+
+def choose_encoding(accept_encoding: str | None) -> str | None:
+    offered = dict(_parse_header_values(accept_encoding))
+    candidates = [e for e in available_encodings() if e in offered]
+    if not candidates:
+        return None
+    # При равных q предпочитаем zstd (порядок available_encodings)
+    return max(candidates, key=lambda e: offered[e])
+
+
+def to_columnar(data: Any) -> Any:
+    """
+    Список однотипных объектов -> {"columns": {поле: [значения]}, "count": n}.
+    В словаре преобразуются все вложенные списки объектов.
+    """
+    if isinstance(data, dict):
+        return {key: to_columnar(value) for key, value in data.items()}
+    if isinstance(data, list) and data and all(isinstance(row, dict) for row in data):
+        fields: dict[str, None] = {}
+        for row in data:
+            fields.update(dict.fromkeys(row))
+        return {
+            "count": len(data),
+            "columns": {field: [row.get(field) for row in data] for field in fields},
+        }
+    return data
+
+
+def encode_body(data: Any, media_type: str) -> bytes:
+    if media_type == MSGPACK:
+        return msgpack.packb(data, use_bin_type=True)
+    if media_type == COLUMNAR_JSON:
+        data = to_columnar(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def negotiated_response(
+    request: Request,
+    payload: Any,
+    status_code: int = 200,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    """
+    Кодирует payload в формат из Accept (JSON, колоночный JSON, MessagePack)
+    и сжимает по Accept-Encoding (zstd, gzip), если тело больше порога.
+    """
+    media_type = choose_format(request.headers.get("accept"))
+    body = encode_body(jsonable_encoder(payload), media_type)
+
+    response_headers = {"Vary": "Accept, Accept-Encoding", **(headers or {})}
+    if len(body) >= COMPRESSION_THRESHOLD:
+        encoding = choose_encoding(request.headers.get("accept-encoding"))
+        if encoding is not None:
+            body = compress_body(body, encoding)
+            response_headers["Content-Encoding"] = encoding
+
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type=media_type,
+        headers=response_headers,
+    )
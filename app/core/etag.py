@@ -0,0 +1,38 @@
+# app/core/etag.py
+import hashlib
+
+from fastapi import Request, Response
+
+
+def make_etag(request: Request, scope: str, version: int) -> str:
+    """
+    Слабый ETag: версия данных + отпечаток представления
+    (путь, параметры запроса, Accept, Accept-Encoding, владелец данных).
+    """
+    variant = "|".join((
+        scope,
+        request.url.path,
+        str(request.url.query),
+        request.headers.get("accept", ""),
+        request.headers.get("accept-encoding", ""),
+    ))
+    digest = hashlib.blake2b(variant.encode(), digest_size=8).hexdigest()
+    return f'W/"{version}-{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Сравнение слабое: префикс W/ не учитывается
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=304,
+        headers={"ETag": etag, "Vary": "Accept, Accept-Encoding"},
+    )
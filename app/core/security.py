@@ -1,30 +1,96 @@
 from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from fastapi.security import (
+    HTTPAuthorizationCredentials,
+    HTTPBasic,
+    HTTPBasicCredentials,
+    HTTPBearer,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import db_helper
 from app.auth.crud.user import get_user_by_uuid
 from app.auth.models.user import User
-from app.auth.utils.password import verify_password
+from app.auth.utils.password import PasswordPoolBusy, verify_password_async
+from app.core.config import settings
+from app.core.credential_cache import attach_user_snapshot, credential_cache
+from app.core.tokens import TokenError, decode_token
 
-security = HTTPBasic()
+security = HTTPBasic(auto_error=False)
+bearer_security = HTTPBearer(auto_error=False)
 
 
-async def get_current_user(
-    credentials: HTTPBasicCredentials = Depends(security),
-    db: AsyncSession = Depends(db_helper.session_dependency),
-):
-    user: User | None = await get_user_by_uuid(db, credentials.username)
-
-    unauthed_exc = HTTPException(
+def _unauthed_exc() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid authentication credentials",
         headers={"WWW-Authenticate": "Basic"},
     )
 
-    if not user or not verify_password(
-        credentials.password,
-        user.hash_password,
-    ):
-        raise unauthed_exc
-        
-    return user
\ No newline at end of file
+
+async def authenticate_user(db: AsyncSession, uuid_: str, password: str) -> User:
+    """Проверка пары uuid/пароль: кэш, затем БД и bcrypt."""
+    cached = credential_cache.lookup(uuid_, password)
+    if cached is not None:
+        return await cached.attach(db)
+
+    user: User | None = await get_user_by_uuid(db, uuid_)
+
+    if not user:
+        raise _unauthed_exc()
+
+    try:
+        verified = await verify_password_async(password, user.hash_password)
+    except PasswordPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service is busy, retry later",
+            headers={"Retry-After": "1"},
+        )
+    if not verified:
+        raise _unauthed_exc()
+
+    credential_cache.store(user, password)
+    return user
+
+
+async def get_current_user_from_token(db: AsyncSession, token: str) -> User:
+    """
+    Stateless-проверка access-токена: без запроса в БД и без bcrypt.
+    relation_id в токен не входит — его читают из БД там, где он нужен.
+    """
+    try:
+        claims = decode_token(token, "access")
+    except TokenError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired access token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await attach_user_snapshot(
+        db,
+        uuid=claims["sub"],
+        username=claims.get("name"),
+        token_version=claims.get("ver", 0),
+    )
+
+
+async def get_current_user(
+    credentials: HTTPBasicCredentials | None = Depends(security),
+    bearer: HTTPAuthorizationCredentials | None = Depends(bearer_security),
+    db: AsyncSession = Depends(db_helper.session_dependency),
+):
+    """Bearer access-токен или HTTP Basic (для старых клиентов)."""
+    if bearer is not None:
+        return await get_current_user_from_token(db, bearer.credentials)
+    if credentials is None:
+        raise _unauthed_exc()
+    return await authenticate_user(db, credentials.username, credentials.password)
+
+
+async def get_service_account(current_user: User = Depends(get_current_user)) -> User:
+    """Только служебные учётные записи из SERVICE_ACCOUNT_UUIDS."""
+    if current_user.uuid not in settings.service_accounts.uuids:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Service account required",
+        )
+    return current_user
@@ -0,0 +1,87 @@
+# app/core/timing_wheel.py
+"""
+Иерархическое колесо таймеров.
+
+Уровень 0 — slots ячеек по одному тику, каждый следующий уровень —
+slots ячеек по slots**level тиков. Элемент кладётся на самый нижний
+уровень, чей охват вмещает его задержку; когда время доходит до ячейки
+верхнего уровня, её элементы перекладываются ниже. Вставка и срабатывание
+— O(1) на элемент, сколько бы элементов ни ждало; задержки больше охвата
+всех уровней ждут в списке переполнения.
+"""
+from typing import Any
+
+
+class TimingWheel:
+    def __init__(self, start: float, tick_seconds: float = 1.0, slots: int = 64, levels: int = 4):
+        self.tick_seconds = tick_seconds
+        self.slots = slots
+        self.levels = levels
+        self._wheels: list[list[list[tuple[int, Any]]]] = [
+            [[] for _ in range(slots)] for _ in range(levels)
+        ]
+        self._overflow: list[tuple[int, Any]] = []
+        self._ready: list[Any] = []
+        self._current = self._tick(start)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _tick(self, when: float) -> int:
+        return int(when // self.tick_seconds)
+
+    def add(self, when: float, item: Any) -> None:
+        """Элемент сработает при advance(now) с now >= when (с точностью до тика)."""
+        self._size += 1
+        self._place(self._tick(when), item)
+
+    def _place(self, tick: int, item: Any) -> None:
+        delta = tick - self._current
+        if delta <= 0:
+            self._ready.append(item)
+            return
+        span, granularity = self.slots, 1
+        for wheel in self._wheels:
+            if delta < span:
+                wheel[(tick // granularity) % self.slots].append((tick, item))
+                return
+            span *= self.slots
+            granularity *= self.slots
+        self._overflow.append((tick, item))
+
+    def advance(self, now: float) -> list[Any]:
+        """Элементы, срок которых наступил к now, в порядке срабатывания тиков."""
+        target = self._tick(now)
+        due, self._ready = self._ready, []
+        while self._current < target:
+            if self._size == len(due):
+                # Больше ничего не ждёт — пропускаем пустые тики разом
+                self._current = target
+                break
+            self._current += 1
+            tick = self._current
+
+            granularity = self.slots
+            for level in range(1, self.levels):
+                if tick % granularity:
+                    break
+                slot = (tick // granularity) % self.slots
+                bucket, self._wheels[level][slot] = self._wheels[level][slot], []
+                for item_tick, item in bucket:
+                    self._place(item_tick, item)
+                granularity *= self.slots
+            else:
+                if tick % granularity == 0 and self._overflow:
+                    overflow, self._overflow = self._overflow, []
+                    for item_tick, item in overflow:
+                        self._place(item_tick, item)
+
+            slot = tick % self.slots
+            bucket, self._wheels[0][slot] = self._wheels[0][slot], []
+            due.extend(item for _, item in bucket)
+            if self._ready:
+                due.extend(self._ready)
+                self._ready = []
+        self._size -= len(due)
+        return due
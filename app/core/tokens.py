@@ -0,0 +1,82 @@
+# app/core/tokens.py
+import datetime
+from typing import Literal
+
+from jose import JWTError, jwt
+
+from app.auth.models.user import User
+from app.core.cache import LRUTTLCache
+from app.core.config import settings
+
+TokenType = Literal["access", "refresh"]
+
+
+class TokenError(Exception):
+    """Токен не прошёл проверку."""
+    pass
+
+
+class TokenRevocations:
+    """
+    Минимальная допустимая версия токенов по uuid, известная этому процессу.
+    Позволяет отзывать access-токены без обращения к БД; refresh-токены
+    дополнительно сверяются с users.token_version.
+
+    Отзыв действует только в процессе, где выполнен logout: другие воркеры
+    принимают отозванный access-токен до истечения его срока
+    (JWT_ACCESS_TTL_SECONDS). Запись хранится столько же — токены, выданные
+    до отзыва, к этому времени истекают сами. При переполнении
+    (JWT_REVOCATIONS_MAX_SIZE) вытесняются самые старые отзывы.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self._min_versions: LRUTTLCache[int] = LRUTTLCache(max_size, ttl_seconds)
+
+    def revoke_below(self, uuid_: str, version: int) -> None:
+        if version > (self._min_versions.get(uuid_) or 0):
+            self._min_versions.set(uuid_, version)
+
+    def is_revoked(self, uuid_: str, version: int) -> bool:
+        return version < (self._min_versions.get(uuid_) or 0)
+
+    def stats(self) -> dict[str, int | float]:
+        return self._min_versions.stats()
+
+
+token_revocations = TokenRevocations(
+    max_size=settings.jwt.revocations_max_size,
+    ttl_seconds=settings.jwt.access_ttl_seconds,
+)
+
+
+def create_token(user: User, token_type: TokenType) -> str:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    ttl = (
+        settings.jwt.access_ttl_seconds
+        if token_type == "access"
+        else settings.jwt.refresh_ttl_seconds
+    )
+    claims = {
+        "sub": user.uuid,
+        "typ": token_type,
+        "ver": user.token_version,
+        "iat": now,
+        "exp": now + datetime.timedelta(seconds=ttl),
+    }
+    if token_type == "access":
+        claims["name"] = user.username
+    return jwt.encode(claims, settings.jwt.secret, algorithm=settings.jwt.algorithm)
+
+
+def decode_token(token: str, token_type: TokenType) -> dict:
+    """Проверяет подпись, срок, тип и версию токена; возвращает claims."""
+    try:
+        claims = jwt.decode(token, settings.jwt.secret, algorithms=[settings.jwt.algorithm])
+    except JWTError as e:
+        raise TokenError(str(e))
+
+    if claims.get("typ") != token_type or "sub" not in claims:
+        raise TokenError("Неверный тип токена")
+    if token_revocations.is_revoked(claims["sub"], int(claims.get("ver", 0))):
+        raise TokenError("Токен отозван")
+    return claims
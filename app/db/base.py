@@ -6,3 +6,8 @@ class Base(DeclarativeBase):
 from app.auth.models.user import User
 from app.medicines.models.medication import Medication
 from app.medicines.models.intake import IntakeHistory
+from app.medicines.models.idempotency import IdempotencyKey
+from app.medicines.models.tombstone import SyncTombstone
+from app.medicines.models.adherence import DailyAdherence
+from app.medicines.models.retention import RetentionCheckpoint
+from app.medicines.models.missed_dose import MissedDose, JobWatermark
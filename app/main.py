@@ -10,12 +10,26 @@ import os
 from app.db.session import db_helper
 from app.core.scheduler import scheduler
 from app.auth.tasks.cleanup_tasks import cleanup_old_data
+from app.medicines.tasks.adherence_tasks import rebuild_daily_adherence_job
+from app.medicines.tasks.partition_tasks import maintain_intake_partitions
+from app.medicines.tasks.missed_dose_tasks import detect_missed_doses_job
+from app.core.credential_cache import credential_cache
+from app.core.tokens import token_revocations
+from app.auth.utils.password import bulk_password_pool, password_pool
+from app.medicines.services import analytics_service, idempotency_service, retention_service
+from app.medicines.services.read_model import read_model_cache
+from app.medicines.services.reminder_service import reminder_dispatcher
+from app.medicines.services.event_stream import event_broker
+from app.core.config import settings
 
 from app.auth.api.auth import router as auth_router
 from app.auth.api.friend import router as friend_router
 from app.medicines.api.medication import router as medication_router
 from app.medicines.api.intake import router as intake_router
 from app.medicines.api.sync import router as sync_router
+from app.medicines.api.analytics import router as analytics_router
+from app.medicines.api.archive import router as archive_router
+from app.medicines.api.events import router as events_router
 
 
 # ==================== LIFESPAN ====================
@@ -33,8 +47,32 @@ async def lifespan(app: FastAPI):
         id="daily_cleanup",
         next_run_time=datetime.now(timezone.utc) + timedelta(minutes=1),
     )
+    scheduler.add_job(
+        rebuild_daily_adherence_job,
+        "interval",
+        days=1,
+        id="daily_adherence_rebuild",
+        next_run_time=datetime.now(timezone.utc) + timedelta(minutes=10),
+    )
+    scheduler.add_job(
+        maintain_intake_partitions,
+        "interval",
+        days=1,
+        id="intake_partitions",
+        next_run_time=datetime.now(timezone.utc),
+    )
+    scheduler.add_job(
+        detect_missed_doses_job,
+        "interval",
+        minutes=settings.missed_doses.interval_minutes,
+        id="missed_doses",
+        next_run_time=datetime.now(timezone.utc) + timedelta(minutes=2),
+    )
     scheduler.start()
     print("✅ Планировщик задач запущен")
+    if settings.reminders.enabled:
+        reminder_dispatcher.start()
+    event_broker.start()
     
     yield
     
@@ -42,6 +80,10 @@ async def lifespan(app: FastAPI):
     print("🛑 Остановка приложения...")
     scheduler.shutdown()
     print("✅ Планировщик задач остановлен")
+    await reminder_dispatcher.stop()
+    await event_broker.stop()
+    password_pool.shutdown()
+    bulk_password_pool.shutdown()
 
 
 # ==================== СОЗДАНИЕ ПРИЛОЖЕНИЯ ====================
@@ -122,6 +164,26 @@ async def health_check(db: AsyncSession = Depends(get_db)):
         )
 
 
+@app.get("/metrics")
+async def metrics():
+    """
+    Метрики in-process кэшей и пулов
+    """
+    return {
+        "credential_cache": credential_cache.stats(),
+        "token_revocations": token_revocations.stats(),
+        "password_pool": password_pool.stats(),
+        "bulk_password_pool": bulk_password_pool.stats(),
+        "idempotency_cache": idempotency_service.stats(),
+        "analytics_cache": analytics_service.stats(),
+        "read_model_cache": read_model_cache.stats(),
+        "retention": retention_service.stats(),
+        "reminders": reminder_dispatcher.stats(),
+        "event_stream": event_broker.stats(),
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
+
 @app.get("/test")
 async def test_endpoint(request: Request):
     """
@@ -183,6 +245,9 @@ app.include_router(friend_router)
 app.include_router(medication_router)
 app.include_router(intake_router)
 app.include_router(sync_router)
+app.include_router(analytics_router)
+app.include_router(archive_router)
+app.include_router(events_router)
 
 
 # ==================== ОБРАБОТЧИКИ ОШИБОК ====================
@@ -0,0 +1,85 @@
+# app/medicines/api/analytics.py
+from datetime import date
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import db_helper
+from app.auth.models.user import User
+from app.core.encoding import negotiated_response
+from app.core.security import get_current_user
+from app.medicines.crud.data_version import get_data_version, get_patient_data_version_for_friend
+from app.medicines.services import analytics_service
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+MAX_WINDOW_DAYS = 366
+
+
+async def _adherence_response(
+    request: Request,
+    db: AsyncSession,
+    patient_id: str,
+    data_version: int,
+    period: str,
+    date_from: date,
+    date_to: date,
+):
+    if date_to < date_from:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_to is before date_from")
+    if (date_to - date_from).days >= MAX_WINDOW_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Analytics window is limited to {MAX_WINDOW_DAYS} days",
+        )
+
+    rows = await analytics_service.get_adherence(
+        db, patient_id, data_version, period, date_from, date_to
+    )
+    return negotiated_response(request, {
+        "period": period,
+        "date_from": date_from,
+        "date_to": date_to,
+        "rows": rows,
+    })
+
+
+@router.get("/adherence")
+async def get_adherence(
+    request: Request,
+    date_from: date,
+    date_to: date,
+    period: Literal["week", "month"] = "week",
+    db: AsyncSession = Depends(db_helper.session_dependency),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Соблюдение режима пациентом: taken / skipped / missed по препаратам
+    за каждую неделю или месяц окна (UTC, включительно).
+    """
+    data_version = await get_data_version(db, current_user.uuid)
+    return await _adherence_response(
+        request, db, current_user.uuid, data_version, period, date_from, date_to
+    )
+
+
+@router.get("/adherence_for_current_friend")
+async def get_adherence_for_current_friend(
+    request: Request,
+    date_from: date,
+    date_to: date,
+    period: Literal["week", "month"] = "week",
+    db: AsyncSession = Depends(db_helper.session_dependency),
+    current_user: User = Depends(get_current_user),
+):
+    """Соблюдение режима пациентом — для его мед-друга."""
+    patient = await get_patient_data_version_for_friend(db, current_user.uuid)
+    if not patient:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Patient not found for this med friend"
+        )
+
+    patient_id, data_version = patient
+    return await _adherence_response(
+        request, db, patient_id, data_version, period, date_from, date_to
+    )
@@ -0,0 +1,90 @@
+# app/medicines/api/archive.py
+import asyncio
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import db_helper
+from app.auth.models.user import User
+from app.core.encoding import negotiated_response
+from app.core.security import get_current_user
+from app.medicines.crud.data_version import get_patient_data_version_for_friend
+from app.medicines.services import archive_service
+from app.medicines.utils.cursors import decode_intake_page_cursor, encode_page_cursor
+
+router = APIRouter(prefix="/archive", tags=["archive"])
+
+MAX_PAGE_SIZE = 1000
+MAX_WINDOW_DAYS = 366
+
+
+async def _intake_archive_response(
+    request: Request,
+    patient_id: str,
+    date_from: date,
+    date_to: date,
+    limit: int,
+    cursor: str | None,
+):
+    if date_to < date_from:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_to is before date_from")
+    if (date_to - date_from).days >= MAX_WINDOW_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Archive window is limited to {MAX_WINDOW_DAYS} days",
+        )
+    after = None
+    if cursor:
+        try:
+            after = decode_intake_page_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid page cursor")
+
+    # Чтение файлов блокирующее — вне event loop
+    intakes = await asyncio.to_thread(
+        archive_service.read_intake_archive, patient_id, date_from, date_to, after, limit
+    )
+    headers = {}
+    if len(intakes) == limit:
+        last = intakes[-1]
+        headers["X-Next-Cursor"] = encode_page_cursor(last["scheduled_time"], last["id"])
+    return negotiated_response(request, intakes, headers=headers)
+
+
+@router.get("/intakes")
+async def get_archived_intakes(
+    request: Request,
+    date_from: date,
+    date_to: date,
+    limit: int = Query(500, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    История приёма, удалённая из БД по сроку хранения, — из архива.
+    Дни [date_from, date_to] по UTC, записи от старых к новым; курсор
+    следующей страницы — в заголовке X-Next-Cursor.
+    """
+    return await _intake_archive_response(request, current_user.uuid, date_from, date_to, limit, cursor)
+
+
+@router.get("/intakes_for_current_friend")
+async def get_archived_intakes_for_current_friend(
+    request: Request,
+    date_from: date,
+    date_to: date,
+    limit: int = Query(500, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(db_helper.session_dependency),
+    current_user: User = Depends(get_current_user),
+):
+    """Архивная история приёма пациента — для его мед-друга."""
+    patient = await get_patient_data_version_for_friend(db, current_user.uuid)
+    if not patient:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Patient not found for this med friend"
+        )
+
+    patient_id, _ = patient
+    return await _intake_archive_response(request, patient_id, date_from, date_to, limit, cursor)
@@ -0,0 +1,51 @@
+# app/medicines/api/events.py
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import db_helper
+from app.auth.models.user import User
+from app.core.security import get_current_user
+from app.medicines.crud.data_version import get_patient_data_version_for_friend
+from app.medicines.services.event_stream import event_broker
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+
+@router.get("/stream_for_current_friend")
+async def stream_events_for_current_friend(
+    db: AsyncSession = Depends(db_helper.session_dependency),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Поток изменений данных пациента для мед-друга (text/event-stream).
+    События: ready, intake, medication_created, medication_deleted, sync;
+    resync и overflow — перечитать данные и переподключиться; revoked —
+    мед-друг отвязан, поток закрыт.
+    """
+    patient = await get_patient_data_version_for_friend(db, current_user.uuid)
+    if not patient:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Patient not found for this med friend"
+        )
+
+    patient_id, _ = patient
+    friend_id = current_user.uuid
+    # Соединение из пула на время потока не держим
+    await db.close()
+    if event_broker.full:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many event stream subscribers"
+        )
+
+    async def still_linked() -> bool:
+        async with db_helper.session_factory() as session:
+            current = await get_patient_data_version_for_friend(session, friend_id)
+        return current is not None and current[0] == patient_id
+
+    return StreamingResponse(
+        event_broker.stream(patient_id, still_linked),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,16 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import db_helper
 from app.auth.models.user import User
+from app.core.encoding import negotiated_response
+from app.core.etag import etag_matches, make_etag, not_modified
 from app.core.security import get_current_user
 from app.medicines.models.medication import Medication
 from app.medicines.schemas.schemas import IntakeHistoryCreateRequest, IntakeHistoryResponse
 from app.medicines.crud.intake import create_or_update_intake_history, get_intake_history_by_patient_id
-from app.auth.crud.friend import get_patient_id_for_current_friend
+from app.medicines.crud.data_version import get_patient_data_version_for_friend
+from app.medicines.crud.missed_dose import get_missed_doses_by_patient_id
+from app.medicines.services.read_model import read_model_cache
+from app.medicines.utils.cursors import decode_intake_page_cursor, encode_page_cursor
 
 router = APIRouter(prefix="/intake", tags=["intake"])
 
+MAX_PAGE_SIZE = 1000
+
 
 @router.post("/add_or_update", response_model=IntakeHistoryResponse)
 async def add_or_update_intake(
@@ -28,20 +37,101 @@ async def add_or_update_intake(
     if not medication:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Medication does not belong to current user")
 
-    intake = await create_or_update_intake_history(db, data.model_dump())
+    intake = await create_or_update_intake_history(db, data.model_dump(), current_user.uuid)
     return intake
 
 @router.get("/get_intakes_for_current_friend") 
 async def get_intakes_for_current_friend(
+    request: Request,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    medication_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(db_helper.session_dependency),
     current_user: User = Depends(get_current_user), 
 ):
-    """Получить всю историю приемов пациента, для которого текущий пользователь является мед-другом"""
-    patient_id = await get_patient_id_for_current_friend(db, current_user.uuid) # Передаём id мед-друга
+    """
+    Получить историю приемов пациента, для которого текущий пользователь является мед-другом.
+    Записи идут от новых к старым. При заданном limit и полной странице
+    курсор следующей страницы возвращается в заголовке X-Next-Cursor.
+    Формат и сжатие ответа выбираются по Accept / Accept-Encoding.
+    Поддерживает If-None-Match: при неизменной версии данных — 304 без выборки.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_intake_page_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid page cursor")
+
+    patient = await get_patient_data_version_for_friend(db, current_user.uuid) # Передаём id мед-друга
 
-    if not patient_id:
+    if not patient:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found for this med friend")
 
-    intakes = await get_intake_history_by_patient_id(db, patient_id)
-    return intakes 
+    patient_id, data_version = patient
+    etag = make_etag(request, patient_id, data_version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    read_model = await read_model_cache.get(db, patient_id, data_version)
+    if read_model is not None:
+        intakes = read_model.intakes_page(date_from, date_to, medication_id, after, limit)
+    else:
+        intakes = await get_intake_history_by_patient_id(
+            db,
+            patient_id,
+            date_from=date_from,
+            date_to=date_to,
+            medication_id=medication_id,
+            after=after,
+            limit=limit,
+        )
+    headers = {"ETag": etag}
+    if limit is not None and len(intakes) == limit:
+        last = intakes[-1]
+        headers["X-Next-Cursor"] = encode_page_cursor(last["scheduled_time"], last["id"])
+    return negotiated_response(request, intakes, headers=headers)
+
+
+@router.get("/get_missed_for_current_friend")
+async def get_missed_for_current_friend(
+    request: Request,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(db_helper.session_dependency),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Пропущенные приёмы пациента мед-друга (задача detect_missed_doses),
+    от новых к старым. recorded_status заполнен, если запись о приёме
+    внесли позже. Курсор следующей страницы — в заголовке X-Next-Cursor.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_intake_page_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid page cursor")
 
+    patient = await get_patient_data_version_for_friend(db, current_user.uuid)
+    if not patient:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found for this med friend")
+
+    patient_id, _ = patient
+    missed = await get_missed_doses_by_patient_id(
+        db,
+        patient_id,
+        date_from=date_from,
+        date_to=date_to,
+        after=after,
+        limit=limit,
+    )
+    headers = {}
+    if limit is not None and len(missed) == limit:
+        last = missed[-1]
+        headers["X-Next-Cursor"] = encode_page_cursor(last["scheduled_time"], last["id"])
+    return negotiated_response(request, missed, headers=headers)
@@ -1,16 +1,32 @@
 # app/medicines/api/medication.py
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.db.session import db_helper
 from app.auth.models.user import User
+from app.core.encoding import negotiated_response
+from app.core.etag import etag_matches, make_etag, not_modified
 from app.core.security import get_current_user
 from app.medicines.schemas.schemas import MedicationCreateRequest, MedicationResponse
-from app.medicines.crud.medication import create_medication, get_medications_by_patient_id, delete_medication
+from app.medicines.crud.medication import (
+    create_medication,
+    delete_medication,
+    get_medication_schedules,
+    get_medications_by_patient_id,
+)
+from app.medicines.crud.data_version import get_data_version, get_patient_data_version_for_friend
 from app.medicines.models.medication import Medication
+from app.medicines.services.read_model import read_model_cache
+from app.medicines.services.schedule import expand_schedules
+from app.medicines.utils.cursors import decode_medication_page_cursor, encode_page_cursor
 
 router = APIRouter(prefix="/medicines", tags=["medicines"])
 
+MAX_PAGE_SIZE = 1000
+MAX_CALENDAR_DAYS = 366
+
 
 @router.post("/add_medication", response_model=MedicationResponse)
 async def add_medication(
@@ -25,19 +41,120 @@ async def add_medication(
 
 @router.get("/get_medications_for_current_friend")
 async def get_medications_for_current_friend(
+    request: Request,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(db_helper.session_dependency),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Мед-друг может просматривать препараты пациента, но НЕ управлять ими.
+    При заданном limit и полной странице курсор следующей страницы
+    возвращается в заголовке X-Next-Cursor.
+    Формат и сжатие ответа выбираются по Accept / Accept-Encoding.
+    Поддерживает If-None-Match: при неизменной версии данных — 304 без выборки.
+    """
+    after_id = None
+    if cursor:
+        try:
+            after_id = decode_medication_page_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid page cursor")
+
+    patient = await get_patient_data_version_for_friend(db, current_user.uuid)
+    if not patient:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Patient not found for this med friend"
+        )
+
+    patient_id, data_version = patient
+    etag = make_etag(request, patient_id, data_version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    read_model = await read_model_cache.get(db, patient_id, data_version)
+    if read_model is not None:
+        medications = read_model.medications_page(date_from, date_to, after_id, limit)
+    else:
+        medications = await get_medications_by_patient_id(
+            db,
+            patient_id,
+            date_from=date_from,
+            date_to=date_to,
+            after_id=after_id,
+            limit=limit,
+        )
+    headers = {"ETag": etag}
+    if limit is not None and len(medications) == limit:
+        headers["X-Next-Cursor"] = encode_page_cursor(medications[-1]["id"])
+    return negotiated_response(request, medications, headers=headers)
+
+
+async def _calendar_response(
+    request: Request,
+    db: AsyncSession,
+    patient_id: str,
+    data_version: int,
+    date_from: date,
+    date_to: date,
+) -> Response:
+    if date_to < date_from:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_to is before date_from")
+    if (date_to - date_from).days >= MAX_CALENDAR_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Calendar range is limited to {MAX_CALENDAR_DAYS} days",
+        )
+
+    etag = make_etag(request, patient_id, data_version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    schedules = await get_medication_schedules(db, patient_id, date_from, date_to)
+    doses = expand_schedules(schedules, date_from, date_to)
+    calendar = [
+        {"medication_id": schedule.id, "name": schedule.name, "doses": medication_doses}
+        for schedule, medication_doses in zip(schedules, doses)
+    ]
+    return negotiated_response(request, calendar, headers={"ETag": etag})
+
+
+@router.get("/calendar")
+async def get_calendar(
+    request: Request,
+    date_from: date,
+    date_to: date,
     db: AsyncSession = Depends(db_helper.session_dependency),
     current_user: User = Depends(get_current_user),
 ):
-    """Мед-друг может просматривать препараты пациента, но НЕ управлять ими."""
-    from app.auth.crud.friend import get_patient_id_for_current_friend
-    patient_id = await get_patient_id_for_current_friend(db, current_user.uuid)
-    if not patient_id:
+    """
+    Запланированные приёмы препаратов пациента за период (UTC, включительно).
+    Период — не более MAX_CALENDAR_DAYS дней.
+    """
+    data_version = await get_data_version(db, current_user.uuid)
+    return await _calendar_response(request, db, current_user.uuid, data_version, date_from, date_to)
+
+
+@router.get("/get_calendar_for_current_friend")
+async def get_calendar_for_current_friend(
+    request: Request,
+    date_from: date,
+    date_to: date,
+    db: AsyncSession = Depends(db_helper.session_dependency),
+    current_user: User = Depends(get_current_user),
+):
+    """Календарь приёмов пациента для мед-друга — только просмотр."""
+    patient = await get_patient_data_version_for_friend(db, current_user.uuid)
+    if not patient:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Patient not found for this med friend"
         )
-    medications = await get_medications_by_patient_id(db, patient_id)
-    return medications
+
+    patient_id, data_version = patient
+    return await _calendar_response(request, db, patient_id, data_version, date_from, date_to)
 
 
 @router.delete(
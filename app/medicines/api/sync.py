@@ -1,194 +1,240 @@
 # app/medicines/api/sync.py
 
-from datetime import date, datetime, time  # ✅ Добавьте date и time
+import json
+from datetime import date, datetime, time, timedelta, timezone  # ✅ Добавьте date и time
 from typing import List, Optional, Literal # ✅ Убедитесь, что List импортирован
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.db.session import db_helper
+from app.core.config import settings
+from app.core.encoding import negotiated_response
+from app.core.etag import etag_matches, make_etag, not_modified
 from app.core.security import get_current_user
 from app.auth.models.user import User
 from app.medicines.models.medication import Medication
 from app.medicines.models.intake import IntakeHistory
-from app.medicines.schemas.schemas import MedicationResponse, IntakeHistoryResponse
-from pydantic import BaseModel
+from app.medicines.schemas.schemas import (
+    MedicationResponse,
+    IntakeHistoryResponse,
+    ClientIntakeHistoryUpdate,
+    ClientMedicationUpdate,
+    PushSyncRequest,
+)
+from app.medicines.crud.change_feed import begin_change_snapshot
+from app.medicines.crud.data_version import get_data_version
+from app.medicines.crud.tombstone import get_tombstones_after, tombstone_item, tombstones_after_query
+from app.medicines.services import idempotency_service, sync_service
+from app.medicines.services.read_model import read_model_cache
+from app.medicines.utils.cursors import decode_sync_cursor, encode_sync_cursor
 
 router = APIRouter(prefix="/sync", tags=["sync"])
 
 
 
-class ClientIntakeHistoryUpdate(BaseModel):
-    server_id: Optional[int] 
-    medication_server_id: int 
-    status: str 
-    taken_time: datetime
-    notes: Optional[str] = None
+STREAM_BATCH_SIZE = 500
 
 
-class ClientMedicationUpdate(BaseModel):
-    server_id: Optional[int] 
-    action: Literal["create", "update"] 
-    name: str
-    form: str 
-    instructions: Optional[str] = None
-    start_date: date 
-    end_date: Optional[date] = None 
-    schedule_type: str 
-    week_days: Optional[List[int]] = None 
-    interval_days: Optional[int] = None
-    times_per_day: List[str] 
+def _parse_cursor(cursor: Optional[str]) -> tuple[Optional[int], bool]:
+    """
+    Возвращает (водяной знак курсора, reset). reset=True, если курсор старше
+    срока хранения следов удалений или выдан до перехода на водяной знак xid:
+    клиент должен заменить локальные данные полной выгрузкой.
+    """
+    if not cursor:
+        return None, False
+    try:
+        decoded = decode_sync_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync cursor")
+
+    retention = timedelta(days=settings.sync.tombstone_retention_days)
+    if decoded.change_xid is None or decoded.issued_at < datetime.now(timezone.utc) - retention:
+        return None, True
+    return decoded.change_xid, False
+
 
+def _medications_query(patient_id: str, after_xid: Optional[int], since: Optional[datetime]):
+    query = select(Medication).where(Medication.patient_id == patient_id)
+    if after_xid is not None:
+        query = query.where(Medication.change_xid >= after_xid)
+    elif since:
+        query = query.where(Medication.updated_at > since)
+    return query.order_by(Medication.change_seq)
 
-class PushSyncRequest(BaseModel):
-    medications: List[ClientMedicationUpdate] = []
-    intake_history: List[ClientIntakeHistoryUpdate] = []
 
+def _intake_history_query(patient_id: str, after_xid: Optional[int], since: Optional[datetime]):
+    query = select(IntakeHistory).join(Medication).where(Medication.patient_id == patient_id)
+    if after_xid is not None:
+        query = query.where(IntakeHistory.change_xid >= after_xid)
+    elif since:
+        query = query.where(IntakeHistory.updated_at > since)
+    return query.order_by(IntakeHistory.change_seq)
 
 
 @router.get("/pull", response_model=dict)
 async def pull_sync(
+    request: Request,
     since: Optional[datetime] = None,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(db_helper.session_dependency)
 ):
     """
     Выгрузка новых или изменённых данных с сервера.
+    С cursor возвращаются строки, изменённые после него, и удаления
+    в "deleted"; next_cursor передаётся в следующий запрос. Строки, изменённые
+    во время прошлой выгрузки, могут прийти повторно — клиент применяет их
+    по server_id. Элемент "deleted" с entity_type "intake_history_purge" —
+    удалён раздел истории: клиент удаляет историю приёма раньше scheduled_before.
+    Без cursor и since — полная выгрузка. "reset": true — курсор
+    устарел, отдана полная выгрузка.
+    Формат и сжатие ответа выбираются по Accept / Accept-Encoding.
+    Поддерживает If-None-Match: при неизменной версии данных — 304 без выборки.
     """
-    medications_query = select(Medication).where(
-        Medication.patient_id == current_user.uuid
-    )
-    if since:
-        medications_query = medications_query.where(Medication.updated_at > since)
-
-    medications_result = await db.execute(medications_query)
-    medications = [MedicationResponse.from_orm(m) for m in medications_result.scalars().all()]
-
-    intake_history_query = select(IntakeHistory).join(Medication).where(
-        Medication.patient_id == current_user.uuid
-    )
-    if since:
-        intake_history_query = intake_history_query.where(IntakeHistory.updated_at > since)
-
-    intake_result = await db.execute(intake_history_query)
-    intake_history = [IntakeHistoryResponse.from_orm(i) for i in intake_result.scalars().all()]
-
-    return {
+    patient_id = current_user.uuid
+    after_xid, reset = _parse_cursor(cursor)
+    if reset:
+        since = None
+
+    data_version = await get_data_version(db, patient_id)
+    etag = make_etag(request, patient_id, data_version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    # Препараты, история и удаления — из одного снимка
+    next_xid = await begin_change_snapshot(db)
+    read_model = await read_model_cache.get(db, patient_id, data_version)
+    if read_model is not None:
+        medications, intake_history = read_model.changes(after_xid, since)
+        # Снимок кэша мог быть прочитан раньше: его водяной знак не больше
+        next_xid = read_model.xmin
+    else:
+        medications_result = await db.execute(_medications_query(patient_id, after_xid, since))
+        intake_result = await db.execute(_intake_history_query(patient_id, after_xid, since))
+        medications = [MedicationResponse.from_orm(m) for m in medications_result.scalars().all()]
+        intake_history = [IntakeHistoryResponse.from_orm(i) for i in intake_result.scalars().all()]
+
+    tombstones = []
+    if after_xid is not None:
+        tombstones = await get_tombstones_after(db, patient_id, after_xid)
+
+    return negotiated_response(request, {
         "medications": medications,
-        "intake_history": intake_history
-    }
+        "intake_history": intake_history,
+        "deleted": [tombstone_item(t) for t in tombstones],
+        "reset": reset,
+        "next_cursor": encode_sync_cursor(max(after_xid or 0, next_xid)),
+    }, headers={"ETag": etag})
+
+
+@router.get(
+    "/pull/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def pull_sync_stream(
+    since: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Потоковая выгрузка в NDJSON для больших историй.
+    Строки: {"type": "medication" | "intake_history" | "deleted", "data": {...}},
+    первая — {"type": "reset"}, если курсор устарел; последняя —
+    {"type": "cursor", "next_cursor": "..."}.
+    Чтение идёт серверным курсором в одном снимке, память не зависит от размера истории.
+    """
+    after_xid, reset = _parse_cursor(cursor)
+    if reset:
+        since = None
+    patient_id = current_user.uuid
+
+    async def records():
+        if reset:
+            yield '{"type":"reset"}\n'
+        # Сессия зависимости закрывается до отправки тела — открываем свою.
+        async with db_helper.session_factory() as session:
+            next_xid = await begin_change_snapshot(session)
+            for record_type, query, schema in (
+                ("medication", _medications_query(patient_id, after_xid, since), MedicationResponse),
+                ("intake_history", _intake_history_query(patient_id, after_xid, since), IntakeHistoryResponse),
+            ):
+                rows = await session.stream_scalars(
+                    query.execution_options(yield_per=STREAM_BATCH_SIZE)
+                )
+                async for row in rows:
+                    data = schema.model_validate(row).model_dump_json()
+                    yield f'{{"type":"{record_type}","data":{data}}}\n'
+                    # Строки уже отданы клиенту — не держим их в identity map
+                    session.expunge(row)
+
+            if after_xid is not None:
+                tombstones = await session.stream(
+                    tombstones_after_query(patient_id, after_xid).execution_options(yield_per=STREAM_BATCH_SIZE)
+                )
+                async for tombstone in tombstones:
+                    data = json.dumps(tombstone_item(tombstone))
+                    yield f'{{"type":"deleted","data":{data}}}\n'
+
+        next_cursor = encode_sync_cursor(max(after_xid or 0, next_xid))
+        yield json.dumps({"type": "cursor", "next_cursor": next_cursor}) + "\n"
+
+    return StreamingResponse(records(), media_type="application/x-ndjson")
 
 
 @router.post("/push")
 async def push_sync(
     data: PushSyncRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(db_helper.session_dependency)
 ):
     """
     Отправка локальных изменений на сервер.
+    Весь пакет применяется в одной транзакции; ошибки отдельных элементов
+    возвращаются в "errors" и не прерывают обработку остальных.
+    Повтор с тем же Idempotency-Key возвращает сохранённый ответ без повторной обработки.
     """
-    response_data = {
-        "medications": [],
-        "intake_history": []
-    }
-
-    for idx, med in enumerate(data.medications):
-        if med.action == "update":
-            if med.server_id is None:
-                # Ошибка: нельзя обновить, если нет server_id
-                raise HTTPException(status_code=400, detail=f"Cannot update medication without server_id. Index: {idx}")
-
-            stmt = select(Medication).where(
-                Medication.id == med.server_id,
-                Medication.patient_id == current_user.uuid # Защита от чужих данных
-            )
-            result = await db.execute(stmt)
-            existing_med = result.scalar_one_or_none()
-
-            if existing_med:
-                converted_times = [time.fromisoformat(t) for t in med.times_per_day]
-
-                existing_med.name = med.name
-                existing_med.form = med.form
-                existing_med.instructions = med.instructions
-                existing_med.start_date = med.start_date
-                existing_med.end_date = med.end_date
-                existing_med.schedule_type = med.schedule_type
-                existing_med.week_days = med.week_days
-                existing_med.interval_days = med.interval_days
-                existing_med.times_per_day = converted_times
-                await db.commit()
-                await db.refresh(existing_med)
-                response_data["medications"].append({"client_id": idx, "server_id": existing_med.id})
-            else:
-                raise HTTPException(status_code=404, detail=f"Medication with id {med.server_id} not found or not owned by user. Index: {idx}")
-
-        elif med.action == "create":
-            if med.server_id is not None:
-                raise HTTPException(status_code=400, detail=f"Cannot create medication with existing server_id. Index: {idx}")
-
-            converted_times = [time.fromisoformat(t) for t in med.times_per_day]
-
-            new_med = Medication(
-                patient_id=current_user.uuid, 
-                name=med.name,
-                form=med.form,
-                instructions=med.instructions,
-                start_date=med.start_date,
-                end_date=med.end_date,
-                schedule_type=med.schedule_type,
-                week_days=med.week_days,
-                interval_days=med.interval_days,
-                times_per_day=converted_times 
-            )
-            db.add(new_med)
-            await db.commit()
-            await db.refresh(new_med)
-            response_data["medications"].append({"client_id": idx, "server_id": new_med.id})
-
-    for idx, intake in enumerate(data.intake_history):
-        if intake.server_id is not None:
-            stmt = select(IntakeHistory).join(Medication).where(
-                IntakeHistory.id == intake.server_id,
-                Medication.patient_id == current_user.uuid  
-            )
-            result = await db.execute(stmt)
-            existing_intake = result.scalar_one_or_none()
-
-            if existing_intake:
-                existing_intake.status = intake.status
-                existing_intake.taken_time = intake.taken_time
-                existing_intake.notes = intake.notes
-                # updated_at обновится автоматически
-                await db.commit()
-                await db.refresh(existing_intake)
-                response_data["intake_history"].append({"client_id": idx, "server_id": existing_intake.id})
-            else:
-                raise HTTPException(status_code=404, detail=f"IntakeHistory with id {intake.server_id} not found or not owned by user. Index: {idx}")
-        else:
-            med_stmt = select(Medication.id).where(
-                Medication.id == intake.medication_server_id,
-                Medication.patient_id == current_user.uuid
-            )
-            med_result = await db.execute(med_stmt)
-            med_id = med_result.scalar_one_or_none()
-
-            if not med_id:
-                raise HTTPException(status_code=404, detail=f"Medication with id {intake.medication_server_id} not found or not owned by user. Index: {idx}")
-
-            new_intake = IntakeHistory(
-                medication_id=med_id,
-                scheduled_time=intake.taken_time, 
-                taken_time=intake.taken_time,
-                status=intake.status,
-                notes=intake.notes
-            )
-            db.add(new_intake)
-            await db.commit()
-            await db.refresh(new_intake)
-            response_data["intake_history"].append({"client_id": idx, "server_id": new_intake.id})
-
-    current_user.last_synced_time = datetime.utcnow()
-    await db.commit()
-
-    return response_data
\ No newline at end of file
+    # rollback ниже истекает атрибуты пользователя — ленивая загрузка под
+    # AsyncSession невозможна, поэтому uuid читается заранее
+    user_uuid = current_user.uuid
+    request_hash = None
+    if idempotency_key:
+        request_hash = idempotency_service.request_fingerprint(data)
+        stored = await _stored_push_response(db, user_uuid, idempotency_key, request_hash)
+        if stored is not None:
+            return stored
+
+    try:
+        return await sync_service.push_changes(
+            db,
+            current_user,
+            data,
+            idempotency_key=idempotency_key,
+            request_hash=request_hash,
+        )
+    except idempotency_service.IdempotencyKeyInUse:
+        # Параллельный запрос с тем же ключом успел зафиксироваться первым
+        await db.rollback()
+        stored = await _stored_push_response(db, user_uuid, idempotency_key, request_hash)
+        if stored is None:
+            raise
+        return stored
+
+
+async def _stored_push_response(
+    db: AsyncSession, user_uuid: str, idempotency_key: str, request_hash: str
+) -> Optional[JSONResponse]:
+    try:
+        stored = await idempotency_service.lookup(db, user_uuid, idempotency_key, request_hash)
+    except idempotency_service.IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if stored is None:
+        return None
+    return JSONResponse(
+        content=stored.body,
+        status_code=stored.status_code,
+        headers={"Idempotent-Replayed": "true"},
+    )
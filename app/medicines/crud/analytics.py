@@ -0,0 +1,83 @@
+# app/medicines/crud/analytics.py
+from datetime import date, datetime, time, timezone
+from sqlalchemy import Date, cast, delete, func, insert, literal_column, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.medicines.models.adherence import DailyAdherence
+from app.medicines.models.intake import IntakeHistory
+from app.medicines.models.medication import Medication
+
+PERIODS = ("week", "month")
+
+
+def period_start_column(column, period: str):
+    """
+    date_trunc для колонки-даты. Период подставляется литералом, чтобы
+    выражение в SELECT и GROUP BY совпадало текстуально.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unsupported period: {period}")
+    return cast(func.date_trunc(literal_column(f"'{period}'"), column), Date)
+
+
+async def get_intake_status_counts(
+    db: AsyncSession,
+    patient_id: str,
+    period: str,
+    date_from: date,
+    date_to: date,
+) -> list:
+    """
+    Число записей taken / skipped по препарату и периоду за дни
+    [date_from, date_to] — из сводки daily_adherence: строка на день,
+    а не на каждый приём.
+    """
+    period_start = period_start_column(DailyAdherence.day, period).label("period_start")
+    stmt = (
+        select(
+            DailyAdherence.medication_id,
+            Medication.name,
+            period_start,
+            func.sum(DailyAdherence.taken).label("taken"),
+            func.sum(DailyAdherence.skipped).label("skipped"),
+        )
+        .join(Medication, Medication.id == DailyAdherence.medication_id)
+        .where(
+            Medication.patient_id == patient_id,
+            DailyAdherence.day >= date_from,
+            DailyAdherence.day <= date_to,
+        )
+        .group_by(DailyAdherence.medication_id, Medication.name, period_start)
+    )
+    result = await db.execute(stmt)
+    return list(result.all())
+
+
+async def rebuild_daily_adherence(db: AsyncSession, since: date) -> int:
+    """
+    Пересчитывает daily_adherence из intake_history за дни начиная
+    с since (без commit). Более ранние дни не трогаются: их строки
+    истории удалены по сроку хранения, а сводка хранит их итог.
+    Блокировка EXCLUSIVE не мешает чтению, но задерживает триггеры
+    параллельных записей до commit — их дельты лягут поверх пересчёта.
+    """
+    await db.execute(text("LOCK TABLE daily_adherence IN EXCLUSIVE MODE"))
+    await db.execute(delete(DailyAdherence).where(DailyAdherence.day >= since))
+
+    day = cast(func.timezone("UTC", IntakeHistory.scheduled_time), Date).label("day")
+    source = (
+        select(
+            IntakeHistory.medication_id,
+            day,
+            func.count().filter(IntakeHistory.status == "taken"),
+            func.count().filter(IntakeHistory.status == "skipped"),
+        )
+        # Граница по UTC-полуночи: отсекаются целые разделы
+        .where(IntakeHistory.scheduled_time >= datetime.combine(since, time(), tzinfo=timezone.utc))
+        .group_by(IntakeHistory.medication_id, day)
+    )
+    result = await db.execute(
+        insert(DailyAdherence).from_select(
+            ["medication_id", "day", "taken", "skipped"], source
+        )
+    )
+    return result.rowcount
@@ -0,0 +1,94 @@
+# app/medicines/crud/archive.py
+from datetime import datetime
+from sqlalchemy import Date, and_, cast, func, literal_column, not_, or_, select
+from app.medicines.crud.partitions import DEFAULT_PARTITION, partition_drop_bound
+from app.medicines.models.intake import IntakeHistory
+from app.medicines.models.medication import Medication
+
+# Колонки файлов архива истории приёма; patient_id — ключ сортировки
+INTAKE_ARCHIVE_COLUMNS = (
+    "patient_id", "id", "medication_id", "medication_name", "scheduled_time",
+    "taken_time", "status", "notes", "created_at", "updated_at",
+)
+MEDICATION_ARCHIVE_COLUMNS = ("patient_id",) + tuple(
+    column.name for column in Medication.__table__.columns if column.name != "patient_id"
+)
+
+
+def _utc_day(column):
+    return cast(func.timezone("UTC", column), Date).label("day")
+
+
+def _intake_archive_select():
+    day = _utc_day(IntakeHistory.scheduled_time)
+    return day, select(
+        day,
+        Medication.patient_id,
+        IntakeHistory.id,
+        IntakeHistory.medication_id,
+        Medication.name.label("medication_name"),
+        IntakeHistory.scheduled_time,
+        IntakeHistory.taken_time,
+        IntakeHistory.status,
+        IntakeHistory.notes,
+        IntakeHistory.created_at,
+        IntakeHistory.updated_at,
+    ).join(Medication, Medication.id == IntakeHistory.medication_id)
+
+
+def _expired_intake_condition(intake_cutoff: datetime):
+    """
+    Строки, которые удалит очистка по сроку истории: разделы раньше начала
+    месяца intake_cutoff целиком и строки default старше intake_cutoff.
+    Строки старше intake_cutoff в ещё не удаляемом разделе ждут своего
+    месяца — иначе каждый запуск выгружал бы их заново. Общее условие
+    scheduled_time < intake_cutoff отсекает остальные разделы.
+    """
+    in_default = literal_column(f"{IntakeHistory.__tablename__}.tableoid") == literal_column(
+        f"'{DEFAULT_PARTITION}'::regclass"
+    )
+    return and_(
+        IntakeHistory.scheduled_time < intake_cutoff,
+        or_(IntakeHistory.scheduled_time < partition_drop_bound(intake_cutoff), in_default),
+    )
+
+
+def expiring_intakes_query(intake_cutoff: datetime):
+    """
+    История приёма, удаляемая по сроку хранения (см. _expired_intake_condition).
+    По дням (UTC), внутри дня — по пациенту.
+    """
+    day, stmt = _intake_archive_select()
+    return (
+        stmt
+        .where(_expired_intake_condition(intake_cutoff))
+        .order_by(day, Medication.patient_id, IntakeHistory.scheduled_time, IntakeHistory.id)
+    )
+
+
+def purged_medication_intakes_query(intake_cutoff: datetime, medications_cutoff: datetime):
+    """
+    Остальная история препаратов старше medications_cutoff — она уходит
+    каскадом вместе с препаратом. Строки, которые уже выгружает
+    expiring_intakes_query, исключаются. Поиск идёт по id препаратов,
+    а не по всем разделам. По дням (UTC), внутри дня — по пациенту.
+    """
+    day, stmt = _intake_archive_select()
+    return (
+        stmt
+        .where(
+            Medication.created_at < medications_cutoff,
+            not_(_expired_intake_condition(intake_cutoff)),
+        )
+        .order_by(day, Medication.patient_id, IntakeHistory.scheduled_time, IntakeHistory.id)
+    )
+
+
+def expiring_medications_query(medications_cutoff: datetime):
+    """Препараты старше medications_cutoff по дню создания (UTC) и пациенту."""
+    day = _utc_day(Medication.created_at)
+    return (
+        select(day, *Medication.__table__.columns)
+        .where(Medication.created_at < medications_cutoff)
+        .order_by(day, Medication.patient_id, Medication.id)
+    )
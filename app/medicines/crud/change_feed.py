@@ -0,0 +1,35 @@
+# app/medicines/crud/change_feed.py
+"""
+Водяной знак ленты изменений.
+
+change_seq выдаётся при выполнении оператора, а фиксируется транзакция
+позже: изменение с меньшим change_seq может стать видимым после большего,
+и курсор по change_seq его пропустит. Поэтому строки и следы удалений
+помечены xid записавшей транзакции (change_xid), а курсор — это xmin
+снимка чтения: все транзакции с xid < xmin к моменту снимка завершены
+и видны в нём целиком. Следующее чтение берёт строки с change_xid >= курсора;
+транзакции, шедшие во время прошлого чтения, отдаются повторно, а не теряются.
+"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+SNAPSHOT_XMIN = text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+
+
+async def snapshot_xmin(db: AsyncSession) -> int:
+    """
+    xmin снимка текущего оператора. Вызывается до чтения изменений: при
+    READ COMMITTED следующие операторы видят не меньше, курсор остаётся безопасным.
+    """
+    return (await db.execute(SNAPSHOT_XMIN)).scalar_one()
+
+
+async def begin_change_snapshot(db: AsyncSession) -> int:
+    """
+    Завершает текущую транзакцию сессии и начинает REPEATABLE READ: все
+    следующие запросы до конца транзакции видят один снимок. Возвращает
+    его xmin — курсор для ответа.
+    """
+    await db.commit()
+    await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    return await snapshot_xmin(db)
@@ -0,0 +1,40 @@
+# app/medicines/crud/data_version.py
+from typing import Iterable
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.auth.models.user import User
+
+
+async def bump_data_version(db: AsyncSession, patient_ids: str | Iterable[str]) -> None:
+    """
+    Увеличивает версию данных пациента(ов) в текущей транзакции.
+    Вызывается во всех путях записи до commit; версия служит ETag для чтения.
+    """
+    if isinstance(patient_ids, str):
+        patient_ids = [patient_ids]
+    patient_ids = sorted(set(patient_ids))
+    if not patient_ids:
+        return
+    stmt = (
+        update(User)
+        .where(User.uuid.in_(patient_ids))
+        # last_synced_time явно сохраняем, иначе сработает его onupdate
+        .values(data_version=User.data_version + 1, last_synced_time=User.last_synced_time)
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(stmt)
+
+
+async def get_data_version(db: AsyncSession, patient_id: str) -> int | None:
+    result = await db.execute(select(User.data_version).where(User.uuid == patient_id))
+    return result.scalar_one_or_none()
+
+
+async def get_patient_data_version_for_friend(
+    db: AsyncSession, friend_id: str
+) -> tuple[str, int] | None:
+    """(uuid пациента, версия данных) для мед-друга — один запрос."""
+    stmt = select(User.uuid, User.data_version).where(User.relation_id == friend_id)
+    result = await db.execute(stmt)
+    row = result.one_or_none()
+    return (row.uuid, row.data_version) if row else None
@@ -0,0 +1,36 @@
+# app/medicines/crud/events.py
+import json
+from datetime import date, datetime, time
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+EVENTS_CHANNEL = "mai_patient_events"
+# Пациент сменил или удалил мед-друга: открытые потоки пациента закрываются
+RELATION_CHANGED = "relation_changed"
+# Предел payload NOTIFY — 8000 байт
+MAX_PAYLOAD_BYTES = 7900
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+async def notify_patient_event(db: AsyncSession, patient_id: str, event_type: str, data: dict) -> None:
+    """
+    pg_notify в текущей транзакции: событие уйдёт слушателям только после
+    commit и не уйдёт при rollback. Слишком большое событие заменяется
+    признаком truncated — клиент перечитывает данные сам.
+    """
+    payload = json.dumps(
+        {"patient_id": patient_id, "type": event_type, "data": data},
+        default=_encode_value,
+        separators=(",", ":"),
+    )
+    if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+        payload = json.dumps(
+            {"patient_id": patient_id, "type": event_type, "data": {"truncated": True}},
+            separators=(",", ":"),
+        )
+    await db.execute(select(func.pg_notify(EVENTS_CHANNEL, payload)))
@@ -0,0 +1,52 @@
+# app/medicines/crud/idempotency.py
+import datetime
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.medicines.models.idempotency import IdempotencyKey
+
+
+async def get_idempotency_key(
+    db: AsyncSession, user_uuid: str, key: str
+) -> IdempotencyKey | None:
+    stmt = select(IdempotencyKey).where(
+        IdempotencyKey.user_uuid == user_uuid,
+        IdempotencyKey.key == key,
+        IdempotencyKey.expires_at > datetime.datetime.now(datetime.timezone.utc),
+    )
+    result = await db.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def add_idempotency_key(
+    db: AsyncSession,
+    user_uuid: str,
+    key: str,
+    request_hash: str,
+    status_code: int,
+    response: dict,
+    expires_at: datetime.datetime,
+) -> bool:
+    """
+    Сохраняет ответ в текущей транзакции; commit делает вызывающий код.
+    Истёкшая запись с тем же ключом (ещё не удалённая retention) замещается.
+    Возвращает False, если ключ занят действующей записью.
+    """
+    values = {
+        "request_hash": request_hash,
+        "status_code": status_code,
+        "response": response,
+        "expires_at": expires_at,
+    }
+    stmt = (
+        insert(IdempotencyKey)
+        .values(user_uuid=user_uuid, key=key, **values)
+        .on_conflict_do_update(
+            index_elements=[IdempotencyKey.user_uuid, IdempotencyKey.key],
+            set_={**values, "created_at": func.now()},
+            where=IdempotencyKey.expires_at <= func.now(),
+        )
+        .returning(IdempotencyKey.key)
+    )
+    result = await db.execute(stmt)
+    return result.scalar_one_or_none() is not None
@@ -1,46 +1,106 @@
-from sqlalchemy import and_, select
+from datetime import datetime
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.medicines.models.intake import IntakeHistory 
-from app.medicines.crud.medication import get_medications_by_patient_id 
+from app.medicines.models.medication import Medication
+from app.medicines.crud.data_version import bump_data_version
+from app.medicines.crud.events import notify_patient_event
+from app.medicines.services.read_model import read_model_cache
+
+
+# Ключ UPSERT: ограничение uq_intake_history_medication_id_scheduled_time
+UPSERT_KEYS = ("medication_id", "scheduled_time")
+
+
+def upsert_intake_stmt(update_keys):
+    """
+    INSERT ... ON CONFLICT (medication_id, scheduled_time) DO UPDATE:
+    при конфликте обновляются только колонки update_keys.
+    """
+    stmt = insert(IntakeHistory)
+    return stmt.on_conflict_do_update(
+        index_elements=[IntakeHistory.medication_id, IntakeHistory.scheduled_time],
+        set_={key: stmt.excluded[key] for key in update_keys},
+    )
 
 
 async def create_or_update_intake_history(
-    db: AsyncSession, intake_data: dict
+    db: AsyncSession, intake_data: dict, patient_id: str
 ) -> IntakeHistory:
-    stmt = select(IntakeHistory).where(
-        and_(
-            IntakeHistory.medication_id == intake_data["medication_id"],
-            IntakeHistory.scheduled_time == intake_data["scheduled_time"],
-        )
+    """
+    Создание или обновление записи о приёме одним запросом
+    INSERT ... ON CONFLICT DO UPDATE ... RETURNING: параллельные запросы
+    на один приём не создают дубликатов. У существующей записи
+    обновляются только переданные (не None) поля.
+    """
+    update_keys = [
+        key for key, value in intake_data.items()
+        if value is not None and key not in UPSERT_KEYS
+    ]
+    stmt = (
+        upsert_intake_stmt(update_keys)
+        .values(**intake_data)
+        .returning(IntakeHistory)
+        .execution_options(populate_existing=True)
     )
     result = await db.execute(stmt)
-    existing_intake = result.scalar_one_or_none()
-
-    if existing_intake:
-        for key, value in intake_data.items():
-            if value is not None:  
-                setattr(existing_intake, key, value)
-        await db.commit()
-        await db.refresh(existing_intake)
-        return existing_intake
-    else:
-        intake = IntakeHistory(**intake_data)
-        db.add(intake)
-        await db.commit()
-        await db.refresh(intake)
-        return intake
+    intake = result.scalar_one()
+    await bump_data_version(db, patient_id)
+    await notify_patient_event(db, patient_id, "intake", {
+        "id": intake.id,
+        "medication_id": intake.medication_id,
+        "scheduled_time": intake.scheduled_time,
+        "taken_time": intake.taken_time,
+        "status": intake.status,
+    })
+    await db.commit()
+    read_model_cache.invalidate(patient_id)
+    return intake
 
 
-async def get_intake_history_by_patient_id(
-    db: AsyncSession, patient_id: int
-) -> list[IntakeHistory]:
-    medications = await get_medications_by_patient_id(db, patient_id)
-    medication_ids = [med.id for med in medications]
+# Колонки ответа мед-другу — без служебных полей синхронизации
+INTAKE_READ_COLUMNS = (
+    IntakeHistory.id,
+    IntakeHistory.medication_id,
+    IntakeHistory.scheduled_time,
+    IntakeHistory.taken_time,
+    IntakeHistory.status,
+    IntakeHistory.notes,
+    IntakeHistory.created_at,
+)
 
-    if not medication_ids:
-        return []
 
-    from app.medicines.models.intake import IntakeHistory 
-    stmt = select(IntakeHistory).where(IntakeHistory.medication_id.in_(medication_ids))
+async def get_intake_history_by_patient_id(
+    db: AsyncSession,
+    patient_id: str,
+    *,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    medication_id: int | None = None,
+    after: tuple[datetime, int] | None = None,
+    limit: int | None = None,
+) -> list[dict]:
+    """
+    История приёма пациента, от новых к старым по (scheduled_time, id),
+    одним запросом intake_history JOIN medications — только нужные колонки.
+    after — ключ последней записи предыдущей страницы (keyset-пагинация).
+    """
+    stmt = (
+        select(*INTAKE_READ_COLUMNS)
+        .join(Medication, Medication.id == IntakeHistory.medication_id)
+        .where(Medication.patient_id == patient_id)
+    )
+    if medication_id is not None:
+        stmt = stmt.where(IntakeHistory.medication_id == medication_id)
+    if date_from is not None:
+        stmt = stmt.where(IntakeHistory.scheduled_time >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(IntakeHistory.scheduled_time < date_to)
+    if after is not None:
+        stmt = stmt.where(tuple_(IntakeHistory.scheduled_time, IntakeHistory.id) < after)
+    stmt = stmt.order_by(IntakeHistory.scheduled_time.desc(), IntakeHistory.id.desc())
+    if limit is not None:
+        stmt = stmt.limit(limit)
     result = await db.execute(stmt)
-    return list(result.scalars().all())
\ No newline at end of file
+    return [dict(row) for row in result.mappings()]
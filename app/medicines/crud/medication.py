@@ -1,7 +1,12 @@
 # app/medicines/crud/medication.py
-from sqlalchemy import delete, select
+from datetime import date
+from sqlalchemy import delete, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.medicines.models.medication import Medication
+from app.medicines.crud.data_version import bump_data_version
+from app.medicines.crud.events import notify_patient_event
+from app.medicines.services.read_model import read_model_cache
+from app.medicines.services.reminder_service import reminder_dispatcher
 
 
 async def create_medication(
@@ -9,17 +14,60 @@ async def create_medication(
 ) -> Medication:
     medication = Medication(patient_id=patient_id, **medication_data)
     db.add(medication)
+    await db.flush()
+    await bump_data_version(db, patient_id)
+    await notify_patient_event(
+        db, patient_id, "medication_created", {"id": medication.id, "name": medication.name}
+    )
     await db.commit()
+    read_model_cache.invalidate(patient_id)
+    reminder_dispatcher.notify_changed()
     await db.refresh(medication)
     return medication
 
 
+# Колонки ответа мед-другу (MedicationResponse) — без служебных полей синхронизации
+MEDICATION_READ_COLUMNS = (
+    Medication.id,
+    Medication.patient_id,
+    Medication.name,
+    Medication.form,
+    Medication.instructions,
+    Medication.start_date,
+    Medication.end_date,
+    Medication.schedule_type,
+    Medication.week_days,
+    Medication.interval_days,
+    Medication.times_per_day,
+)
+
+
 async def get_medications_by_patient_id(
-    db: AsyncSession, patient_id: str
-) -> list[Medication]:
-    stmt = select(Medication).where(Medication.patient_id == patient_id)
+    db: AsyncSession,
+    patient_id: str,
+    *,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    after_id: int | None = None,
+    limit: int | None = None,
+) -> list[dict]:
+    """
+    Препараты пациента по возрастанию id. date_from/date_to отбирают
+    препараты, курс которых пересекается с периодом; after_id и limit —
+    keyset-пагинация. Строки — словари MEDICATION_READ_COLUMNS.
+    """
+    stmt = select(*MEDICATION_READ_COLUMNS).where(Medication.patient_id == patient_id)
+    if date_from is not None:
+        stmt = stmt.where(or_(Medication.end_date.is_(None), Medication.end_date >= date_from))
+    if date_to is not None:
+        stmt = stmt.where(Medication.start_date <= date_to)
+    if after_id is not None:
+        stmt = stmt.where(Medication.id > after_id)
+    stmt = stmt.order_by(Medication.id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
     result = await db.execute(stmt)
-    return list(result.scalars().all())
+    return [dict(row) for row in result.mappings()]
 
 
 async def delete_medication(
@@ -35,5 +83,38 @@ async def delete_medication(
         return False
 
     await db.execute(delete(Medication).where(Medication.id == medication_id))
+    await bump_data_version(db, patient_id)
+    await notify_patient_event(db, patient_id, "medication_deleted", {"id": medication_id})
     await db.commit()
-    return True
\ No newline at end of file
+    read_model_cache.invalidate(patient_id)
+    reminder_dispatcher.notify_changed()
+    return True
+
+
+async def get_medication_schedules(
+    db: AsyncSession, patient_id: str, date_from: date, date_to: date
+) -> list:
+    """
+    Только поля расписания препаратов, чей курс пересекается с периодом,
+    — вход для развёртки services.schedule.expand_schedules.
+    """
+    stmt = (
+        select(
+            Medication.id,
+            Medication.name,
+            Medication.start_date,
+            Medication.end_date,
+            Medication.schedule_type,
+            Medication.week_days,
+            Medication.interval_days,
+            Medication.times_per_day,
+        )
+        .where(
+            Medication.patient_id == patient_id,
+            Medication.start_date <= date_to,
+            or_(Medication.end_date.is_(None), Medication.end_date >= date_from),
+        )
+        .order_by(Medication.id)
+    )
+    result = await db.execute(stmt)
+    return list(result.all())
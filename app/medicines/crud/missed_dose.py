@@ -0,0 +1,133 @@
+# app/medicines/crud/missed_dose.py
+from datetime import datetime
+from sqlalchemy import func, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.medicines.models.intake import IntakeHistory
+from app.medicines.models.medication import Medication
+from app.medicines.models.missed_dose import JobWatermark, MissedDose
+
+# Развёртка расписаний за окно в SQL по правилам services.schedule
+# (0 — понедельник, interval_days < 1 или NULL — ежедневно, время в UTC
+# с точностью до секунды) и anti-join с intake_history по ключу
+# (medication_id, scheduled_time): только дни окна, а не вся история.
+# Приёмы до создания препарата не считаются.
+DETECT_MISSED_DOSES = text("""
+    INSERT INTO missed_doses (medication_id, patient_id, scheduled_time)
+    SELECT m.id, m.patient_id, dose.scheduled_time
+    FROM medications m
+    CROSS JOIN LATERAL generate_series(
+        greatest(m.start_date, CAST(:date_from AS date)),
+        least(coalesce(m.end_date, CAST(:date_to AS date)), CAST(:date_to AS date)),
+        interval '1 day'
+    ) AS day(value)
+    CROSS JOIN LATERAL unnest(m.times_per_day) AS tod(value)
+    CROSS JOIN LATERAL (
+        SELECT date_trunc('second', CAST(day.value AS date) + tod.value) AT TIME ZONE 'UTC' AS scheduled_time
+    ) AS dose
+    WHERE m.start_date <= CAST(:date_to AS date)
+      AND (m.end_date IS NULL OR m.end_date >= CAST(:date_from AS date))
+      AND (
+          m.schedule_type = 'daily'
+          OR (m.schedule_type = 'weekly_days'
+              AND CAST(extract(isodow FROM day.value) AS int) - 1 = ANY(m.week_days))
+          OR (m.schedule_type = 'every_x_days'
+              AND (CAST(day.value AS date) - m.start_date)
+                  % greatest(coalesce(m.interval_days, 1), 1) = 0)
+      )
+      AND dose.scheduled_time >= :window_from
+      AND dose.scheduled_time < :window_to
+      AND dose.scheduled_time >= m.created_at
+      AND NOT EXISTS (
+          SELECT 1 FROM intake_history i
+          WHERE i.medication_id = m.id AND i.scheduled_time = dose.scheduled_time
+      )
+    ON CONFLICT (medication_id, scheduled_time) DO NOTHING
+    RETURNING patient_id
+""")
+
+
+async def lock_watermark(db: AsyncSession, job: str, initial: datetime) -> datetime | None:
+    """
+    Граница задачи с блокировкой строки до конца транзакции. None — её
+    держит параллельный запуск. Первый запуск начинает с initial.
+    """
+    await db.execute(
+        insert(JobWatermark)
+        .values(job=job, processed_until=initial)
+        .on_conflict_do_nothing(index_elements=[JobWatermark.job])
+    )
+    result = await db.execute(
+        select(JobWatermark.processed_until)
+        .where(JobWatermark.job == job)
+        .with_for_update(skip_locked=True)
+    )
+    return result.scalar_one_or_none()
+
+
+async def set_watermark(db: AsyncSession, job: str, processed_until: datetime) -> None:
+    await db.execute(
+        update(JobWatermark)
+        .where(JobWatermark.job == job)
+        .values(processed_until=processed_until, updated_at=func.now())
+    )
+
+
+async def detect_missed_doses(
+    db: AsyncSession, window_from: datetime, window_to: datetime
+) -> list[str]:
+    """
+    Записывает пропущенные приёмы с scheduled_time в [window_from, window_to)
+    (без commit). Возвращает пациента каждого нового пропуска.
+    """
+    result = await db.execute(DETECT_MISSED_DOSES, {
+        "window_from": window_from,
+        "window_to": window_to,
+        "date_from": window_from.date(),
+        "date_to": window_to.date(),
+    })
+    return list(result.scalars())
+
+
+async def get_missed_doses_by_patient_id(
+    db: AsyncSession,
+    patient_id: str,
+    *,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    after: tuple[datetime, int] | None = None,
+    limit: int | None = None,
+) -> list[dict]:
+    """
+    Пропуски пациента от новых к старым по (scheduled_time, id).
+    recorded_status — статус записи о приёме, если её внесли позже
+    срока (NULL — записи так и нет).
+    """
+    stmt = (
+        select(
+            MissedDose.id,
+            MissedDose.medication_id,
+            Medication.name.label("medication_name"),
+            MissedDose.scheduled_time,
+            MissedDose.detected_at,
+            IntakeHistory.status.label("recorded_status"),
+        )
+        .join(Medication, Medication.id == MissedDose.medication_id)
+        .outerjoin(
+            IntakeHistory,
+            (IntakeHistory.medication_id == MissedDose.medication_id)
+            & (IntakeHistory.scheduled_time == MissedDose.scheduled_time),
+        )
+        .where(MissedDose.patient_id == patient_id)
+    )
+    if date_from is not None:
+        stmt = stmt.where(MissedDose.scheduled_time >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(MissedDose.scheduled_time < date_to)
+    if after is not None:
+        stmt = stmt.where(tuple_(MissedDose.scheduled_time, MissedDose.id) < after)
+    stmt = stmt.order_by(MissedDose.scheduled_time.desc(), MissedDose.id.desc())
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    result = await db.execute(stmt)
+    return [dict(row) for row in result.mappings()]
@@ -0,0 +1,175 @@
+# app/medicines/crud/partitions.py
+"""
+Месячные разделы intake_history (RANGE по scheduled_time, границы по UTC).
+Разделы называются intake_history_pYYYY_MM; строки вне созданных разделов
+попадают в intake_history_default.
+"""
+import re
+from datetime import date, datetime, time, timezone
+from sqlalchemy import BigInteger, TIMESTAMP, column, insert, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.medicines.models.tombstone import SyncTombstone
+
+PARENT = "intake_history"
+DEFAULT_PARTITION = "intake_history_default"
+PARTITION_NAME = re.compile(r"^intake_history_p(\d{4})_(\d{2})$")
+
+# Раздел default напрямую: операторные триггеры сводки висят на родителе
+# и при удалении отсюда не срабатывают, построчный след удаления — да
+intake_default_table = table(
+    DEFAULT_PARTITION,
+    column("id", BigInteger),
+    column("scheduled_time", TIMESTAMP(timezone=True)),
+    column("medication_id", BigInteger),
+)
+
+# Перенос строк из default в новый раздел — не удаление: следы не пишутся
+SKIP_TOMBSTONES = "SELECT set_config('mai.skip_tombstones', :value, true)"
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_p{month:%Y_%m}"
+
+
+def _bound(month: date) -> datetime:
+    return datetime.combine(month, time(), tzinfo=timezone.utc)
+
+
+def _bounds_sql(month: date) -> str:
+    lower, upper = month, add_months(month, 1)
+    return (
+        f"FOR VALUES FROM ('{lower.isoformat()} 00:00:00+00') "
+        f"TO ('{upper.isoformat()} 00:00:00+00')"
+    )
+
+
+def partition_drop_bound(cutoff: datetime) -> datetime:
+    """
+    Граница удаления разделов по сроку cutoff: начало месяца cutoff (UTC).
+    Месячные разделы целиком раньше неё удаляет drop_expired_intake_partitions.
+    """
+    return _bound(cutoff.astimezone(timezone.utc).date().replace(day=1))
+
+
+async def list_intake_partitions(db: AsyncSession) -> dict[date, str]:
+    """Месяц -> имя раздела для всех месячных разделов (без default)."""
+    result = await db.execute(
+        text("""
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = CAST(:parent AS regclass)
+        """),
+        {"parent": PARENT},
+    )
+    partitions = {}
+    for name in result.scalars():
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+async def ensure_intake_partitions(db: AsyncSession, months_ahead: int) -> list[str]:
+    """
+    Создаёт недостающие разделы с текущего месяца на months_ahead вперёд
+    (без commit). Строки, уже попавшие в default за этот месяц,
+    переносятся в новый раздел. Возвращает имена созданных разделов.
+    """
+    existing = await list_intake_partitions(db)
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month in existing:
+            continue
+        name = partition_name(month)
+        params = {"lower": _bound(month), "upper": _bound(add_months(month, 1))}
+        in_default = (await db.execute(
+            text(f"""
+                SELECT EXISTS (
+                    SELECT 1 FROM {DEFAULT_PARTITION}
+                    WHERE scheduled_time >= :lower AND scheduled_time < :upper
+                )
+            """),
+            params,
+        )).scalar()
+
+        if not in_default:
+            await db.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT} {_bounds_sql(month)}"))
+        else:
+            # PARTITION OF отказал бы: ATTACH проверяет, что в default нет строк диапазона
+            await db.execute(text(
+                f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            ))
+            await db.execute(text(SKIP_TOMBSTONES), {"value": "on"})
+            await db.execute(
+                text(f"""
+                    WITH moved AS (
+                        DELETE FROM {DEFAULT_PARTITION}
+                        WHERE scheduled_time >= :lower AND scheduled_time < :upper
+                        RETURNING *
+                    )
+                    INSERT INTO {name} SELECT * FROM moved
+                """),
+                params,
+            )
+            await db.execute(text(SKIP_TOMBSTONES), {"value": "off"})
+            await db.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} {_bounds_sql(month)}"))
+        created.append(name)
+    return created
+
+
+async def drop_expired_intake_partitions(
+    db: AsyncSession, cutoff: datetime
+) -> tuple[list[str], set[str]]:
+    """
+    Удаляет разделы, весь месяц которых раньше cutoff (без commit).
+    Возвращает (удалённые разделы, затронутые пациенты).
+    DROP не запускает построчные триггеры: вместо следа на строку каждому
+    затронутому пациенту пишется отметка intake_history_purge с верхней
+    границей удалённых месяцев — /sync/pull отдаёт её в "deleted".
+    Сводку daily_adherence удаление не меняет: история приёма в ней сохраняется.
+    Строки default старше cutoff удаляет пакетами движок очистки
+    (services.retention_service).
+    """
+    bound = partition_drop_bound(cutoff)
+    expired = [
+        (month, name)
+        for month, name in sorted((await list_intake_partitions(db)).items())
+        if _bound(add_months(month, 1)) <= bound
+    ]
+    if not expired:
+        return [], set()
+
+    affected: set[str] = set()
+    for _, name in expired:
+        patients = await db.execute(text(f"""
+            SELECT DISTINCT m.patient_id
+            FROM medications m
+            WHERE EXISTS (SELECT 1 FROM {name} i WHERE i.medication_id = m.id)
+        """))
+        affected.update(patients.scalars())
+
+    # Отметки — в той же транзакции до DETACH: без commit нет ни их, ни удаления
+    if affected:
+        purged_before = _bound(add_months(expired[-1][0], 1))
+        await db.execute(
+            insert(SyncTombstone),
+            [
+                {"entity_type": "intake_history_purge", "patient_id": patient_id, "purged_before": purged_before}
+                for patient_id in sorted(affected)
+            ],
+        )
+
+    dropped = []
+    for _, name in expired:
+        await db.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+        await db.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+    return dropped, affected
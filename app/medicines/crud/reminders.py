@@ -0,0 +1,77 @@
+# app/medicines/crud/reminders.py
+from datetime import date
+from sqlalchemy import or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.medicines.models.medication import Medication
+from app.medicines.models.tombstone import SyncTombstone
+
+# Поля расписания (вход expand_schedules) и данные для напоминания
+REMINDER_SCHEDULE_COLUMNS = (
+    Medication.id,
+    Medication.patient_id,
+    Medication.name,
+    Medication.start_date,
+    Medication.end_date,
+    Medication.schedule_type,
+    Medication.week_days,
+    Medication.interval_days,
+    Medication.times_per_day,
+    Medication.change_seq,
+)
+
+
+async def get_active_schedules_page(
+    db: AsyncSession, date_from: date, date_to: date, after_id: int | None, limit: int
+) -> list:
+    """Страница препаратов всех пациентов, чей курс пересекается с периодом, по id."""
+    stmt = (
+        select(*REMINDER_SCHEDULE_COLUMNS)
+        .where(
+            Medication.start_date <= date_to,
+            or_(Medication.end_date.is_(None), Medication.end_date >= date_from),
+        )
+        .order_by(Medication.id)
+        .limit(limit)
+    )
+    if after_id is not None:
+        stmt = stmt.where(Medication.id > after_id)
+    result = await db.execute(stmt)
+    return list(result.all())
+
+
+async def get_schedules_changed_after(
+    db: AsyncSession, after_xid: int, after_key: tuple[int, int] | None, limit: int
+) -> list:
+    """
+    Созданные и изменённые препараты с change_xid >= водяного знака,
+    страница по ключу (change_xid, id) после after_key.
+    """
+    stmt = (
+        select(*REMINDER_SCHEDULE_COLUMNS, Medication.change_xid)
+        .where(Medication.change_xid >= after_xid)
+        .order_by(Medication.change_xid, Medication.id)
+        .limit(limit)
+    )
+    if after_key is not None:
+        stmt = stmt.where(tuple_(Medication.change_xid, Medication.id) > after_key)
+    result = await db.execute(stmt)
+    return list(result.all())
+
+
+async def get_medications_deleted_after(
+    db: AsyncSession, after_xid: int, after_key: tuple[int, int] | None, limit: int
+) -> list:
+    """
+    (id, entity_id, change_seq, change_xid) следов удаления препаратов
+    с change_xid >= водяного знака, страница по ключу (change_xid, id).
+    """
+    stmt = (
+        select(SyncTombstone.id, SyncTombstone.entity_id, SyncTombstone.change_seq, SyncTombstone.change_xid)
+        .where(SyncTombstone.entity_type == "medication", SyncTombstone.change_xid >= after_xid)
+        .order_by(SyncTombstone.change_xid, SyncTombstone.id)
+        .limit(limit)
+    )
+    if after_key is not None:
+        stmt = stmt.where(tuple_(SyncTombstone.change_xid, SyncTombstone.id) > after_key)
+    result = await db.execute(stmt)
+    return list(result.all())
@@ -0,0 +1,93 @@
+# app/medicines/crud/retention.py
+import datetime
+from typing import Sequence
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.medicines.models.retention import RetentionCheckpoint
+
+
+def _after(key_columns: Sequence, last_key: list | None):
+    if last_key is None:
+        return None
+    return tuple_(*key_columns) > tuple_(*last_key)
+
+
+async def delete_batch(
+    db: AsyncSession,
+    table,
+    key_columns: Sequence,
+    predicate,
+    last_key: list | None,
+    limit: int,
+    patient_column=None,
+) -> tuple[list | None, int, set[str]]:
+    """
+    Удаляет до limit строк по предикату с первичным ключом больше last_key,
+    по возрастанию ключа (без commit).
+    Возвращает (последний удалённый ключ, число строк, затронутые пациенты).
+    """
+    batch = select(*key_columns).where(predicate).order_by(*key_columns).limit(limit)
+    after = _after(key_columns, last_key)
+    if after is not None:
+        batch = batch.where(after)
+
+    returning = list(key_columns)
+    if patient_column is not None:
+        returning.append(patient_column)
+    stmt = (
+        delete(table)
+        .where(tuple_(*key_columns).in_(batch))
+        .returning(*returning)
+        .execution_options(synchronize_session=False)
+    )
+    rows = (await db.execute(stmt)).all()
+    if not rows:
+        return last_key, 0, set()
+
+    width = len(key_columns)
+    keys = sorted(tuple(row[:width]) for row in rows)
+    patients = {row[width] for row in rows if row[width] is not None} if patient_column is not None else set()
+    return list(keys[-1]), len(rows), patients
+
+
+async def count_backlog(
+    db: AsyncSession, table, key_columns: Sequence, predicate, last_key: list | None
+) -> int:
+    """Строки, которые проход ещё должен удалить."""
+    stmt = select(func.count()).select_from(table).where(predicate)
+    after = _after(key_columns, last_key)
+    if after is not None:
+        stmt = stmt.where(after)
+    return (await db.execute(stmt)).scalar_one()
+
+
+async def get_checkpoint(db: AsyncSession, entity: str) -> RetentionCheckpoint | None:
+    result = await db.execute(select(RetentionCheckpoint).where(RetentionCheckpoint.entity == entity))
+    return result.scalar_one_or_none()
+
+
+async def save_checkpoint(
+    db: AsyncSession,
+    entity: str,
+    cutoff: datetime.datetime,
+    last_key: list | None,
+    deleted_rows: int,
+) -> None:
+    """Сохраняет позицию прохода в текущей транзакции пакета."""
+    stmt = pg_insert(RetentionCheckpoint).values(
+        entity=entity, cutoff=cutoff, last_key=last_key, deleted_rows=deleted_rows
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RetentionCheckpoint.entity],
+        set_={
+            "last_key": stmt.excluded.last_key,
+            "deleted_rows": stmt.excluded.deleted_rows,
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+
+async def delete_checkpoint(db: AsyncSession, entity: str) -> None:
+    await db.execute(delete(RetentionCheckpoint).where(RetentionCheckpoint.entity == entity))
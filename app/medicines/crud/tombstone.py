@@ -0,0 +1,34 @@
+# app/medicines/crud/tombstone.py
+from typing import Any
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.medicines.models.tombstone import SyncTombstone
+
+
+def tombstones_after_query(patient_id: str, after_xid: int):
+    return (
+        select(SyncTombstone.entity_type, SyncTombstone.entity_id, SyncTombstone.purged_before)
+        .where(SyncTombstone.patient_id == patient_id, SyncTombstone.change_xid >= after_xid)
+        .order_by(SyncTombstone.change_seq)
+    )
+
+
+async def get_tombstones_after(db: AsyncSession, patient_id: str, after_xid: int) -> list:
+    """Удаления пациента от водяного знака курсора (crud.change_feed)."""
+    result = await db.execute(tombstones_after_query(patient_id, after_xid))
+    return list(result.all())
+
+
+def tombstone_item(tombstone) -> dict[str, Any]:
+    """
+    Элемент "deleted" ответа /sync/pull. Отметка intake_history_purge
+    (удалён раздел истории) вместо entity_id несёт scheduled_before:
+    клиент удаляет свою историю приёма с scheduled_time раньше него.
+    """
+    if tombstone.purged_before is not None:
+        return {
+            "entity_type": tombstone.entity_type,
+            "entity_id": None,
+            "scheduled_before": tombstone.purged_before.isoformat(),
+        }
+    return {"entity_type": tombstone.entity_type, "entity_id": tombstone.entity_id}
@@ -0,0 +1,28 @@
+# app/medicines/models/adherence.py
+from datetime import date, datetime
+from sqlalchemy import BigInteger, Date, ForeignKey, Integer, TIMESTAMP
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class DailyAdherence(Base):
+    """
+    Сводка intake_history по препарату и дню (UTC).
+    Поддерживается триггерами на intake_history; расхождения
+    исправляет задача rebuild_daily_adherence.
+    """
+    __tablename__ = "daily_adherence"
+
+    medication_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey("medications.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    taken: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    skipped: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now()
+    )
@@ -1,7 +1,10 @@
 # app/medicines/models/intake.py
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import BigInteger, Text, TIMESTAMP, ForeignKey, CheckConstraint
+from sqlalchemy import (
+    BigInteger, Text, TIMESTAMP, ForeignKey, CheckConstraint, FetchedValue, Index,
+    UniqueConstraint, text
+)
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func 
 from app.db.base import Base
@@ -10,13 +13,15 @@ from app.db.base import Base
 class IntakeHistory(Base):
     __tablename__ = "intake_history"
 
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, index=True)
+    # В БД первичный ключ (id, scheduled_time) — ключ секционирования обязан
+    # входить в PK; для ORM строку однозначно задаёт id (см. __mapper_args__)
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     medication_id: Mapped[int] = mapped_column(
         BigInteger,
         ForeignKey("medications.id", ondelete="CASCADE"),
         nullable=False
     )
-    scheduled_time: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+    scheduled_time: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), primary_key=True)
     taken_time: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
     status: Mapped[str] = mapped_column(Text, nullable=False)  # 'taken', 'skipped'
     notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -26,7 +31,36 @@ class IntakeHistory(Base):
         server_default=func.now()
     )
 
+    # Поддерживаются триггером sync_touch_row() при каждом INSERT/UPDATE
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        server_onupdate=FetchedValue()
+    )
+    change_seq: Mapped[int] = mapped_column(
+        BigInteger,
+        server_default=text("nextval('sync_change_seq')"),
+        server_onupdate=FetchedValue()
+    )
+    # xid записавшей транзакции — водяной знак курсора /sync/pull
+    change_xid: Mapped[int] = mapped_column(
+        BigInteger,
+        server_default=text("pg_current_xact_id()::text::bigint"),
+        server_onupdate=FetchedValue()
+    )
+
 
     __table_args__ = (
         CheckConstraint("status IN ('taken', 'skipped')", name='valid_status'),
-    )
\ No newline at end of file
+        Index("ix_intake_history_medication_id_change_xid", "medication_id", "change_xid"),
+        Index("ix_intake_history_created_at", "created_at"),
+        # Одна запись на запланированный приём — ключ UPSERT
+        UniqueConstraint(
+            "medication_id", "scheduled_time",
+            name="uq_intake_history_medication_id_scheduled_time"
+        ),
+        # Разделы по месяцам создаёт и удаляет crud.partitions
+        {"postgresql_partition_by": "RANGE (scheduled_time)"},
+    )
+
+    __mapper_args__ = {"primary_key": [id]}
\ No newline at end of file
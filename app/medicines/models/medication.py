@@ -3,7 +3,8 @@ from datetime import date, time, datetime
 from typing import List, Optional
 from sqlalchemy import (
     String, BigInteger, Text, Date, Time,
-    Integer, CheckConstraint, ARRAY, ForeignKey, TIMESTAMP
+    Integer, CheckConstraint, ARRAY, ForeignKey, TIMESTAMP,
+    FetchedValue, Index, text
 )
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func  
@@ -33,6 +34,24 @@ class Medication(Base):
         server_default=func.now()
     )
 
+    # Поддерживаются триггером sync_touch_row() при каждом INSERT/UPDATE
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        server_onupdate=FetchedValue()
+    )
+    change_seq: Mapped[int] = mapped_column(
+        BigInteger,
+        server_default=text("nextval('sync_change_seq')"),
+        server_onupdate=FetchedValue()
+    )
+    # xid записавшей транзакции — водяной знак курсора /sync/pull
+    change_xid: Mapped[int] = mapped_column(
+        BigInteger,
+        server_default=text("pg_current_xact_id()::text::bigint"),
+        server_onupdate=FetchedValue()
+    )
+
     __table_args__ = (
         CheckConstraint(
             "form IN ('tablet', 'drop', 'spray', 'other')",
@@ -42,4 +61,7 @@ class Medication(Base):
             "schedule_type IN ('daily', 'weekly_days', 'every_x_days')",
             name="valid_schedule_type"
         ),
+        Index("ix_medications_patient_id_change_xid", "patient_id", "change_xid"),
+        Index("ix_medications_created_at", "created_at"),
+        Index("ix_medications_change_xid_id", "change_xid", "id"),
     )
\ No newline at end of file
@@ -0,0 +1,45 @@
+# app/medicines/models/missed_dose.py
+from datetime import datetime
+from sqlalchemy import BigInteger, ForeignKey, Index, String, Text, TIMESTAMP, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class MissedDose(Base):
+    """
+    Приём по расписанию, для которого к сроку (scheduled_time + отсрочка)
+    не появилось записи в intake_history. Пишет задача detect_missed_doses.
+    """
+    __tablename__ = "missed_doses"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    medication_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey("medications.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    patient_id: Mapped[str] = mapped_column(String, nullable=False)
+    scheduled_time: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+    detected_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now()
+    )
+
+    __table_args__ = (
+        UniqueConstraint("medication_id", "scheduled_time", name="uq_missed_doses_medication_id_scheduled_time"),
+        Index("ix_missed_doses_patient_id_scheduled_time", "patient_id", "scheduled_time"),
+        Index("ix_missed_doses_scheduled_time", "scheduled_time"),
+    )
+
+
+class JobWatermark(Base):
+    """Граница, до которой периодическая задача обработала данные."""
+    __tablename__ = "job_watermarks"
+
+    job: Mapped[str] = mapped_column(Text, primary_key=True)
+    processed_until: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now()
+    )
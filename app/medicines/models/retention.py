@@ -0,0 +1,30 @@
+# app/medicines/models/retention.py
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import BigInteger, Text, TIMESTAMP
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class RetentionCheckpoint(Base):
+    """
+    Незавершённый проход очистки по сущности: граница срока хранения
+    и последний удалённый первичный ключ. Строка удаляется, когда
+    проход дошёл до конца; после сбоя очистка продолжается с неё.
+    """
+    __tablename__ = "retention_checkpoints"
+
+    entity: Mapped[str] = mapped_column(Text, primary_key=True)
+    cutoff: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+    last_key: Mapped[Optional[list]] = mapped_column(JSONB, nullable=True)
+    deleted_rows: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+    started_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now()
+    )
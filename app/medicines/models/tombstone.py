@@ -0,0 +1,57 @@
+# app/medicines/models/tombstone.py
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import BigInteger, String, Text, TIMESTAMP, Index, CheckConstraint, text
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class SyncTombstone(Base):
+    """
+    След удаления строки для инкрементального /sync/pull.
+    Пишется триггерами AFTER DELETE на medications и intake_history.
+    intake_history_purge — отметка удаления раздела истории целиком
+    (crud.partitions): вся история пациента раньше purged_before удалена.
+    """
+    __tablename__ = "sync_tombstones"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    entity_type: Mapped[str] = mapped_column(Text, nullable=False)  # 'medication', 'intake_history', 'intake_history_purge'
+    entity_id: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    patient_id: Mapped[str] = mapped_column(String, nullable=False)
+    change_seq: Mapped[int] = mapped_column(
+        BigInteger,
+        server_default=text("nextval('sync_change_seq')"),
+        nullable=False
+    )
+    change_xid: Mapped[int] = mapped_column(
+        BigInteger,
+        server_default=text("pg_current_xact_id()::text::bigint"),
+        nullable=False
+    )
+    deleted_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now()
+    )
+    purged_before: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+
+    __table_args__ = (
+        CheckConstraint(
+            "entity_type IN ('medication', 'intake_history', 'intake_history_purge')",
+            name="valid_entity_type"
+        ),
+        CheckConstraint(
+            "(entity_type = 'intake_history_purge') = (purged_before IS NOT NULL) "
+            "AND (entity_type = 'intake_history_purge' OR entity_id IS NOT NULL)",
+            name="valid_purge_marker"
+        ),
+        Index("ix_sync_tombstones_patient_id_change_xid", "patient_id", "change_xid"),
+        Index("ix_sync_tombstones_deleted_at", "deleted_at"),
+        Index(
+            "ix_sync_tombstones_medication_change_xid_id",
+            "change_xid",
+            "id",
+            postgresql_where=text("entity_type = 'medication'")
+        ),
+    )
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, field_validator
 from datetime import date, time, datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 from zoneinfo import ZoneInfo
 
 
@@ -68,4 +68,31 @@ class IntakeHistoryResponse(BaseModel):
     notes: Optional[str]
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ClientIntakeHistoryUpdate(BaseModel):
+    server_id: Optional[int] 
+    medication_server_id: int 
+    status: str 
+    taken_time: datetime
+    notes: Optional[str] = None
+
+
+class ClientMedicationUpdate(BaseModel):
+    server_id: Optional[int] 
+    action: Literal["create", "update"] 
+    name: str
+    form: str 
+    instructions: Optional[str] = None
+    start_date: date 
+    end_date: Optional[date] = None 
+    schedule_type: str 
+    week_days: Optional[List[int]] = None 
+    interval_days: Optional[int] = None
+    times_per_day: List[str] 
+
+
+class PushSyncRequest(BaseModel):
+    medications: List[ClientMedicationUpdate] = []
+    intake_history: List[ClientIntakeHistoryUpdate] = []
@@ -0,0 +1,98 @@
+# app/medicines/services/analytics_service.py
+
+import bisect
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import LRUTTLCache
+from app.core.config import settings
+from app.medicines.crud import analytics as crud_analytics
+from app.medicines.crud.medication import get_medication_schedules
+from app.medicines.services.schedule import expand_schedules
+
+# Ключ включает версию данных пациента: любая запись даёт новый ключ,
+# старые записи вытесняются LRU или истекают по TTL.
+_cache: LRUTTLCache[list[dict]] = LRUTTLCache(
+    max_size=settings.analytics.cache_size,
+    ttl_seconds=settings.analytics.cache_ttl_seconds,
+)
+
+
+def period_start(day: date, period: str) -> date:
+    """Начало недели (понедельник) или месяца — как date_trunc в БД."""
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def _rate(count: int, expected: int) -> float | None:
+    return round(count / expected, 4) if expected else None
+
+
+def _row(medication_id: int, name: str, start: date, scheduled: int, taken: int, skipped: int) -> dict:
+    # Записи вне расписания (или досрочные) не делают пропуски отрицательными
+    expected = max(scheduled, taken + skipped)
+    missed = max(scheduled - taken - skipped, 0)
+    return {
+        "medication_id": medication_id,
+        "name": name,
+        "period_start": start,
+        "scheduled": scheduled,
+        "taken": taken,
+        "skipped": skipped,
+        "missed": missed,
+        "taken_rate": _rate(taken, expected),
+        "skipped_rate": _rate(skipped, expected),
+        "missed_rate": _rate(missed, expected),
+    }
+
+
+async def get_adherence(
+    db: AsyncSession,
+    patient_id: str,
+    data_version: int,
+    period: str,
+    date_from: date,
+    date_to: date,
+) -> list[dict]:
+    """
+    Доли taken / skipped / missed по препарату и периоду (неделя/месяц)
+    в окне [date_from, date_to] по UTC.
+    taken/skipped — агрегат сводки daily_adherence в БД; ожидаемые приёмы —
+    развёртка расписания до текущего момента; missed — ожидаемые без записи.
+    """
+    key = (patient_id, period, date_from, date_to, data_version)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    now = datetime.now(timezone.utc)
+    schedules = await get_medication_schedules(db, patient_id, date_from, date_to)
+    counts = await crud_analytics.get_intake_status_counts(db, patient_id, period, date_from, date_to)
+
+    names: dict[int, str] = {}
+    scheduled: dict[tuple[int, date], int] = {}
+    for schedule, doses in zip(schedules, expand_schedules(schedules, date_from, date_to)):
+        names[schedule.id] = schedule.name
+        # Будущие приёмы ещё не могут быть пропущены
+        for dose in doses[:bisect.bisect_right(doses, now)]:
+            bucket = (schedule.id, period_start(dose.date(), period))
+            scheduled[bucket] = scheduled.get(bucket, 0) + 1
+
+    recorded: dict[tuple[int, date], tuple[int, int]] = {}
+    for row in counts:
+        names[row.medication_id] = row.name
+        bucket = (row.medication_id, row.period_start)
+        recorded[bucket] = (row.taken, row.skipped)
+
+    rows = [
+        _row(medication_id, names[medication_id], bucket_start,
+             scheduled.get((medication_id, bucket_start), 0),
+             *recorded.get((medication_id, bucket_start), (0, 0)))
+        for medication_id, bucket_start in sorted(scheduled.keys() | recorded.keys())
+    ]
+    _cache.set(key, rows)
+    return rows
+
+
+def stats() -> dict[str, int | float]:
+    return _cache.stats()
@@ -0,0 +1,165 @@
+# app/medicines/services/archive_service.py
+"""
+Холодный архив данных, удаляемых по сроку хранения.
+
+Перед очисткой строки читаются серверным курсором и пишутся в колоночные
+файлы (core.columnar) по дням UTC:
+    {ARCHIVE_DIR}/{entity}/YYYY/MM/YYYY-MM-DD.{run}.mcol (+ .mcol.json)
+Внутри файла строки упорядочены по пациенту. Повторный запуск после сбоя
+может выгрузить строки второй раз — чтение убирает дубли по id.
+"""
+import asyncio
+import logging
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Iterator
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.core import columnar
+from app.core.config import settings
+from app.medicines.crud.archive import (
+    INTAKE_ARCHIVE_COLUMNS,
+    MEDICATION_ARCHIVE_COLUMNS,
+    expiring_intakes_query,
+    expiring_medications_query,
+    purged_medication_intakes_query,
+)
+from app.medicines.crud.partitions import add_months
+from app.medicines.schemas.schemas import ensure_utc
+
+logger = logging.getLogger(__name__)
+
+INTAKE_ENTITY = "intake_history"
+MEDICATION_ENTITY = "medications"
+FILE_SUFFIX = ".mcol"
+# Поля ответа: как у истории приёма мед-другу, плюс название препарата
+INTAKE_ARCHIVE_FIELDS = (
+    "id", "medication_id", "medication_name", "scheduled_time",
+    "taken_time", "status", "notes", "created_at",
+)
+
+
+def _root() -> Path:
+    return Path(settings.archive.dir)
+
+
+def _file_path(entity: str, day: date, run_id: str) -> Path:
+    return _root() / entity / f"{day:%Y}" / f"{day:%m}" / f"{day.isoformat()}.{run_id}{FILE_SUFFIX}"
+
+
+async def _export(
+    db: AsyncSession, stmt, entity: str, columns: tuple[str, ...], run_id: str
+) -> tuple[int, int]:
+    """Поток строк (day, ...) в файлы по дням; (файлов, строк)."""
+    archive_settings = settings.archive
+    writer: columnar.ColumnarWriter | None = None
+    files = rows = 0
+    result = await db.stream(stmt.execution_options(yield_per=archive_settings.fetch_size))
+    try:
+        async for partition in result.mappings().partitions():
+            for row in partition:
+                if writer is None or writer.meta["day"] != row["day"].isoformat():
+                    if writer is not None:
+                        await asyncio.to_thread(writer.close)
+                        files += 1
+                    day = row["day"]
+                    writer = columnar.ColumnarWriter(
+                        _file_path(entity, day, run_id),
+                        columns,
+                        sort_key="patient_id",
+                        row_group_size=archive_settings.row_group_size,
+                        meta={"entity": entity, "day": day.isoformat(), "run": run_id},
+                    )
+                writer.append(row)
+                rows += 1
+                if writer.full:
+                    await asyncio.to_thread(writer.flush)
+        if writer is not None:
+            await asyncio.to_thread(writer.close)
+            files += 1
+            writer = None
+    finally:
+        if writer is not None:
+            writer.abort()
+        await result.close()
+    return files, rows
+
+
+async def archive_expiring(
+    session_factory: async_sessionmaker[AsyncSession],
+    intake_cutoff: datetime,
+    medications_cutoff: datetime,
+) -> dict[str, dict[str, int]]:
+    """
+    Выгружает историю приёма и препараты, которые удалит очистка с теми же
+    границами. Ошибка пробрасывается: без архива очистку запускать нельзя.
+    """
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    # История — двумя запросами, чтобы каждый отсекал разделы или шёл по
+    # индексу; у второй выгрузки свой суффикс, иначе файлы одного дня совпали бы
+    exports = (
+        (INTAKE_ENTITY, run_id, expiring_intakes_query(intake_cutoff), INTAKE_ARCHIVE_COLUMNS),
+        (
+            INTAKE_ENTITY,
+            f"{run_id}-purged",
+            purged_medication_intakes_query(intake_cutoff, medications_cutoff),
+            INTAKE_ARCHIVE_COLUMNS,
+        ),
+        (MEDICATION_ENTITY, run_id, expiring_medications_query(medications_cutoff), MEDICATION_ARCHIVE_COLUMNS),
+    )
+    exported: dict[str, dict[str, int]] = {}
+    async with session_factory() as session:
+        for entity, export_run, stmt, columns in exports:
+            files, rows = await _export(session, stmt, entity, columns, export_run)
+            totals = exported.setdefault(entity, {"files": 0, "rows": 0})
+            totals["files"] += files
+            totals["rows"] += rows
+        for entity, totals in exported.items():
+            logger.info(f" Архив {entity}: {totals['rows']} строк в {totals['files']} файлах")
+    return exported
+
+
+def _manifests_by_day(entity: str, date_from: date, date_to: date) -> Iterator[tuple[date, list[Path]]]:
+    """Манифесты файлов за дни [date_from, date_to] по возрастанию дня."""
+    month = date_from.replace(day=1)
+    while month <= date_to:
+        month_dir = _root() / entity / f"{month:%Y}" / f"{month:%m}"
+        by_day: dict[date, list[Path]] = {}
+        if month_dir.is_dir():
+            for path in month_dir.glob(f"*{FILE_SUFFIX}{columnar.MANIFEST_SUFFIX}"):
+                day = date.fromisoformat(path.name.split(".", 1)[0])
+                if date_from <= day <= date_to:
+                    by_day.setdefault(day, []).append(path)
+        for day in sorted(by_day):
+            yield day, sorted(by_day[day])
+        month = add_months(month, 1)
+
+
+def read_intake_archive(
+    patient_id: str,
+    date_from: date,
+    date_to: date,
+    after: tuple[datetime, int] | None = None,
+    limit: int = 500,
+) -> list[dict]:
+    """
+    Архивная история приёма пациента за дни [date_from, date_to] по
+    возрастанию (scheduled_time, id), начиная после ключа after.
+    Читает файлы по одному дню; блокирующий — вызывать через to_thread.
+    """
+    if after is not None:
+        after = (ensure_utc(after[0]), after[1])
+        date_from = max(date_from, after[0].date())
+    page: list[dict] = []
+    for _, manifests in _manifests_by_day(INTAKE_ENTITY, date_from, date_to):
+        # Строки пациента за день из всех выгрузок, без дублей
+        day_rows: dict[int, dict] = {}
+        for manifest_path in manifests:
+            for row in columnar.scan(manifest_path, patient_id, INTAKE_ARCHIVE_FIELDS):
+                day_rows[row["id"]] = row
+        for row in sorted(day_rows.values(), key=lambda row: (row["scheduled_time"], row["id"])):
+            if after is not None and (row["scheduled_time"], row["id"]) <= after:
+                continue
+            page.append(row)
+            if len(page) == limit:
+                return page
+    return page
@@ -0,0 +1,225 @@
+# app/medicines/services/event_stream.py
+"""
+Поток событий пациента для мед-друга (Server-Sent Events).
+
+Пути записи публикуют событие через pg_notify в своей транзакции
+(crud.events). Каждый процесс держит одно соединение asyncpg с LISTEN
+и раздаёт события подписчикам своего процесса — так события доходят
+при любом числе воркеров. Подписчик — очередь ограниченного размера
+без соединения с БД: простаивающий поток стоит одну корутину и
+периодический heartbeat. Переполнение очереди — медленный клиент:
+он получает событие overflow и поток закрывается, клиент переподключается
+и перечитывает данные. Смена мед-друга пациента (relation_changed)
+закрывает потоки пациента событием revoked; после переподключения
+LISTEN, когда это уведомление могло потеряться, каждый поток
+перепроверяет доступ.
+"""
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Awaitable, Callable
+import asyncpg
+from sqlalchemy.engine import make_url
+from app.core.config import EventStreamSettings, settings
+from app.medicines.crud.events import EVENTS_CHANNEL, RELATION_CHANGED
+
+logger = logging.getLogger(__name__)
+
+# Пропущенные за время переподключения события: клиенту нужно перечитать данные
+RESYNC_EVENT = "event: resync\ndata: {}\n\n"
+OVERFLOW_EVENT = "event: overflow\ndata: {}\n\n"
+# Мед-друг больше не привязан к пациенту: поток закрыт, переподключаться не нужно
+REVOKED_EVENT = "event: revoked\ndata: {}\n\n"
+HEARTBEAT = ": ping\n\n"
+
+
+def format_event(event_type: str, data: dict) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class Subscription:
+    __slots__ = ("patient_id", "queue", "final_event")
+
+    def __init__(self, patient_id: str, queue_size: int):
+        self.patient_id = patient_id
+        self.queue: asyncio.Queue[str | None] = asyncio.Queue(maxsize=queue_size)
+        # Последнее событие потока, закрытого брокером (None в очереди)
+        self.final_event: str | None = None
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class EventBroker:
+    def __init__(self, dsn: str, config: EventStreamSettings):
+        self.dsn = dsn
+        self.config = config
+        self._subscribers: dict[str, set[Subscription]] = {}
+        self._count = 0
+        self._task: asyncio.Task | None = None
+        self.connected = False
+        self.received = 0
+        self.delivered = 0
+        self.dropped_subscribers = 0
+        self.reconnects = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _listen(self) -> None:
+        first = True
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                closed = asyncio.Event()
+                conn.add_termination_listener(lambda _: closed.set())
+                await conn.add_listener(EVENTS_CHANNEL, self._on_notify)
+                self.connected = True
+                if not first:
+                    self._broadcast(RESYNC_EVENT)
+                first = False
+                while not closed.is_set():
+                    try:
+                        await asyncio.wait_for(closed.wait(), timeout=self.config.heartbeat_seconds)
+                    except asyncio.TimeoutError:
+                        # Обрыв без закрытия сокета виден только по запросу
+                        await conn.execute("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка соединения LISTEN {EVENTS_CHANNEL}: {e}")
+            finally:
+                self.connected = False
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            self.reconnects += 1
+            await asyncio.sleep(self.config.reconnect_seconds)
+
+    def _on_notify(self, conn, pid: int, channel: str, payload: str) -> None:
+        self.received += 1
+        try:
+            event = json.loads(payload)
+            subscribers = self._subscribers.get(event["patient_id"])
+            if not subscribers:
+                return
+            if event["type"] == RELATION_CHANGED:
+                for subscription in list(subscribers):
+                    self._close(subscription, REVOKED_EVENT)
+                return
+            # Строка события кодируется один раз на всех подписчиков пациента
+            message = format_event(event["type"], event["data"])
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Некорректное событие {channel}: {e}")
+            return
+        for subscription in list(subscribers):
+            self._offer(subscription, message)
+
+    def _broadcast(self, message: str) -> None:
+        for subscribers in list(self._subscribers.values()):
+            for subscription in list(subscribers):
+                self._offer(subscription, message)
+
+    def _offer(self, subscription: Subscription, message: str) -> None:
+        try:
+            subscription.queue.put_nowait(message)
+            self.delivered += 1
+        except asyncio.QueueFull:
+            # Медленный клиент
+            self._close(subscription, OVERFLOW_EVENT)
+            self.dropped_subscribers += 1
+
+    def _close(self, subscription: Subscription, final_event: str) -> None:
+        """Очередь очищается, поток отдаёт final_event и закрывается."""
+        subscription.final_event = final_event
+        self.unsubscribe(subscription)
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+
+    @property
+    def full(self) -> bool:
+        return self._count >= self.config.max_subscribers
+
+    def subscribe(self, patient_id: str) -> Subscription:
+        if self.full:
+            raise TooManySubscribers()
+        subscription = Subscription(patient_id, self.config.queue_size)
+        self._subscribers.setdefault(patient_id, set()).add(subscription)
+        self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.patient_id)
+        if subscribers is None or subscription not in subscribers:
+            return
+        subscribers.discard(subscription)
+        self._count -= 1
+        if not subscribers:
+            del self._subscribers[subscription.patient_id]
+
+    async def stream(
+        self, patient_id: str, authorize: Callable[[], Awaitable[bool]]
+    ) -> AsyncIterator[str]:
+        """
+        Тело ответа text/event-stream. Подписка создаётся при первом чтении
+        тела и снимается при любом завершении: клиент, ушедший до первого
+        байта, её не оставляет. authorize перепроверяет доступ на resync.
+        """
+        try:
+            subscription = self.subscribe(patient_id)
+        except TooManySubscribers:
+            # Места заняли после проверки в обработчике
+            yield OVERFLOW_EVENT
+            return
+        try:
+            yield f"retry: {int(self.config.reconnect_seconds * 1000)}\n\n"
+            yield format_event("ready", {"patient_id": patient_id})
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=self.config.heartbeat_seconds
+                    )
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+                    continue
+                if message is None:
+                    yield subscription.final_event
+                    return
+                if message == RESYNC_EVENT and not await authorize():
+                    yield REVOKED_EVENT
+                    return
+                yield message
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.connected,
+            "subscribers": self._count,
+            "patients": len(self._subscribers),
+            "max_subscribers": self.config.max_subscribers,
+            "received": self.received,
+            "delivered": self.delivered,
+            "dropped_subscribers": self.dropped_subscribers,
+            "reconnects": self.reconnects,
+        }
+
+
+def _listen_dsn(url: str) -> str:
+    """URL SQLAlchemy (postgresql+asyncpg://) -> DSN asyncpg."""
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+event_broker = EventBroker(_listen_dsn(settings.db.url), settings.event_stream)
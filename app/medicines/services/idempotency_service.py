@@ -0,0 +1,92 @@
+# app/medicines/services/idempotency_service.py
+
+import datetime
+import hashlib
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import LRUTTLCache
+from app.core.config import settings
+from app.medicines.crud import idempotency as crud_idempotency
+
+
+class IdempotencyConflict(Exception):
+    """Ключ уже использован для запроса с другим телом."""
+    pass
+
+
+class IdempotencyKeyInUse(Exception):
+    """Параллельный запрос с тем же ключом зафиксировал ответ раньше."""
+    pass
+
+
+class StoredResponse:
+    __slots__ = ("request_hash", "status_code", "body")
+
+    def __init__(self, request_hash: str, status_code: int, body: dict):
+        self.request_hash = request_hash
+        self.status_code = status_code
+        self.body = body
+
+
+# Фронт-кэш перед таблицей idempotency_keys: повторы из шторма ретраев
+# обслуживаются без запроса в БД.
+_cache: LRUTTLCache[StoredResponse] = LRUTTLCache(
+    max_size=settings.idempotency.cache_size,
+    ttl_seconds=settings.idempotency.ttl_seconds,
+)
+
+
+def request_fingerprint(payload: BaseModel) -> str:
+    return hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+
+
+async def lookup(
+    db: AsyncSession, user_uuid: str, key: str, request_hash: str
+) -> StoredResponse | None:
+    """
+    Возвращает сохранённый ответ для (пользователь, ключ) или None.
+    Бросает IdempotencyConflict, если ключ использован с другим телом запроса.
+    """
+    stored = _cache.get((user_uuid, key))
+    if stored is None:
+        record = await crud_idempotency.get_idempotency_key(db, user_uuid, key)
+        if record is None:
+            return None
+        stored = StoredResponse(record.request_hash, record.status_code, record.response)
+        remaining = (record.expires_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+        _cache.set((user_uuid, key), stored, ttl_seconds=max(remaining, 0))
+
+    if stored.request_hash != request_hash:
+        raise IdempotencyConflict("Idempotency-Key was already used with a different request body")
+    return stored
+
+
+async def remember(
+    db: AsyncSession,
+    user_uuid: str,
+    key: str,
+    request_hash: str,
+    status_code: int,
+    body: dict,
+) -> None:
+    """
+    Добавляет ответ в текущую транзакцию.
+    Вызывается до commit, чтобы ответ и изменения фиксировались атомарно.
+    Бросает IdempotencyKeyInUse, если ключ занят действующей записью.
+    """
+    expires_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(
+        seconds=settings.idempotency.ttl_seconds
+    )
+    if not await crud_idempotency.add_idempotency_key(
+        db, user_uuid, key, request_hash, status_code, body, expires_at
+    ):
+        raise IdempotencyKeyInUse(key)
+
+
+def cache_response(user_uuid: str, key: str, request_hash: str, status_code: int, body: dict) -> None:
+    """Кладёт ответ во фронт-кэш после успешного commit."""
+    _cache.set((user_uuid, key), StoredResponse(request_hash, status_code, body))
+
+
+def stats() -> dict[str, int | float]:
+    return _cache.stats()
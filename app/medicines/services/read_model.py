@@ -0,0 +1,292 @@
+# app/medicines/services/read_model.py
+"""
+In-process кэш чтения данных пациента (препараты и история приёма).
+
+Снимок помечен версией данных пациента (users.data_version), которую
+обработчики уже читают для ETag: несовпадение версии — промах, поэтому
+кэш корректен и при нескольких процессах. Пути записи дополнительно
+сбрасывают снимок явно после commit. Параллельные промахи по одному
+пациенту ждут одну загрузку (single-flight).
+"""
+import asyncio
+import sys
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Iterable
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.medicines.crud.change_feed import snapshot_xmin
+from app.medicines.models.intake import IntakeHistory
+from app.medicines.models.medication import Medication
+from app.medicines.schemas.schemas import IntakeHistoryResponse, MedicationResponse, ensure_utc
+
+MEDICATION_SYNC_FIELDS = tuple(MedicationResponse.model_fields)
+INTAKE_SYNC_FIELDS = tuple(IntakeHistoryResponse.model_fields)
+# Поля ответа мед-другу — как INTAKE_READ_COLUMNS в crud.intake
+# и MEDICATION_READ_COLUMNS в crud.medication
+MEDICATION_FRIEND_FIELDS = MEDICATION_SYNC_FIELDS
+INTAKE_FRIEND_FIELDS = ("id", "medication_id", "scheduled_time", "taken_time", "status", "notes", "created_at")
+
+
+def _project(rows: Iterable[dict], fields: tuple[str, ...]) -> list[dict]:
+    return [{field: row[field] for field in fields} for row in rows]
+
+
+def _approx_bytes(rows: list[dict]) -> int:
+    """Грубая оценка памяти: словари строк и их значения без вложенности."""
+    return sys.getsizeof(rows) + sum(
+        sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row.values())
+        for row in rows
+    )
+
+
+class PatientReadModel:
+    """
+    Снимок данных пациента. Строки — словари всех колонок; они разделяются
+    между запросами и не изменяются, ответы строятся проекциями.
+    xmin — водяной знак ленты изменений на момент загрузки (crud.change_feed).
+    oversized — история длиннее предела, читать нужно из БД.
+    """
+    __slots__ = ("version", "xmin", "medications", "intakes", "oversized", "rows", "approx_bytes")
+
+    def __init__(
+        self,
+        version: int,
+        xmin: int,
+        medications: list[dict],
+        intakes: list[dict],
+        oversized: bool = False,
+    ):
+        self.version = version
+        self.xmin = xmin
+        self.medications = medications  # по возрастанию id
+        self.intakes = intakes          # по убыванию (scheduled_time, id)
+        self.oversized = oversized
+        self.rows = len(medications) + len(intakes)
+        self.approx_bytes = _approx_bytes(medications) + _approx_bytes(intakes)
+
+    def medications_page(
+        self,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        after_id: int | None = None,
+        limit: int | None = None,
+    ) -> list[dict]:
+        """Как crud.medication.get_medications_by_patient_id."""
+        page = []
+        for row in self.medications:
+            if date_from is not None and row["end_date"] is not None and row["end_date"] < date_from:
+                continue
+            if date_to is not None and row["start_date"] > date_to:
+                continue
+            if after_id is not None and row["id"] <= after_id:
+                continue
+            page.append(row)
+            if limit is not None and len(page) == limit:
+                break
+        return _project(page, MEDICATION_FRIEND_FIELDS)
+
+    def intakes_page(
+        self,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        medication_id: int | None = None,
+        after: tuple[datetime, int] | None = None,
+        limit: int | None = None,
+    ) -> list[dict]:
+        """Как crud.intake.get_intake_history_by_patient_id."""
+        date_from, date_to = ensure_utc(date_from), ensure_utc(date_to)
+        if after is not None:
+            after = (ensure_utc(after[0]), after[1])
+        page = []
+        for row in self.intakes:
+            if medication_id is not None and row["medication_id"] != medication_id:
+                continue
+            if date_from is not None and row["scheduled_time"] < date_from:
+                continue
+            if date_to is not None and row["scheduled_time"] >= date_to:
+                continue
+            if after is not None and (row["scheduled_time"], row["id"]) >= after:
+                continue
+            page.append(row)
+            if limit is not None and len(page) == limit:
+                break
+        return _project(page, INTAKE_FRIEND_FIELDS)
+
+    def changes(
+        self, after_xid: int | None, since: datetime | None
+    ) -> tuple[list[dict], list[dict]]:
+        """
+        Строки для /sync/pull по возрастанию change_seq — как запросы
+        в api.sync. Курсор ответа — xmin этого снимка.
+        """
+        since = ensure_utc(since)
+
+        def changed(row: dict) -> bool:
+            if after_xid is not None:
+                return row["change_xid"] >= after_xid
+            if since:
+                return row["updated_at"] > since
+            return True
+
+        medications = sorted(filter(changed, self.medications), key=lambda row: row["change_seq"])
+        intakes = sorted(filter(changed, self.intakes), key=lambda row: row["change_seq"])
+        return _project(medications, MEDICATION_SYNC_FIELDS), _project(intakes, INTAKE_SYNC_FIELDS)
+
+
+async def load_patient_read_model(
+    db: AsyncSession, patient_id: str, version: int, max_rows: int
+) -> PatientReadModel:
+    """
+    Два запроса: препараты и история (не больше max_rows + 1 строк).
+    Водяной знак читается первым — при READ COMMITTED запросы после него
+    видят все транзакции с меньшим xid.
+    """
+    xmin = await snapshot_xmin(db)
+    medications_result = await db.execute(
+        select(Medication.__table__)
+        .where(Medication.patient_id == patient_id)
+        .order_by(Medication.id)
+    )
+    medications = [dict(row) for row in medications_result.mappings()]
+
+    remaining = max_rows - len(medications)
+    if remaining < 0:
+        return PatientReadModel(version, xmin, [], [], oversized=True)
+
+    intake_result = await db.execute(
+        select(IntakeHistory.__table__)
+        .join(Medication, Medication.id == IntakeHistory.medication_id)
+        .where(Medication.patient_id == patient_id)
+        .order_by(IntakeHistory.scheduled_time.desc(), IntakeHistory.id.desc())
+        .limit(remaining + 1)
+    )
+    intakes = [dict(row) for row in intake_result.mappings()]
+    if len(intakes) > remaining:
+        return PatientReadModel(version, xmin, [], [], oversized=True)
+    return PatientReadModel(version, xmin, medications, intakes)
+
+
+class ReadModelCache:
+    """
+    LRU снимков по uuid пациента с ограничением по числу пациентов
+    и по суммарному числу строк. Работает внутри одного event loop.
+    """
+
+    def __init__(self, max_patients: int, max_rows: int, max_patient_rows: int):
+        self.max_patients = max_patients
+        self.max_rows = max_rows
+        self.max_patient_rows = max_patient_rows
+        self._entries: OrderedDict[str, PatientReadModel] = OrderedDict()
+        self._loading: dict[str, asyncio.Future] = {}
+        self._rows = 0
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    async def get(self, db: AsyncSession, patient_id: str, version: int) -> PatientReadModel | None:
+        """
+        Снимок не старее version. None — история слишком длинная для кэша,
+        обработчик читает из БД как раньше.
+        """
+        entry = self._entries.get(patient_id)
+        if entry is not None and entry.version >= version:
+            self._entries.move_to_end(patient_id)
+            self.hits += 1
+            return None if entry.oversized else entry
+        self.misses += 1
+
+        while (loading := self._loading.get(patient_id)) is not None:
+            self.coalesced += 1
+            try:
+                model = await asyncio.shield(loading)
+            except asyncio.CancelledError:
+                if loading.cancelled():
+                    # Загрузка лидера сорвалась — грузим сами
+                    continue
+                raise
+            if model.version >= version:
+                return None if model.oversized else model
+            break
+
+        return await self._load(db, patient_id, version)
+
+    async def _load(self, db: AsyncSession, patient_id: str, version: int) -> PatientReadModel | None:
+        future = asyncio.get_running_loop().create_future()
+        self._loading[patient_id] = future
+        try:
+            model = await load_patient_read_model(db, patient_id, version, self.max_patient_rows)
+        except BaseException:
+            if self._loading.get(patient_id) is future:
+                del self._loading[patient_id]
+            future.cancel()
+            raise
+
+        self.loads += 1
+        future.set_result(model)
+        # Сброс во время загрузки убирает её из _loading: такой снимок
+        # мог быть прочитан до записи и в кэш не попадает
+        if self._loading.get(patient_id) is future:
+            del self._loading[patient_id]
+            self._store(patient_id, model)
+        return None if model.oversized else model
+
+    def _store(self, patient_id: str, model: PatientReadModel) -> None:
+        self._discard(patient_id)
+        self._entries[patient_id] = model
+        self._rows += model.rows
+        self._bytes += model.approx_bytes
+        while len(self._entries) > self.max_patients or self._rows > self.max_rows:
+            evicted_id = next(iter(self._entries))
+            self._discard(evicted_id)
+            self.evictions += 1
+
+    def _discard(self, patient_id: str) -> None:
+        entry = self._entries.pop(patient_id, None)
+        if entry is not None:
+            self._rows -= entry.rows
+            self._bytes -= entry.approx_bytes
+
+    def invalidate(self, patient_ids: str | Iterable[str]) -> None:
+        """Сбрасывает снимки; вызывать после commit в каждом пути записи."""
+        if isinstance(patient_ids, str):
+            patient_ids = [patient_ids]
+        for patient_id in patient_ids:
+            self._discard(patient_id)
+            self._loading.pop(patient_id, None)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._loading.clear()
+        self._rows = 0
+        self._bytes = 0
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {
+            "patients": len(self._entries),
+            "max_patients": self.max_patients,
+            "rows": self._rows,
+            "max_rows": self.max_rows,
+            "approx_bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+read_model_cache = ReadModelCache(
+    max_patients=settings.read_model.max_patients,
+    max_rows=settings.read_model.max_rows,
+    max_patient_rows=settings.read_model.max_patient_rows,
+)
@@ -0,0 +1,295 @@
+# app/medicines/services/reminder_service.py
+"""
+Напоминания о приёме на стороне сервера.
+
+Один процесс (держатель advisory-блокировки) разворачивает расписания всех
+препаратов на REMINDER_HORIZON_MINUTES вперёд в колесо таймеров
+(core.timing_wheel) и догружает следующую порцию по мере движения
+горизонта. Наступившие приёмы уходят в канал доставки пакетами.
+
+Изменения препаратов подхватываются опросом ленты изменений по водяному
+знаку xid, как /sync/pull (crud.change_feed): изменение, зафиксированное
+не по порядку change_seq, не теряется. Поколение препарата — change_seq
+последнего применённого изменения или удаления: уже загруженные приёмы
+другого поколения при срабатывании отбрасываются, а приёмы по новому
+расписанию загружаются заново. Повторно полученное изменение того же
+поколения пропускается.
+"""
+import abc
+import asyncio
+import bisect
+import json
+import logging
+import time
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, async_sessionmaker
+from app.core.config import ReminderSettings, settings
+from app.core.timing_wheel import TimingWheel
+from app.db.session import db_helper
+from app.medicines.crud import reminders as crud_reminders
+from app.medicines.crud.change_feed import begin_change_snapshot, snapshot_xmin
+from app.medicines.services.schedule import expand_schedules
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = "mai.reminders"
+LEADER_RETRY_SECONDS = 30
+
+
+class ReminderSink(abc.ABC):
+    """Канал доставки: получает пакет напоминаний, ошибка — пакет не доставлен."""
+
+    @abc.abstractmethod
+    async def deliver(self, reminders: list[dict]) -> None:
+        ...
+
+
+class LogSink(ReminderSink):
+    async def deliver(self, reminders: list[dict]) -> None:
+        logger.info(f" Напоминания: {len(reminders)} шт., первое на {reminders[0]['scheduled_time']}")
+
+
+class WebhookSink(ReminderSink):
+    """POST {"reminders": [...]} на URL — заглушка push-сервиса для тестов."""
+
+    def __init__(self, url: str, timeout_seconds: float):
+        self.url = url
+        self.timeout_seconds = timeout_seconds
+
+    def _post(self, body: bytes) -> None:
+        request = urllib.request.Request(
+            self.url, data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout_seconds) as response:
+            response.read()
+
+    async def deliver(self, reminders: list[dict]) -> None:
+        body = json.dumps({"reminders": reminders}).encode()
+        await asyncio.to_thread(self._post, body)
+
+
+def make_sink(config: ReminderSettings) -> ReminderSink:
+    if config.sink == "webhook":
+        return WebhookSink(config.webhook_url, config.webhook_timeout_seconds)
+    if config.sink == "log":
+        return LogSink()
+    raise ValueError(f"Unknown reminder sink: {config.sink}")
+
+
+class ReminderDispatcher:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        engine: AsyncEngine,
+        sink: ReminderSink,
+        config: ReminderSettings,
+    ):
+        self.session_factory = session_factory
+        self.engine = engine
+        self.sink = sink
+        self.config = config
+        self._task: asyncio.Task | None = None
+        self._changed = asyncio.Event()
+        self._wheel: TimingWheel | None = None
+        self._generations: dict[int, int] = {}
+        self._loaded_until: datetime | None = None
+        self._xid = 0
+        self.is_leader = False
+        self.loaded = 0
+        self.fired = 0
+        self.delivered = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.batches = 0
+        self.changes = 0
+        self.max_lag_seconds = 0.0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify_changed(self) -> None:
+        """Препараты изменились в этом процессе — опросить изменения, не дожидаясь интервала."""
+        self._changed.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with self.engine.connect() as lock_conn:
+                    acquired = await lock_conn.scalar(
+                        text("SELECT pg_try_advisory_lock(hashtext(:key))"), {"key": LOCK_KEY}
+                    )
+                    # Блокировка сессионная: переживает commit, снимается при закрытии соединения
+                    await lock_conn.commit()
+                    if acquired:
+                        self.is_leader = True
+                        logger.info(" Диспетчер напоминаний запущен в этом процессе")
+                        await self._serve(lock_conn)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка диспетчера напоминаний: {e}")
+            finally:
+                self.is_leader = False
+                self._wheel = None
+            await asyncio.sleep(LEADER_RETRY_SECONDS)
+
+    async def _serve(self, lock_conn: AsyncConnection) -> None:
+        now = time.time()
+        self._wheel = TimingWheel(start=now, tick_seconds=self.config.tick_seconds)
+        self._generations = {}
+        async with self.session_factory() as db:
+            # Водяной знак до загрузки: изменения во время неё применятся повторно, без потерь
+            self._xid = await snapshot_xmin(db)
+        self._loaded_until = datetime.fromtimestamp(now, timezone.utc)
+        await self._refill()
+
+        horizon = timedelta(minutes=self.config.horizon_minutes)
+        refill = timedelta(minutes=self.config.refill_minutes)
+        next_poll = now + self.config.poll_seconds
+        while True:
+            now = time.time()
+            due = self._wheel.advance(now)
+            if due:
+                await self._fire(due, now)
+
+            if now >= next_poll or self._changed.is_set():
+                self._changed.clear()
+                # Проверка соединения с блокировкой: без неё лидером станет другой процесс
+                await lock_conn.execute(text("SELECT 1"))
+                await lock_conn.commit()
+                await self._apply_changes()
+                next_poll = now + self.config.poll_seconds
+
+            if self._loaded_until < datetime.fromtimestamp(now, timezone.utc) + horizon - refill:
+                await self._refill()
+
+            await asyncio.sleep(self.config.tick_seconds)
+
+    def _schedule(self, rows: list, start: datetime, until: datetime) -> None:
+        """Приёмы препаратов в [start, until) — в колесо с текущим поколением."""
+        for row, doses in zip(rows, expand_schedules(rows, start.date(), until.date())):
+            generation = self._generations.get(row.id, 0)
+            lo, hi = bisect.bisect_left(doses, start), bisect.bisect_left(doses, until)
+            for dose in doses[lo:hi]:
+                self._wheel.add(dose.timestamp(), (row.id, generation, row.patient_id, row.name, dose))
+            self.loaded += hi - lo
+
+    async def _refill(self) -> None:
+        """Догружает приёмы от загруженной границы до now + горизонт, страницами по id."""
+        start = self._loaded_until
+        until = datetime.now(timezone.utc) + timedelta(minutes=self.config.horizon_minutes)
+        after_id = None
+        async with self.session_factory() as db:
+            while True:
+                page = await crud_reminders.get_active_schedules_page(
+                    db, start.date(), until.date(), after_id, self.config.page_size
+                )
+                if not page:
+                    break
+                self._schedule(page, start, until)
+                after_id = page[-1].id
+                if len(page) < self.config.page_size:
+                    break
+        self._loaded_until = until
+
+    async def _apply_changes(self) -> None:
+        """
+        Изменения с change_xid >= водяного знака — все страницы в одном
+        снимке, затем водяной знак сдвигается на xmin этого снимка.
+        """
+        limit = self.config.page_size
+        changed, deleted = [], []
+        async with self.session_factory() as db:
+            xmin = await begin_change_snapshot(db)
+            for fetch, rows in (
+                (crud_reminders.get_schedules_changed_after, changed),
+                (crud_reminders.get_medications_deleted_after, deleted),
+            ):
+                after_key = None
+                while True:
+                    page = await fetch(db, self._xid, after_key, limit)
+                    rows.extend(page)
+                    if len(page) < limit:
+                        break
+                    after_key = (page[-1].change_xid, page[-1].id)
+        self._xid = max(self._xid, xmin)
+
+        # Транзакции, шедшие во время прошлого опроса, приходят повторно
+        changed = [row for row in changed if self._generations.get(row.id) != row.change_seq]
+        deleted = [row for row in deleted if self._generations.get(row.entity_id) != row.change_seq]
+        if not changed and not deleted:
+            return
+
+        for row in changed:
+            self._generations[row.id] = row.change_seq
+        for row in deleted:
+            self._generations[row.entity_id] = row.change_seq
+        deleted_ids = {row.entity_id for row in deleted}
+        self._schedule(
+            [row for row in changed if row.id not in deleted_ids],
+            datetime.now(timezone.utc),
+            self._loaded_until,
+        )
+        self.changes += len(changed) + len(deleted)
+
+    async def _fire(self, due: list, now: float) -> None:
+        reminders = []
+        for medication_id, generation, patient_id, name, dose in due:
+            if self._generations.get(medication_id, 0) != generation:
+                self.cancelled += 1
+                continue
+            self.max_lag_seconds = max(self.max_lag_seconds, now - dose.timestamp())
+            reminders.append({
+                "patient_id": patient_id,
+                "medication_id": medication_id,
+                "medication_name": name,
+                "scheduled_time": dose.isoformat(),
+            })
+        self.fired += len(reminders)
+
+        batch_size = self.config.batch_size
+        for i in range(0, len(reminders), batch_size):
+            batch = reminders[i:i + batch_size]
+            self.batches += 1
+            try:
+                await self.sink.deliver(batch)
+                self.delivered += len(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.error(f"Ошибка доставки напоминаний: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "leader": self.is_leader,
+            "scheduled": len(self._wheel) if self._wheel is not None else 0,
+            "loaded_until": self._loaded_until.isoformat() if self._loaded_until else None,
+            "change_xid": self._xid,
+            "loaded": self.loaded,
+            "fired": self.fired,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "batches": self.batches,
+            "changes": self.changes,
+            "max_lag_seconds": round(self.max_lag_seconds, 3),
+        }
+
+
+reminder_dispatcher = ReminderDispatcher(
+    session_factory=db_helper.session_factory,
+    engine=db_helper.engine,
+    sink=make_sink(settings.reminders),
+    config=settings.reminders,
+)
@@ -0,0 +1,227 @@
+# app/medicines/services/retention_service.py
+"""
+Очистка по сроку хранения пакетами.
+
+Каждая сущность удаляется проходом по возрастанию первичного ключа:
+пакет из RETENTION_BATCH_SIZE строк — отдельная транзакция, между
+пакетами пауза RETENTION_BATCH_SLEEP_SECONDS. Граница срока и последний
+удалённый ключ сохраняются в retention_checkpoints в той же транзакции,
+что и пакет: после сбоя проход продолжается с той же позиции.
+Дочерние строки, удаляемые каскадом, идут отдельной политикой перед
+родительской, чтобы каскад не выходил за размер пакета.
+"""
+import asyncio
+import datetime
+import logging
+import time
+from typing import Any, Callable, NamedTuple
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.auth.models.invitation import InvitationCode
+from app.core.config import settings
+from app.medicines.crud import retention as crud_retention
+from app.medicines.crud.data_version import bump_data_version
+from app.medicines.crud.partitions import intake_default_table
+from app.medicines.models.idempotency import IdempotencyKey
+from app.medicines.models.intake import IntakeHistory
+from app.medicines.models.medication import Medication
+from app.medicines.models.missed_dose import MissedDose
+from app.medicines.models.tombstone import SyncTombstone
+from app.medicines.services.read_model import read_model_cache
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionPolicy(NamedTuple):
+    entity: str
+    table: Any
+    key_columns: tuple
+    retention_days: int
+    predicate: Callable[[datetime.datetime], Any]  # cutoff -> условие WHERE
+    patient_column: Any = None  # для смены версии данных пациента
+    day_aligned: bool = False   # граница по UTC-полуночи
+    # False — позиция по ключу не сохраняется: удалённые строки сами выходят
+    # из предиката, каждый пакет берёт первые оставшиеся
+    keyset: bool = True
+
+    def cutoff(self, now: datetime.datetime) -> datetime.datetime:
+        cutoff = now - datetime.timedelta(days=self.retention_days)
+        if self.day_aligned:
+            cutoff = datetime.datetime.combine(cutoff.date(), datetime.time(), tzinfo=datetime.timezone.utc)
+        return cutoff
+
+
+def retention_policies() -> list[RetentionPolicy]:
+    retention = settings.retention
+    intake = intake_default_table.c
+    return [
+        RetentionPolicy(
+            entity="invitation_codes",
+            table=InvitationCode,
+            key_columns=(InvitationCode.id,),
+            retention_days=retention.invitation_codes_days,
+            predicate=lambda cutoff: or_(InvitationCode.is_used == True, InvitationCode.expires_at < cutoff),
+        ),
+        RetentionPolicy(
+            entity="idempotency_keys",
+            table=IdempotencyKey,
+            key_columns=(IdempotencyKey.user_uuid, IdempotencyKey.key),
+            retention_days=retention.idempotency_keys_days,
+            predicate=lambda cutoff: IdempotencyKey.expires_at < cutoff,
+        ),
+        # Месячные разделы удаляются целиком (crud.partitions); здесь —
+        # только строки, попавшие в default
+        RetentionPolicy(
+            entity="intake_history_default",
+            table=intake_default_table,
+            key_columns=(intake.id,),
+            retention_days=retention.intake_history_days,
+            predicate=lambda cutoff: intake.scheduled_time < cutoff,
+            patient_column=(
+                select(Medication.patient_id)
+                .where(Medication.id == intake.medication_id)
+                .scalar_subquery()
+            ),
+            day_aligned=True,
+        ),
+        # Пропуски хранятся столько же, сколько история приёма
+        RetentionPolicy(
+            entity="missed_doses",
+            table=MissedDose,
+            key_columns=(MissedDose.id,),
+            retention_days=retention.intake_history_days,
+            predicate=lambda cutoff: MissedDose.scheduled_time < cutoff,
+            day_aligned=True,
+        ),
+        # История удаляемых препаратов — своими пакетами до самих препаратов,
+        # иначе она уходила бы каскадом без ограничения в пакете препаратов.
+        # Ключ (medication_id, scheduled_time) — уникальный индекс разделов
+        RetentionPolicy(
+            entity="medication_intake_history",
+            table=IntakeHistory,
+            key_columns=(IntakeHistory.medication_id, IntakeHistory.scheduled_time),
+            retention_days=retention.medications_days,
+            predicate=lambda cutoff: IntakeHistory.medication_id.in_(
+                select(Medication.id).where(Medication.created_at < cutoff)
+            ),
+            patient_column=(
+                select(Medication.patient_id)
+                .where(Medication.id == IntakeHistory.medication_id)
+                .scalar_subquery()
+            ),
+            keyset=False,
+        ),
+        RetentionPolicy(
+            entity="medications",
+            table=Medication,
+            key_columns=(Medication.id,),
+            retention_days=retention.medications_days,
+            predicate=lambda cutoff: Medication.created_at < cutoff,
+            patient_column=Medication.patient_id,
+        ),
+        RetentionPolicy(
+            entity="sync_tombstones",
+            table=SyncTombstone,
+            key_columns=(SyncTombstone.id,),
+            retention_days=settings.sync.tombstone_retention_days,
+            predicate=lambda cutoff: SyncTombstone.deleted_at < cutoff,
+        ),
+    ]
+
+
+# entity -> итоги последнего прохода, для /metrics
+_last_runs: dict[str, dict] = {}
+
+
+async def run_policy(
+    session_factory: async_sessionmaker[AsyncSession],
+    policy: RetentionPolicy,
+    now: datetime.datetime,
+    batch_size: int,
+    sleep_seconds: float,
+) -> dict:
+    """Проход по одной сущности до конца; продолжает незавершённый."""
+    async with session_factory() as session:
+        checkpoint = await crud_retention.get_checkpoint(session, policy.entity)
+        if checkpoint is not None:
+            cutoff, last_key, deleted = checkpoint.cutoff, checkpoint.last_key, checkpoint.deleted_rows
+        else:
+            cutoff, last_key, deleted = policy.cutoff(now), None, 0
+        predicate = policy.predicate(cutoff)
+        backlog = await crud_retention.count_backlog(
+            session, policy.table, policy.key_columns, predicate, last_key
+        )
+
+    run = {
+        "cutoff": cutoff.isoformat(),
+        "resumed": checkpoint is not None,
+        "backlog": backlog,
+        "deleted": 0,
+        "batches": 0,
+    }
+    _last_runs[policy.entity] = run
+    started = time.monotonic()
+
+    while True:
+        async with session_factory() as session:
+            try:
+                last_key, count, patients = await crud_retention.delete_batch(
+                    session, policy.table, policy.key_columns, predicate,
+                    last_key, batch_size, policy.patient_column,
+                )
+                if not policy.keyset:
+                    last_key = None
+                await bump_data_version(session, patients)
+                deleted += count
+                done = count < batch_size
+                if done:
+                    await crud_retention.delete_checkpoint(session, policy.entity)
+                else:
+                    await crud_retention.save_checkpoint(session, policy.entity, cutoff, last_key, deleted)
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+        read_model_cache.invalidate(patients)
+
+        elapsed = time.monotonic() - started
+        run["deleted"] += count
+        run["batches"] += 1
+        run["remaining"] = max(backlog - run["deleted"], 0)
+        run["seconds"] = round(elapsed, 3)
+        run["rows_per_second"] = round(run["deleted"] / elapsed, 1) if elapsed else 0.0
+        if done:
+            run["finished_at"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+            return run
+        logger.info(
+            f" Очистка {policy.entity}: удалено {run['deleted']}, "
+            f"осталось ~{run['remaining']}, {run['rows_per_second']} строк/с"
+        )
+        await asyncio.sleep(sleep_seconds)
+
+
+async def run_retention(
+    session_factory: async_sessionmaker[AsyncSession], now: datetime.datetime
+) -> dict[str, dict]:
+    """
+    Проходы по всем сущностям по очереди; ошибка одной не останавливает
+    остальные. Границы считаются от now — того же, что у архивации.
+    """
+    runs = {}
+    for policy in retention_policies():
+        try:
+            runs[policy.entity] = await run_policy(
+                session_factory,
+                policy,
+                now,
+                settings.retention.batch_size,
+                settings.retention.batch_sleep_seconds,
+            )
+        except Exception as e:
+            # Позиция сохранена последним успешным пакетом
+            logger.error(f"Ошибка очистки {policy.entity}: {e}")
+    return runs
+
+
+def stats() -> dict[str, dict]:
+    return dict(_last_runs)
@@ -0,0 +1,169 @@
+# app/medicines/services/schedule.py
+"""
+Развёртка расписаний препаратов в конкретные моменты приёма (UTC).
+
+Расписание — поля Medication: schedule_type, week_days, interval_days,
+times_per_day, start_date, end_date. Правила:
+- daily: каждый день курса;
+- weekly_days: дни недели из week_days, 0 — понедельник ... 6 — воскресенье;
+- every_x_days: каждые interval_days дней, считая от start_date
+  (interval_days < 1 или NULL — как daily);
+- end_date NULL — курс без окончания; границы курса включительно.
+Время из times_per_day трактуется как UTC, как и scheduled_time в истории.
+
+Пакет препаратов разворачивается за один проход: с NumPy — матрица
+«препарат × день» и векторные маски, без NumPy — арифметика шагов по дням
+без перебора каждого дня.
+"""
+from datetime import date, datetime, time, timezone
+from typing import Any, Sequence
+
+# NumPy необязателен (extra "schedule"): без него работает чисто питоновская ветка.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DAILY = "daily"
+WEEKLY_DAYS = "weekly_days"
+EVERY_X_DAYS = "every_x_days"
+
+_KIND_CODES = {DAILY: 0, WEEKLY_DAYS: 1, EVERY_X_DAYS: 2}
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_SECONDS_PER_DAY = 86400
+
+# Ниже этого размера матрицы «препараты × дни» накладные расходы NumPy
+# больше выигрыша
+VECTORIZE_MIN_CELLS = 4096
+
+
+def _week_mask(week_days: Sequence[int] | None) -> int:
+    mask = 0
+    for day in week_days or ():
+        if 0 <= day <= 6:
+            mask |= 1 << day
+    return mask
+
+
+def _interval(schedule: Any) -> int:
+    interval = schedule.interval_days
+    return interval if interval and interval > 0 else 1
+
+
+def _day_seconds(t: time) -> int:
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+
+def _sorted_times(schedule: Any) -> list[time]:
+    # Микросекунды отбрасываются: расписание задаётся с точностью до секунды
+    return sorted({t.replace(microsecond=0) for t in schedule.times_per_day or ()})
+
+
+def _course_bounds(schedule: Any, first: int, last: int) -> tuple[int, int]:
+    """Пересечение курса с периодом в ординалах дат."""
+    start = max(schedule.start_date.toordinal(), first)
+    end = last if schedule.end_date is None else min(schedule.end_date.toordinal(), last)
+    return start, end
+
+
+def _expand_one(schedule: Any, first: int, last: int) -> list[datetime]:
+    start, end = _course_bounds(schedule, first, last)
+    times = _sorted_times(schedule)
+    if start > end or not times:
+        return []
+
+    kind = schedule.schedule_type
+    if kind == WEEKLY_DAYS:
+        mask = _week_mask(schedule.week_days)
+        # date.fromordinal(1) — понедельник, поэтому день недели = (ord - 1) % 7
+        start_weekday = (start - 1) % 7
+        days = sorted(
+            day
+            for weekday in range(7) if mask >> weekday & 1
+            for day in range(start + (weekday - start_weekday) % 7, end + 1, 7)
+        )
+    elif kind == EVERY_X_DAYS:
+        interval = _interval(schedule)
+        course_start = schedule.start_date.toordinal()
+        days = range(start + (course_start - start) % interval, end + 1, interval)
+    else:
+        days = range(start, end + 1)
+
+    return [
+        datetime.combine(date.fromordinal(day), t, tzinfo=timezone.utc)
+        for day in days
+        for t in times
+    ]
+
+
+def _expand_vectorized(schedules: Sequence[Any], first: int, last: int) -> list[list[datetime]]:
+    n = len(schedules)
+    days = np.arange(first, last + 1, dtype=np.int64)
+
+    starts = np.fromiter((s.start_date.toordinal() for s in schedules), np.int64, n)
+    ends = np.fromiter(
+        (last if s.end_date is None else s.end_date.toordinal() for s in schedules), np.int64, n
+    )
+    kinds = np.fromiter((_KIND_CODES.get(s.schedule_type, 0) for s in schedules), np.int8, n)
+    week_masks = np.fromiter((_week_mask(s.week_days) for s in schedules), np.int64, n)
+    intervals = np.fromiter((_interval(s) for s in schedules), np.int64, n)
+
+    times = [_sorted_times(s) for s in schedules]
+    time_counts = np.fromiter((len(t) for t in times), np.int64, n)
+    time_offsets = np.fromiter(
+        (_day_seconds(t) for group in times for t in group), np.int64, int(time_counts.sum())
+    )
+    time_starts = np.cumsum(time_counts) - time_counts
+
+    # Матрица активных дней: препарат × день
+    grid = days[None, :]
+    active = (grid >= starts[:, None]) & (grid <= ends[:, None])
+    weekday_hit = (week_masks[:, None] >> ((grid - 1) % 7)) & 1 == 1
+    interval_hit = (grid - starts[:, None]) % intervals[:, None] == 0
+    kind = kinds[:, None]
+    active &= np.where(kind == _KIND_CODES[WEEKLY_DAYS], weekday_hit, True)
+    active &= np.where(kind == _KIND_CODES[EVERY_X_DAYS], interval_hit, True)
+
+    # Пары (препарат, день) по строкам, затем каждая пара × её времена
+    med_idx, day_idx = np.nonzero(active)
+    per_pair = time_counts[med_idx]
+    pair_of_dose = np.repeat(np.arange(len(med_idx)), per_pair)
+    dose_med = med_idx[pair_of_dose]
+    within_pair = np.arange(len(pair_of_dose)) - np.repeat(np.cumsum(per_pair) - per_pair, per_pair)
+    seconds = (
+        (days[day_idx[pair_of_dose]] - _EPOCH_ORDINAL) * _SECONDS_PER_DAY
+        + time_offsets[time_starts[dose_med] + within_pair]
+    )
+
+    # Различных моментов мало (дни × типовые времена): объекты datetime
+    # создаются один раз на момент и разделяются между препаратами
+    unique_seconds, inverse = np.unique(seconds, return_inverse=True)
+    unique_stamps = np.array(
+        [
+            stamp.replace(tzinfo=timezone.utc)
+            for stamp in unique_seconds.astype("datetime64[s]").astype(object).tolist()
+        ],
+        dtype=object,
+    )
+    stamps = unique_stamps[inverse]
+
+    split_at = np.cumsum(np.bincount(dose_med, minlength=n)).tolist()
+    return [part.tolist() for part in np.split(stamps, split_at[:-1])]
+
+
+def expand_schedules(
+    schedules: Sequence[Any], date_from: date, date_to: date
+) -> list[list[datetime]]:
+    """
+    Моменты приёма каждого препарата в периоде [date_from, date_to].
+    schedules — объекты с полями расписания Medication (модели или строки
+    select). Возвращает списки по возрастанию времени, в порядке schedules.
+    """
+    first, last = date_from.toordinal(), date_to.toordinal()
+    if last < first or not schedules:
+        return [[] for _ in schedules]
+
+    if np is not None and len(schedules) * (last - first + 1) >= VECTORIZE_MIN_CELLS:
+        return _expand_vectorized(schedules, first, last)
+    return [_expand_one(schedule, first, last) for schedule in schedules]
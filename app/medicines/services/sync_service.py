@@ -0,0 +1,238 @@
+# app/medicines/services/sync_service.py
+
+from datetime import datetime, time
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.auth.models.user import User
+from app.medicines.models.medication import Medication
+from app.medicines.models.intake import IntakeHistory
+from app.medicines.crud.data_version import bump_data_version
+from app.medicines.crud.events import notify_patient_event
+from app.medicines.crud.intake import upsert_intake_stmt
+from app.medicines.services import idempotency_service
+from app.medicines.services.read_model import read_model_cache
+from app.medicines.services.reminder_service import reminder_dispatcher
+from app.medicines.schemas.schemas import (
+    ClientIntakeHistoryUpdate,
+    ClientMedicationUpdate,
+    PushSyncRequest,
+    ensure_utc,
+)
+
+MEDICATION_FORMS = {"tablet", "drop", "spray", "other"}
+SCHEDULE_TYPES = {"daily", "weekly_days", "every_x_days"}
+INTAKE_STATUSES = {"taken", "skipped"}
+# Колонки, перезаписываемые при повторной отправке уже известного приёма
+INTAKE_UPSERT_COLUMNS = ("status", "taken_time", "notes")
+
+
+class SyncItemError(Exception):
+    """Ошибка в отдельном элементе пакета синхронизации."""
+    pass
+
+
+def _medication_values(med: ClientMedicationUpdate) -> dict:
+    if med.form not in MEDICATION_FORMS:
+        raise SyncItemError(f"Invalid form: {med.form}")
+    if med.schedule_type not in SCHEDULE_TYPES:
+        raise SyncItemError(f"Invalid schedule_type: {med.schedule_type}")
+    try:
+        converted_times = [time.fromisoformat(t) for t in med.times_per_day]
+    except ValueError:
+        raise SyncItemError("Invalid times_per_day")
+
+    return {
+        "name": med.name,
+        "form": med.form,
+        "instructions": med.instructions,
+        "start_date": med.start_date,
+        "end_date": med.end_date,
+        "schedule_type": med.schedule_type,
+        "week_days": med.week_days,
+        "interval_days": med.interval_days,
+        "times_per_day": converted_times,
+    }
+
+
+def _intake_values(intake: ClientIntakeHistoryUpdate) -> dict:
+    if intake.status not in INTAKE_STATUSES:
+        raise SyncItemError(f"Invalid status: {intake.status}")
+    return {
+        "status": intake.status,
+        "taken_time": intake.taken_time,
+        "notes": intake.notes,
+    }
+
+
+async def _owned_medication_ids(db: AsyncSession, patient_id: str, ids: set[int]) -> set[int]:
+    if not ids:
+        return set()
+    stmt = select(Medication.id).where(
+        Medication.id.in_(ids),
+        Medication.patient_id == patient_id,
+    )
+    result = await db.execute(stmt)
+    return set(result.scalars().all())
+
+
+async def _owned_intake_ids(db: AsyncSession, patient_id: str, ids: set[int]) -> set[int]:
+    if not ids:
+        return set()
+    stmt = select(IntakeHistory.id).join(Medication).where(
+        IntakeHistory.id.in_(ids),
+        Medication.patient_id == patient_id,
+    )
+    result = await db.execute(stmt)
+    return set(result.scalars().all())
+
+
+async def push_changes(
+    db: AsyncSession,
+    user: User,
+    data: PushSyncRequest,
+    idempotency_key: str | None = None,
+    request_hash: str | None = None,
+) -> dict:
+    """
+    Применяет пакет изменений клиента в одной транзакции:
+    - владение всеми server_id проверяется одним запросом на тип сущности;
+    - создание — многострочным INSERT ... RETURNING, обновление — bulk UPDATE;
+    - один commit на весь пакет.
+    Ошибочные элементы не прерывают пакет и попадают в "errors".
+    С idempotency_key ответ сохраняется в той же транзакции.
+    """
+    response_data = {
+        "medications": [],
+        "intake_history": [],
+        "errors": [],
+    }
+
+    def item_error(entity: str, idx: int, detail: str) -> None:
+        response_data["errors"].append({"entity": entity, "client_id": idx, "detail": detail})
+
+    med_update_ids = {
+        med.server_id for med in data.medications
+        if med.action == "update" and med.server_id is not None
+    }
+    intake_update_ids = {
+        intake.server_id for intake in data.intake_history if intake.server_id is not None
+    }
+    intake_medication_ids = {
+        intake.medication_server_id for intake in data.intake_history if intake.server_id is None
+    }
+
+    owned_medications = await _owned_medication_ids(
+        db, user.uuid, med_update_ids | intake_medication_ids
+    )
+    owned_intakes = await _owned_intake_ids(db, user.uuid, intake_update_ids)
+
+    # Медикаменты
+    med_creates: list[tuple[int, dict]] = []
+    med_updates: list[tuple[int, dict]] = []
+    for idx, med in enumerate(data.medications):
+        try:
+            values = _medication_values(med)
+        except SyncItemError as e:
+            item_error("medication", idx, str(e))
+            continue
+
+        if med.action == "update":
+            if med.server_id is None:
+                item_error("medication", idx, "Cannot update medication without server_id")
+            elif med.server_id not in owned_medications:
+                item_error("medication", idx, f"Medication with id {med.server_id} not found or not owned by user")
+            else:
+                med_updates.append((idx, {"id": med.server_id, **values}))
+        elif med.action == "create":
+            if med.server_id is not None:
+                item_error("medication", idx, "Cannot create medication with existing server_id")
+            else:
+                med_creates.append((idx, {"patient_id": user.uuid, **values}))
+
+    if med_creates:
+        stmt = insert(Medication).returning(Medication.id, sort_by_parameter_order=True)
+        result = await db.execute(stmt, [values for _, values in med_creates])
+        for (idx, _), server_id in zip(med_creates, result.scalars().all()):
+            response_data["medications"].append({"client_id": idx, "server_id": server_id})
+
+    if med_updates:
+        await db.execute(update(Medication), [values for _, values in med_updates])
+        for idx, values in med_updates:
+            response_data["medications"].append({"client_id": idx, "server_id": values["id"]})
+
+    # История приёма
+    intake_creates: list[tuple[int, dict]] = []
+    intake_updates: list[tuple[int, dict]] = []
+    for idx, intake in enumerate(data.intake_history):
+        try:
+            values = _intake_values(intake)
+        except SyncItemError as e:
+            item_error("intake_history", idx, str(e))
+            continue
+
+        if intake.server_id is not None:
+            if intake.server_id not in owned_intakes:
+                item_error("intake_history", idx, f"IntakeHistory with id {intake.server_id} not found or not owned by user")
+            else:
+                intake_updates.append((idx, {"id": intake.server_id, **values}))
+        elif intake.medication_server_id not in owned_medications:
+            item_error("intake_history", idx, f"Medication with id {intake.medication_server_id} not found or not owned by user")
+        else:
+            intake_creates.append((idx, {
+                "medication_id": intake.medication_server_id,
+                "scheduled_time": intake.taken_time,
+                **values,
+            }))
+
+    if intake_creates:
+        # Тот же UPSERT, что и в add_or_update. Повторы одного приёма внутри
+        # пакета схлопываются (побеждает последний) — иначе ON CONFLICT
+        # затронул бы строку дважды в одном операторе.
+        doses: dict[tuple, dict] = {}
+        client_ids: dict[tuple, list[int]] = {}
+        for idx, values in intake_creates:
+            dose = (values["medication_id"], ensure_utc(values["scheduled_time"]))
+            doses[dose] = values
+            client_ids.setdefault(dose, []).append(idx)
+
+        # Строки RETURNING сопоставляются по ключу приёма, а не по позиции:
+        # при executemany SQLAlchemy упорядочивает их по id, а у обновлённой
+        # через ON CONFLICT строки id старый
+        stmt = upsert_intake_stmt(INTAKE_UPSERT_COLUMNS).returning(
+            IntakeHistory.id, IntakeHistory.medication_id, IntakeHistory.scheduled_time
+        )
+        result = await db.execute(stmt, list(doses.values()))
+        for server_id, medication_id, scheduled_time in result.all():
+            for idx in client_ids[(medication_id, ensure_utc(scheduled_time))]:
+                response_data["intake_history"].append({"client_id": idx, "server_id": server_id})
+
+    if intake_updates:
+        await db.execute(update(IntakeHistory), [values for _, values in intake_updates])
+        for idx, values in intake_updates:
+            response_data["intake_history"].append({"client_id": idx, "server_id": values["id"]})
+
+    response_data["medications"].sort(key=lambda item: item["client_id"])
+    response_data["intake_history"].sort(key=lambda item: item["client_id"])
+
+    if med_creates or med_updates or intake_creates or intake_updates:
+        await bump_data_version(db, user.uuid)
+        await notify_patient_event(db, user.uuid, "sync", {
+            "medication_ids": sorted({item["server_id"] for item in response_data["medications"]}),
+            "intake_ids": sorted({item["server_id"] for item in response_data["intake_history"]}),
+        })
+
+    user.last_synced_time = datetime.utcnow()
+    if idempotency_key is not None:
+        await idempotency_service.remember(
+            db, user.uuid, idempotency_key, request_hash, 200, response_data
+        )
+    await db.commit()
+    read_model_cache.invalidate(user.uuid)
+    if med_creates or med_updates:
+        reminder_dispatcher.notify_changed()
+
+    if idempotency_key is not None:
+        idempotency_service.cache_response(
+            user.uuid, idempotency_key, request_hash, 200, response_data
+        )
+    return response_data
@@ -0,0 +1,32 @@
+# app/medicines/tasks/adherence_tasks.py
+import datetime
+import logging
+from app.core.config import settings
+from app.db.session import db_helper
+from app.medicines.crud.analytics import rebuild_daily_adherence
+
+logger = logging.getLogger(__name__)
+
+
+async def rebuild_daily_adherence_job():
+    """
+    Ежедневный пересчёт сводки daily_adherence из intake_history за срок
+    хранения истории: исправляет расхождения, если сводка когда-либо
+    разошлась с историей (ручные правки БД, отключённые триггеры,
+    восстановление из бэкапа). Более старые дни сводки сохраняются.
+    """
+    logger.info("Пересчёт сводки daily_adherence...")
+
+    async with db_helper.session_factory() as session:
+        try:
+            since = (
+                datetime.datetime.now(datetime.timezone.utc)
+                - datetime.timedelta(days=settings.retention.intake_history_days)
+            ).date()
+            rows = await rebuild_daily_adherence(session, since)
+            await session.commit()
+            logger.info(f" Сводка daily_adherence пересчитана: {rows} строк")
+        except Exception as e:
+            logger.error(f"Ошибка в rebuild_daily_adherence_job: {e}")
+            await session.rollback()
+            raise
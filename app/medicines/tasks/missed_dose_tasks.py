@@ -0,0 +1,43 @@
+# app/medicines/tasks/missed_dose_tasks.py
+import datetime
+import logging
+from app.core.config import settings
+from app.db.session import db_helper
+from app.medicines.crud.missed_dose import detect_missed_doses, lock_watermark, set_watermark
+
+logger = logging.getLogger(__name__)
+
+JOB = "missed_doses"
+
+
+async def detect_missed_doses_job():
+    """
+    Поиск пропущенных приёмов за окно от прошлой границы до
+    now - MISSED_DOSE_GRACE_MINUTES (не длиннее MISSED_DOSE_MAX_WINDOW_HOURS).
+    События и новая граница фиксируются одной транзакцией; параллельный
+    запуск в другом процессе пропускает окно, пока строка границы занята.
+    """
+    config = settings.missed_doses
+    now = datetime.datetime.now(datetime.timezone.utc)
+    until = now - datetime.timedelta(minutes=config.grace_minutes)
+
+    async with db_helper.session_factory() as session:
+        try:
+            # Первый запуск не ищет пропуски в прошлом
+            processed_until = await lock_watermark(session, JOB, initial=until)
+            if processed_until is None or processed_until >= until:
+                await session.rollback()
+                return
+
+            window_to = min(until, processed_until + datetime.timedelta(hours=config.max_window_hours))
+            patients = await detect_missed_doses(session, processed_until, window_to)
+            await set_watermark(session, JOB, window_to)
+            await session.commit()
+            logger.info(
+                f" Пропущенные приёмы за {processed_until.isoformat()} — {window_to.isoformat()}: "
+                f"{len(patients)} у {len(set(patients))} пациентов"
+            )
+        except Exception as e:
+            logger.error(f"Ошибка в detect_missed_doses_job: {e}")
+            await session.rollback()
+            raise
@@ -0,0 +1,28 @@
+# app/medicines/tasks/partition_tasks.py
+import logging
+from app.core.config import settings
+from app.db.session import db_helper
+from app.medicines.crud.partitions import ensure_intake_partitions
+
+logger = logging.getLogger(__name__)
+
+
+async def maintain_intake_partitions():
+    """
+    Ежедневно создаёт месячные разделы intake_history на
+    INTAKE_PARTITIONS_AHEAD_MONTHS вперёд. Удаление старых разделов —
+    в cleanup_old_data вместе с остальной очисткой по сроку хранения.
+    """
+    logger.info("Обслуживание разделов intake_history...")
+
+    async with db_helper.session_factory() as session:
+        try:
+            created = await ensure_intake_partitions(
+                session, settings.retention.intake_partitions_ahead_months
+            )
+            await session.commit()
+            logger.info(f" Разделы intake_history созданы: {', '.join(created) or 'нет'}")
+        except Exception as e:
+            logger.error(f"Ошибка в maintain_intake_partitions: {e}")
+            await session.rollback()
+            raise
@@ -0,0 +1,62 @@
+# app/medicines/utils/cursors.py
+import base64
+import json
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+
+class SyncCursor(NamedTuple):
+    change_xid: int | None  # None — курсор старого формата (позиция change_seq)
+    issued_at: datetime
+
+
+def encode_sync_cursor(change_xid: int, issued_at: datetime | None = None) -> str:
+    """Непрозрачный курсор /sync/pull: водяной знак xid и время выдачи."""
+    issued_at = issued_at or datetime.now(timezone.utc)
+    raw = json.dumps({"x": change_xid, "t": int(issued_at.timestamp())}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_sync_cursor(cursor: str) -> SyncCursor:
+    """Разбирает курсор; бросает ValueError для повреждённого значения."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if "x" in data:
+            change_xid = int(data["x"])
+        else:
+            int(data["s"])  # выдан до перехода на водяной знак xid
+            change_xid = None
+        return SyncCursor(
+            change_xid=change_xid,
+            issued_at=datetime.fromtimestamp(int(data["t"]), tz=timezone.utc),
+        )
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid sync cursor") from e
+
+
+def encode_page_cursor(*key) -> str:
+    """Курсор keyset-пагинации: последний ключ сортировки страницы."""
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in key]
+    raw = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_intake_page_cursor(cursor: str) -> tuple[datetime, int]:
+    """Ключ (scheduled_time, id) для истории приёма; ValueError при ошибке."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        scheduled_time, id_ = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(scheduled_time), int(id_)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid page cursor") from e
+
+
+def decode_medication_page_cursor(cursor: str) -> int:
+    """Ключ id для списка препаратов; ValueError при ошибке."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        (id_,) = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return int(id_)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid page cursor") from e
@@ -0,0 +1,65 @@
+# benchmarks/_db.py
+"""
+Общее для бенчмарков с БД: подключение к TEST_DATABASE_URL (PostgreSQL
+с применёнными миграциями) и сессия в транзакции с откатом — данные
+бенчмарка в БД не остаются.
+"""
+import os
+import sys
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+# Все модели через app.db.base, как в alembic/env.py
+import app.db.base  # noqa: F401
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+def require_database() -> str:
+    """DSN или выход с кодом 0: без БД бенчмарк пропускается."""
+    if not TEST_DATABASE_URL:
+        print("TEST_DATABASE_URL не задан — бенчмарк пропущен")
+        sys.exit(0)
+    return TEST_DATABASE_URL
+
+
+@asynccontextmanager
+async def rollback_session(url: str) -> AsyncIterator[AsyncSession]:
+    engine = create_async_engine(url)
+    try:
+        async with engine.connect() as connection:
+            transaction = await connection.begin()
+            session = AsyncSession(
+                bind=connection,
+                join_transaction_mode="create_savepoint",
+                expire_on_commit=False,
+            )
+            try:
+                yield session
+            finally:
+                await session.close()
+                await transaction.rollback()
+    finally:
+        await engine.dispose()
+
+
+class QueryCounter:
+    """Число операторов, отправленных соединением сессии."""
+
+    def __init__(self):
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    @asynccontextmanager
+    async def watch(self, db: AsyncSession) -> AsyncIterator["QueryCounter"]:
+        connection = (await db.connection()).sync_connection
+        self.count = 0
+        event.listen(connection, "before_cursor_execute", self._on_execute)
+        try:
+            yield self
+        finally:
+            event.remove(connection, "before_cursor_execute", self._on_execute)
@@ -0,0 +1,102 @@
+# benchmarks/bench_encoding.py
+"""
+Размер ответа /sync/pull и стоимость кодирования по форматам и сжатию
+(app/core/encoding.py) на синтетической выгрузке пациента.
+
+    python -m benchmarks.bench_encoding --medications 30 --intakes 20000
+
+MessagePack и zstd участвуют, если установлены (pip install ".[wire]").
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from fastapi.encoders import jsonable_encoder
+from app.core.encoding import JSON, available_encodings, available_formats, compress_body, encode_body
+from app.medicines.schemas.schemas import IntakeHistoryResponse, MedicationResponse
+from app.medicines.utils.cursors import encode_sync_cursor
+
+
+def build_payload(medications: int, intakes: int, seed: int = 0) -> dict:
+    """Тело pull_sync: препараты с расписанием и история приёма за последние дни."""
+    rng = random.Random(seed)
+    patient_id = "3f1b6a52-8d0c-4b3e-9a57-2c6e1d4f8a90"
+    start = date(2025, 1, 1)
+    meds = [
+        MedicationResponse(
+            id=1000 + i,
+            patient_id=patient_id,
+            name=f"Препарат {i}",
+            form=rng.choice(["tablet", "drop", "spray"]),
+            instructions=rng.choice([None, "После еды", "Запивать водой"]),
+            start_date=start,
+            end_date=None,
+            schedule_type="daily",
+            week_days=None,
+            interval_days=None,
+            times_per_day=[dtime(8), dtime(20)],
+        )
+        for i in range(medications)
+    ]
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    history = []
+    for i in range(intakes):
+        scheduled = now - timedelta(hours=12 * (i // max(medications, 1)))
+        history.append(IntakeHistoryResponse(
+            id=500000 + i,
+            medication_id=1000 + i % max(medications, 1),
+            scheduled_time=scheduled,
+            taken_time=scheduled + timedelta(minutes=rng.randint(0, 90)),
+            status="taken" if rng.random() < 0.9 else "skipped",
+            notes=None if rng.random() < 0.95 else "Пропустил завтрак",
+        ))
+    return {
+        "medications": meds,
+        "intake_history": history,
+        "deleted": [],
+        "reset": False,
+        "next_cursor": encode_sync_cursor(123456789),
+    }
+
+
+def measure(func, repeat: int) -> float:
+    """Медиана времени вызова, мс."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--medications", type=int, default=30)
+    parser.add_argument("--intakes", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    payload = build_payload(args.medications, args.intakes)
+    # jsonable_encoder выполняется для любого формата — меряется отдельно
+    encoder_ms = measure(lambda: jsonable_encoder(payload), args.repeat)
+    data = jsonable_encoder(payload)
+    json_bytes = len(encode_body(data, JSON))
+
+    print(f"препаратов: {args.medications}, записей истории: {args.intakes}")
+    print(f"jsonable_encoder: {encoder_ms:.1f} мс (общий для всех форматов)\n")
+    print(f"{'формат':<36} {'сжатие':<6} {'байт':>10} {'к JSON':>7} {'кодирование, мс':>16}")
+    for media_type in available_formats():
+        body = encode_body(data, media_type)
+        for encoding in [None, *available_encodings()]:
+            if encoding is None:
+                size = len(body)
+                cost = measure(lambda: encode_body(data, media_type), args.repeat)
+            else:
+                size = len(compress_body(body, encoding))
+                cost = measure(lambda: compress_body(encode_body(data, media_type), encoding), args.repeat)
+            print(f"{media_type:<36} {encoding or '-':<6} {size:>10} {size / json_bytes:>7.2f} {cost:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
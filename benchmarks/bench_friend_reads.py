@@ -0,0 +1,117 @@
+# benchmarks/bench_friend_reads.py
+"""
+Чтение истории приёма мед-другом: число запросов и задержка до и после
+перехода на один JOIN-запрос (crud.intake.get_intake_history_by_patient_id).
+
+«До» — прежний путь: поиск пациента мед-друга, загрузка всех препаратов
+ORM-объектами ради их id и второй запрос IN (...) за полными строками истории.
+«После» — поиск пациента вместе с версией данных (она же даёт 304 без
+выборки) и один запрос intake_history JOIN medications по нужным колонкам.
+
+    TEST_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.bench_friend_reads --intakes 100000
+
+Без TEST_DATABASE_URL бенчмарк пропускается.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from benchmarks._db import QueryCounter, require_database, rollback_session
+from app.auth.crud.friend import get_patient_id_for_current_friend
+from app.auth.models.user import User
+from app.medicines.crud.data_version import get_patient_data_version_for_friend
+from app.medicines.crud.intake import get_intake_history_by_patient_id
+from app.medicines.models.intake import IntakeHistory
+from app.medicines.models.medication import Medication
+
+
+async def seed(db: AsyncSession, medications: int, intakes: int) -> str:
+    """Мед-друг и пациент с medications препаратами и intakes записями истории."""
+    friend, patient = str(uuid.uuid4()), str(uuid.uuid4())
+    await db.execute(insert(User).values(uuid=friend, username=f"bench-{friend}", hash_password="-"))
+    await db.execute(insert(User).values(
+        uuid=patient, username=f"bench-{patient}", hash_password="-", relation_id=friend
+    ))
+    await db.execute(
+        text("""
+            INSERT INTO medications (patient_id, name, form, start_date, schedule_type, times_per_day)
+            SELECT :patient, 'Препарат ' || n, 'tablet', DATE '2024-01-01', 'daily', ARRAY[TIME '08:00', TIME '20:00']
+            FROM generate_series(1, :count) AS n
+        """),
+        {"patient": patient, "count": medications},
+    )
+    # Записи по препаратам по кругу, два приёма в день назад от текущего момента
+    await db.execute(
+        text("""
+            INSERT INTO intake_history (medication_id, scheduled_time, taken_time, status)
+            SELECT m.ids[1 + n % cardinality(m.ids)], at, at + interval '5 minutes', 'taken'
+            FROM (SELECT array_agg(id ORDER BY id) AS ids FROM medications WHERE patient_id = :patient) AS m,
+                 generate_series(0, :count - 1) AS n,
+                 LATERAL (SELECT date_trunc('hour', now()) - (n / cardinality(m.ids)) * interval '12 hours' AS at) AS t
+        """),
+        {"patient": patient, "count": intakes},
+    )
+    await db.execute(text("ANALYZE users, medications, intake_history"))
+    return friend
+
+
+async def legacy_read(db: AsyncSession, friend: str) -> int:
+    """Прежний путь: три запроса, полные ORM-объекты."""
+    patient_id = await get_patient_id_for_current_friend(db, friend)
+    medications = (await db.execute(select(Medication).where(Medication.patient_id == patient_id))).scalars().all()
+    medication_ids = [med.id for med in medications]
+    if not medication_ids:
+        return 0
+    stmt = select(IntakeHistory).where(IntakeHistory.medication_id.in_(medication_ids))
+    return len((await db.execute(stmt)).scalars().all())
+
+
+async def joined_read(db: AsyncSession, friend: str, limit: int | None = None) -> int:
+    """Текущий путь без кэша чтения: версия данных и один JOIN-запрос."""
+    patient_id, _ = await get_patient_data_version_for_friend(db, friend)
+    return len(await get_intake_history_by_patient_id(db, patient_id, limit=limit))
+
+
+async def measure(db: AsyncSession, read, repeat: int) -> tuple[float, int, int]:
+    """Медиана задержки, мс; число запросов и строк одного чтения."""
+    counter = QueryCounter()
+    timings, queries, rows = [], 0, 0
+    for _ in range(repeat):
+        # Без карты идентичности прошлых прогонов: каждый раз строятся новые объекты
+        db.expunge_all()
+        async with counter.watch(db):
+            started = time.perf_counter()
+            rows = await read()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = counter.count
+    return statistics.median(timings), queries, rows
+
+
+async def run(args: argparse.Namespace) -> None:
+    async with rollback_session(require_database()) as db:
+        friend = await seed(db, args.medications, args.intakes)
+        variants = {
+            "до: 3 запроса, ORM-объекты": lambda: legacy_read(db, friend),
+            "после: вся история": lambda: joined_read(db, friend),
+            f"после: страница {args.page}": lambda: joined_read(db, friend, args.page),
+        }
+        print(f"препаратов: {args.medications}, записей истории: {args.intakes}")
+        for name, read in variants.items():
+            elapsed, queries, rows = await measure(db, read, args.repeat)
+            print(f"{name:<30} запросов: {queries}  строк: {rows:>7}  {elapsed:>9.1f} мс")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--medications", type=int, default=20)
+    parser.add_argument("--intakes", type=int, default=100000)
+    parser.add_argument("--page", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
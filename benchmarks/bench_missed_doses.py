@@ -0,0 +1,121 @@
+# benchmarks/bench_missed_doses.py
+"""
+Поиск пропущенных приёмов (crud.missed_dose.detect_missed_doses) на
+100 000 активных препаратов: время одного запуска для окон разной длины.
+Стоимость должна расти с длиной окна, а не с объёмом истории приёма.
+
+Препараты — смесь daily / weekly_days / every_x_days по два приёма в день;
+история — записи о ~80% приёмов за последние --history-days дней.
+Каждое окно считается в точке сохранения с откатом: запуски не видят
+пропусков, записанных предыдущими.
+
+    TEST_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.bench_missed_doses --medications 100000
+
+Без TEST_DATABASE_URL бенчмарк пропускается.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from benchmarks._db import require_database, rollback_session
+from app.medicines.crud.missed_dose import detect_missed_doses
+from app.medicines.models.intake import IntakeHistory
+
+WINDOW_HOURS = (0.25, 1, 6, 24)
+
+
+async def seed(db: AsyncSession, medications: int, per_patient: int, history_days: int) -> None:
+    prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+    patients = max(medications // per_patient, 1)
+    params = {"prefix": prefix, "patients": patients, "medications": medications, "days": history_days}
+    await db.execute(
+        text("""
+            INSERT INTO users (uuid, username, hash_password)
+            SELECT gen_random_uuid()::text, CAST(:prefix AS text) || n, '-'
+            FROM generate_series(1, CAST(:patients AS int)) AS n
+        """),
+        params,
+    )
+    # Времена приёма разнесены по суткам, чтобы в любое окно попадали дозы
+    await db.execute(
+        text("""
+            INSERT INTO medications (
+                patient_id, name, form, start_date, schedule_type,
+                week_days, interval_days, times_per_day, created_at
+            )
+            SELECT p.uuid, 'Препарат ' || n, 'tablet', current_date - 60,
+                   (ARRAY['daily', 'weekly_days', 'every_x_days'])[1 + n % 3],
+                   CASE WHEN n % 3 = 1 THEN ARRAY[0, 2, 4] END,
+                   CASE WHEN n % 3 = 2 THEN 2 END,
+                   ARRAY[make_time((n * 7) % 12, (n * 13) % 60, 0), make_time((n * 7) % 12 + 12, (n * 13) % 60, 0)],
+                   now() - interval '60 days'
+            FROM generate_series(0, CAST(:medications AS int) - 1) AS n
+            JOIN (
+                SELECT uuid, row_number() OVER (ORDER BY uuid) - 1 AS rn
+                FROM users WHERE username LIKE CAST(:prefix AS text) || '%'
+            ) AS p ON p.rn = n % CAST(:patients AS int)
+        """),
+        params,
+    )
+    await db.execute(
+        text("""
+            INSERT INTO intake_history (medication_id, scheduled_time, taken_time, status)
+            SELECT m.id, dose.at, dose.at + interval '10 minutes', 'taken'
+            FROM medications m
+            JOIN users u ON u.uuid = m.patient_id AND u.username LIKE CAST(:prefix AS text) || '%'
+            CROSS JOIN LATERAL generate_series(current_date - CAST(:days AS int), current_date, interval '1 day') AS day(value)
+            CROSS JOIN LATERAL unnest(m.times_per_day) AS tod(value)
+            CROSS JOIN LATERAL (SELECT (CAST(day.value AS date) + tod.value) AT TIME ZONE 'UTC' AS at) AS dose
+            WHERE dose.at < now() AND random() < 0.8
+        """),
+        params,
+    )
+    await db.execute(text("ANALYZE users, medications, intake_history, missed_doses"))
+
+
+async def measure_window(db: AsyncSession, window_from: datetime, window_to: datetime, repeat: int) -> tuple[float, int]:
+    """Медиана времени запуска, мс, и число найденных пропусков."""
+    timings, found = [], 0
+    for _ in range(repeat):
+        savepoint = await db.begin_nested()
+        started = time.perf_counter()
+        found = len(await detect_missed_doses(db, window_from, window_to))
+        timings.append((time.perf_counter() - started) * 1000)
+        await savepoint.rollback()
+    return statistics.median(timings), found
+
+
+async def run(args: argparse.Namespace) -> None:
+    async with rollback_session(require_database()) as db:
+        started = time.perf_counter()
+        await seed(db, args.medications, args.per_patient, args.history_days)
+        history = (await db.execute(select(func.count()).select_from(IntakeHistory))).scalar_one()
+        print(
+            f"препаратов: {args.medications}, записей истории: {history}, "
+            f"подготовка: {time.perf_counter() - started:.1f} с"
+        )
+
+        # Окна заканчиваются там же, где у задачи: now - MISSED_DOSE_GRACE_MINUTES
+        window_to = datetime.now(timezone.utc) - timedelta(minutes=args.grace_minutes)
+        print(f"{'окно, ч':>8} {'пропусков':>10} {'запуск, мс':>11} {'мс на час окна':>15}")
+        for hours in WINDOW_HOURS:
+            elapsed, found = await measure_window(db, window_to - timedelta(hours=hours), window_to, args.repeat)
+            print(f"{hours:>8} {found:>10} {elapsed:>11.1f} {elapsed / hours:>15.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--medications", type=int, default=100000)
+    parser.add_argument("--per-patient", type=int, default=10)
+    parser.add_argument("--history-days", type=int, default=7)
+    parser.add_argument("--grace-minutes", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/bench_schedule.py
+"""
+Развёртка расписаний (services.schedule.expand_schedules): пакет препаратов
+за период — векторная ветка (NumPy), питоновская ветка и наивный перебор
+каждого дня, как делают клиенты. Результаты всех трёх сверяются.
+
+    python -m benchmarks.bench_schedule --medications 1000 --days 365
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from types import SimpleNamespace
+from app.medicines.services import schedule as schedule_service
+
+
+def build_schedules(count: int, date_from: date, days: int, seed: int = 0) -> list[SimpleNamespace]:
+    """Смесь типов расписания; часть курсов начинается или кончается внутри периода."""
+    rng = random.Random(seed)
+    schedules = []
+    for i in range(count):
+        kind = rng.choice([schedule_service.DAILY, schedule_service.WEEKLY_DAYS, schedule_service.EVERY_X_DAYS])
+        start = date_from + timedelta(days=rng.randint(-days, days // 2))
+        end = None if rng.random() < 0.6 else start + timedelta(days=rng.randint(7, days))
+        schedules.append(SimpleNamespace(
+            id=i,
+            schedule_type=kind,
+            start_date=start,
+            end_date=end,
+            week_days=sorted(rng.sample(range(7), rng.randint(1, 4))) if kind == schedule_service.WEEKLY_DAYS else None,
+            interval_days=rng.randint(2, 5) if kind == schedule_service.EVERY_X_DAYS else None,
+            times_per_day=sorted(dtime(h) for h in rng.sample(range(6, 23), rng.randint(1, 3))),
+        ))
+    return schedules
+
+
+def expand_naive(schedules, date_from: date, date_to: date) -> list[list[datetime]]:
+    """Перебор каждого дня периода для каждого препарата."""
+    result = []
+    for s in schedules:
+        doses = []
+        day = max(s.start_date, date_from)
+        end = date_to if s.end_date is None else min(s.end_date, date_to)
+        interval = s.interval_days if s.interval_days and s.interval_days > 0 else 1
+        while day <= end:
+            if (
+                s.schedule_type == schedule_service.DAILY
+                or (s.schedule_type == schedule_service.WEEKLY_DAYS and day.weekday() in (s.week_days or ()))
+                or (s.schedule_type == schedule_service.EVERY_X_DAYS and (day - s.start_date).days % interval == 0)
+            ):
+                doses.extend(datetime.combine(day, t, tzinfo=timezone.utc) for t in s.times_per_day)
+            day += timedelta(days=1)
+        result.append(doses)
+    return result
+
+
+def measure(func, repeat: int) -> tuple[float, object]:
+    """Медиана времени вызова, мс, и результат последнего вызова."""
+    timings, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--medications", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    date_from = date(2026, 1, 1)
+    date_to = date_from + timedelta(days=args.days - 1)
+    schedules = build_schedules(args.medications, date_from, args.days)
+    first, last = date_from.toordinal(), date_to.toordinal()
+
+    variants = {
+        "наивный перебор дней": lambda: expand_naive(schedules, date_from, date_to),
+        "питоновская ветка": lambda: [schedule_service._expand_one(s, first, last) for s in schedules],
+    }
+    if schedule_service.np is not None:
+        variants["векторная ветка (NumPy)"] = lambda: schedule_service._expand_vectorized(schedules, first, last)
+    else:
+        print("NumPy не установлен: векторная ветка пропущена")
+
+    print(f"препаратов: {args.medications}, дней: {args.days}")
+    reference = None
+    for name, func in variants.items():
+        elapsed, result = measure(func, args.repeat)
+        doses = sum(map(len, result))
+        if reference is None:
+            reference = result
+        assert result == reference, f"{name}: результат расходится с наивным перебором"
+        print(f"{name:<26} {elapsed:>9.1f} мс  {doses} приёмов")
+
+
+if __name__ == "__main__":
+    main()
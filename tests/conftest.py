@@ -0,0 +1,12 @@
+# tests/conftest.py
+import pytest
+
+# Все модели через app.db.base, как в alembic/env.py: модули моделей
+# ссылаются друг на друга и по отдельности не импортируются
+import app.db.base  # noqa: F401
+
+
+@pytest.fixture
+def anyio_backend():
+    # Асинхронные тесты (pytest.mark.anyio) — только на asyncio, как приложение
+    return "asyncio"
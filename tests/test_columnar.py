@@ -0,0 +1,88 @@
+# tests/test_columnar.py
+import json
+from datetime import date, datetime, time, timedelta, timezone
+import pytest
+from app.core import columnar
+
+COLUMNS = ("patient_id", "id", "scheduled_time", "day", "at", "notes")
+
+
+def make_rows() -> list[dict]:
+    base = datetime(2026, 3, 1, 9, tzinfo=timezone.utc)
+    rows = []
+    for i, patient_id in enumerate(["a", "a", "b", "b", "b", "b", "c", "e"]):
+        rows.append({
+            "patient_id": patient_id,
+            "id": i,
+            "scheduled_time": base + timedelta(hours=i),
+            "day": date(2026, 3, 1 + i),
+            "at": time(8, i),
+            "notes": None if i % 2 else f"заметка {i}",
+        })
+    return rows
+
+
+def write(tmp_path, rows, row_group_size=3, meta=None) -> tuple:
+    path = tmp_path / "archive" / "intakes.mcol"
+    writer = columnar.ColumnarWriter(path, COLUMNS, "patient_id", row_group_size, meta)
+    for row in rows:
+        writer.append(row)
+        if writer.full:
+            writer.flush()
+    manifest = writer.close()
+    return path, path.with_name(path.name + columnar.MANIFEST_SUFFIX), manifest
+
+
+def test_scan_round_trips_rows_and_types_across_row_groups(tmp_path):
+    rows = make_rows()
+    _, manifest_path, manifest = write(tmp_path, rows)
+
+    # Ключ "b" лежит в двух группах: [a, a, b] и [b, b, b]
+    assert [group["rows"] for group in manifest["row_groups"]] == [3, 3, 2]
+    for key in ("a", "b", "c", "e"):
+        assert list(columnar.scan(manifest_path, key)) == [row for row in rows if row["patient_id"] == key]
+
+
+def test_scan_missing_key_returns_nothing(tmp_path):
+    _, manifest_path, _ = write(tmp_path, make_rows())
+    assert list(columnar.scan(manifest_path, "d")) == []
+    assert list(columnar.scan(manifest_path, "z")) == []
+
+
+def test_scan_reads_only_requested_columns(tmp_path):
+    rows = make_rows()
+    _, manifest_path, _ = write(tmp_path, rows)
+    assert list(columnar.scan(manifest_path, "b", columns=["id", "scheduled_time"])) == [
+        {"id": row["id"], "scheduled_time": row["scheduled_time"]} for row in rows if row["patient_id"] == "b"
+    ]
+
+
+def test_close_writes_manifest_and_replaces_temporary_files(tmp_path):
+    path, manifest_path, manifest = write(tmp_path, make_rows(), meta={"entity": "intake_history"})
+    assert path.exists() and manifest_path.exists()
+    assert sorted(p.name for p in path.parent.iterdir()) == [path.name, manifest_path.name]
+    assert json.loads(manifest_path.read_text()) == manifest
+    assert manifest["entity"] == "intake_history"
+    assert manifest["rows"] == 8
+    assert manifest["types"] == {"scheduled_time": "datetime", "day": "date", "at": "time"}
+    assert columnar.data_path(manifest_path) == path
+
+
+def test_abort_leaves_no_files(tmp_path):
+    path = tmp_path / "intakes.mcol"
+    writer = columnar.ColumnarWriter(path, COLUMNS, "patient_id", 3)
+    writer.append(make_rows()[0])
+    writer.flush()
+    writer.abort()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_rejects_unknown_format_and_foreign_file(tmp_path):
+    path, manifest_path, manifest = write(tmp_path, make_rows())
+    path.write_bytes(b"not an archive")
+    with pytest.raises(ValueError):
+        list(columnar.scan(manifest_path, "a"))
+
+    manifest_path.write_text(json.dumps({**manifest, "format": columnar.FORMAT_VERSION + 1}))
+    with pytest.raises(ValueError):
+        columnar.read_manifest(manifest_path)
@@ -0,0 +1,128 @@
+# tests/test_credential_cache.py
+"""
+Кэш проверенных учётных данных живёт в каждом воркере отдельно; два
+экземпляра CredentialCache здесь — два воркера uvicorn. Тесты с БД
+пропускаются без TEST_DATABASE_URL.
+"""
+import os
+import uuid
+import pytest
+from sqlalchemy import inspect, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from app.auth.api.auth import login
+from app.auth.crud.user import bump_token_version
+from app.auth.models.user import User
+from app.auth.schemas.auth import UserLoginRequest
+from app.auth.utils.password import hash_password
+from app.core import security
+from app.core.credential_cache import CredentialCache
+from app.core.tokens import decode_token
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+PASSWORD = "secret-password"
+
+pytestmark = pytest.mark.anyio
+requires_db = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL не задан")
+
+
+def make_workers() -> tuple[CredentialCache, CredentialCache]:
+    return CredentialCache(max_size=16, ttl_seconds=60), CredentialCache(max_size=16, ttl_seconds=60)
+
+
+def make_user(token_version: int = 0) -> User:
+    return User(
+        uuid=str(uuid.uuid4()), username="patient", hash_password="-",
+        relation_id=None, token_version=token_version,
+    )
+
+
+async def test_snapshot_of_other_worker_does_not_carry_token_version():
+    worker_a, worker_b = make_workers()
+    user = make_user(token_version=0)
+    worker_a.store(user, PASSWORD)
+    worker_b.store(user, PASSWORD)
+
+    # logout в воркере A сбрасывает только его кэш
+    worker_a.invalidate(user.uuid)
+    assert worker_a.lookup(user.uuid, PASSWORD) is None
+    cached = worker_b.lookup(user.uuid, PASSWORD)
+    assert cached is not None
+
+    attached = await cached.attach(AsyncSession())
+    assert attached.uuid == user.uuid
+    assert {"token_version", "relation_id"} <= inspect(attached).unloaded
+
+
+def test_cached_entry_keeps_only_authentication_fields():
+    cache, _ = make_workers()
+    user = make_user()
+    cache.store(user, PASSWORD)
+    cached = cache.lookup(user.uuid, PASSWORD)
+    assert not hasattr(cached, "__dict__")
+    assert (cached.uuid, cached.username) == (user.uuid, user.username)
+    assert cache.lookup(user.uuid, "other-password") is None
+
+
+@pytest.fixture
+async def db():
+    engine = create_async_engine(TEST_DATABASE_URL)
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        session = AsyncSession(
+            bind=connection,
+            join_transaction_mode="create_savepoint",
+            expire_on_commit=False,
+        )
+        try:
+            yield session
+        finally:
+            await session.close()
+            await transaction.rollback()
+    await engine.dispose()
+
+
+@requires_db
+async def test_login_in_other_worker_mints_current_token_version(db, monkeypatch):
+    worker_a, worker_b = make_workers()
+    user_uuid = str(uuid.uuid4())
+    await db.execute(insert(User).values(
+        uuid=user_uuid, username=f"cache-{user_uuid}", hash_password=hash_password(PASSWORD)
+    ))
+
+    # Воркер B проверил пароль до logout и держит запись в кэше
+    monkeypatch.setattr(security, "credential_cache", worker_b)
+    tokens = await login(UserLoginRequest(uuid=user_uuid, password=PASSWORD), db)
+    assert decode_token(tokens.access_token, "access")["ver"] == 0
+    assert worker_b.lookup(user_uuid, PASSWORD) is not None
+
+    # logout в воркере A
+    version = await bump_token_version(db, user_uuid)
+    worker_a.invalidate(user_uuid)
+    db.expunge_all()
+
+    tokens = await login(UserLoginRequest(uuid=user_uuid, password=PASSWORD), db)
+    assert worker_b.stats()["hits"] >= 1
+    assert decode_token(tokens.access_token, "access")["ver"] == version
+    assert decode_token(tokens.refresh_token, "refresh")["ver"] == version
+
+
+@requires_db
+async def test_cached_user_reads_relation_id_explicitly(db, monkeypatch):
+    cache, _ = make_workers()
+    friend, patient = str(uuid.uuid4()), str(uuid.uuid4())
+    await db.execute(insert(User).values(uuid=friend, username=f"cache-{friend}", hash_password="-"))
+    await db.execute(insert(User).values(
+        uuid=patient, username=f"cache-{patient}", hash_password=hash_password(PASSWORD)
+    ))
+    monkeypatch.setattr(security, "credential_cache", cache)
+    await security.authenticate_user(db, patient, PASSWORD)
+
+    # Мед-друг привязан после того, как запись попала в кэш
+    await db.execute(update(User).where(User.uuid == patient).values(relation_id=friend))
+    db.expunge_all()
+
+    user = await security.authenticate_user(db, patient, PASSWORD)
+    assert cache.stats()["hits"] == 1
+    assert "relation_id" in inspect(user).unloaded
+    await db.refresh(user, ["relation_id"])
+    assert user.relation_id == friend
@@ -0,0 +1,93 @@
+# tests/test_cursors.py
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi import HTTPException
+from app.core.config import settings
+from app.medicines.api.sync import _parse_cursor
+from app.medicines.utils.cursors import (
+    decode_intake_page_cursor,
+    decode_medication_page_cursor,
+    decode_sync_cursor,
+    encode_page_cursor,
+    encode_sync_cursor,
+)
+
+
+def raw_cursor(data) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+
+def test_sync_cursor_round_trip_keeps_xid_and_second_precision():
+    issued_at = datetime(2026, 3, 1, 12, 30, 15, 999999, tzinfo=timezone.utc)
+    cursor = encode_sync_cursor(123456789, issued_at)
+    assert "=" not in cursor
+    decoded = decode_sync_cursor(cursor)
+    assert decoded.change_xid == 123456789
+    assert decoded.issued_at == issued_at.replace(microsecond=0)
+
+
+def test_sync_cursor_defaults_issued_at_to_now():
+    before = datetime.now(timezone.utc).replace(microsecond=0)
+    decoded = decode_sync_cursor(encode_sync_cursor(7))
+    assert before <= decoded.issued_at <= datetime.now(timezone.utc)
+
+
+def test_legacy_change_seq_cursor_decodes_without_xid():
+    decoded = decode_sync_cursor(raw_cursor({"s": 42, "t": 1767225600}))
+    assert decoded.change_xid is None
+    assert decoded.issued_at == datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "!!!",
+    "bm90LWpzb24",
+    raw_cursor([1, 2]),
+    raw_cursor({"x": 1}),
+    raw_cursor({"x": "abc", "t": 1}),
+    raw_cursor({"s": None, "t": 1}),
+    raw_cursor({"t": 1}),
+])
+def test_invalid_sync_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_sync_cursor(cursor)
+
+
+def test_parse_cursor_accepts_fresh_cursor():
+    assert _parse_cursor(None) == (None, False)
+    assert _parse_cursor(encode_sync_cursor(99)) == (99, False)
+
+
+def test_parse_cursor_resets_legacy_and_expired_cursors():
+    legacy = raw_cursor({"s": 42, "t": int(datetime.now(timezone.utc).timestamp())})
+    assert _parse_cursor(legacy) == (None, True)
+
+    expired_at = datetime.now(timezone.utc) - timedelta(days=settings.sync.tombstone_retention_days, minutes=1)
+    assert _parse_cursor(encode_sync_cursor(99, expired_at)) == (None, True)
+
+
+def test_parse_cursor_rejects_invalid_cursor_with_400():
+    with pytest.raises(HTTPException) as error:
+        _parse_cursor("!!!")
+    assert error.value.status_code == 400
+
+
+def test_page_cursors_round_trip():
+    scheduled_time = datetime(2026, 3, 1, 9, tzinfo=timezone.utc)
+    assert decode_intake_page_cursor(encode_page_cursor(scheduled_time, 17)) == (scheduled_time, 17)
+    assert decode_medication_page_cursor(encode_page_cursor(17)) == 17
+
+
+@pytest.mark.parametrize("decode, cursor", [
+    (decode_intake_page_cursor, raw_cursor(["not-a-date", 1])),
+    (decode_intake_page_cursor, raw_cursor([1])),
+    (decode_intake_page_cursor, encode_page_cursor(17)),
+    (decode_medication_page_cursor, raw_cursor(["x"])),
+    (decode_medication_page_cursor, raw_cursor([1, 2])),
+    (decode_medication_page_cursor, "!!!"),
+])
+def test_invalid_page_cursor_raises_value_error(decode, cursor):
+    with pytest.raises(ValueError):
+        decode(cursor)
@@ -0,0 +1,109 @@
+# tests/test_event_stream.py
+import json
+import pytest
+from app.core.config import EventStreamSettings
+from app.medicines.crud.events import RELATION_CHANGED
+from app.medicines.services.event_stream import (
+    OVERFLOW_EVENT,
+    RESYNC_EVENT,
+    REVOKED_EVENT,
+    EventBroker,
+    format_event,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def make_broker(**config) -> EventBroker:
+    # Без start(): события подаются напрямую, как от LISTEN
+    return EventBroker("postgresql://localhost/unused", EventStreamSettings(**config))
+
+
+def notify(broker: EventBroker, patient_id: str, event_type: str, data: dict | None = None) -> None:
+    payload = json.dumps({"patient_id": patient_id, "type": event_type, "data": data or {}})
+    broker._on_notify(None, 0, "channel", payload)
+
+
+async def allowed() -> bool:
+    return True
+
+
+async def denied() -> bool:
+    return False
+
+
+async def open_stream(broker: EventBroker, patient_id: str, authorize=allowed):
+    """Поток, прочитанный до события ready."""
+    stream = broker.stream(patient_id, authorize)
+    assert (await anext(stream)).startswith("retry:")
+    assert await anext(stream) == format_event("ready", {"patient_id": patient_id})
+    return stream
+
+
+async def test_subscription_is_created_on_first_read_and_released_on_close():
+    broker = make_broker()
+    stream = broker.stream("p", allowed)
+    # Клиент ушёл до первого байта: генератор не запускался, подписки нет
+    assert broker.stats()["subscribers"] == 0
+    await stream.aclose()
+    assert broker.stats()["subscribers"] == 0
+
+    stream = await open_stream(broker, "p")
+    assert broker.stats()["subscribers"] == 1
+    await stream.aclose()
+    assert broker.stats()["subscribers"] == 0
+
+
+async def test_events_are_delivered_to_patient_subscribers():
+    broker = make_broker()
+    stream = await open_stream(broker, "p")
+    notify(broker, "other", "intake", {"id": 1})
+    notify(broker, "p", "intake", {"id": 2})
+    assert await anext(stream) == format_event("intake", {"id": 2})
+    await stream.aclose()
+
+
+async def test_relation_change_closes_patient_streams():
+    broker = make_broker()
+    streams = [await open_stream(broker, "p"), await open_stream(broker, "p")]
+    other = await open_stream(broker, "other")
+
+    notify(broker, "p", RELATION_CHANGED)
+    for stream in streams:
+        assert await anext(stream) == REVOKED_EVENT
+        with pytest.raises(StopAsyncIteration):
+            await anext(stream)
+    assert broker.stats()["subscribers"] == 1
+    await other.aclose()
+
+
+async def test_resync_rechecks_authorization():
+    broker = make_broker()
+    linked = await open_stream(broker, "p", allowed)
+    unlinked = await open_stream(broker, "p", denied)
+
+    broker._broadcast(RESYNC_EVENT)
+    assert await anext(linked) == RESYNC_EVENT
+    assert await anext(unlinked) == REVOKED_EVENT
+    with pytest.raises(StopAsyncIteration):
+        await anext(unlinked)
+    assert broker.stats()["subscribers"] == 1
+    await linked.aclose()
+
+
+async def test_slow_consumer_gets_overflow():
+    broker = make_broker(queue_size=2)
+    stream = await open_stream(broker, "p")
+    for i in range(3):
+        notify(broker, "p", "intake", {"id": i})
+    assert await anext(stream) == OVERFLOW_EVENT
+    assert broker.stats()["dropped_subscribers"] == 1
+    assert broker.stats()["subscribers"] == 0
+
+
+async def test_stream_beyond_capacity_ends_with_overflow():
+    broker = make_broker(max_subscribers=1)
+    stream = await open_stream(broker, "p")
+    assert broker.full
+    assert [message async for message in broker.stream("p", allowed)] == [OVERFLOW_EVENT]
+    await stream.aclose()
@@ -0,0 +1,69 @@
+# tests/test_idempotency.py
+"""
+Сохранение ответов по Idempotency-Key. Нужна PostgreSQL с применёнными
+миграциями; без TEST_DATABASE_URL тесты пропускаются.
+"""
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from app.auth.models.user import User
+from app.medicines.crud import idempotency as crud_idempotency
+from app.medicines.services import idempotency_service
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = [
+    pytest.mark.anyio,
+    pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL не задан"),
+]
+
+
+@pytest.fixture
+async def db():
+    engine = create_async_engine(TEST_DATABASE_URL)
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        session = AsyncSession(
+            bind=connection,
+            join_transaction_mode="create_savepoint",
+            expire_on_commit=False,
+        )
+        try:
+            yield session
+        finally:
+            await session.close()
+            await transaction.rollback()
+    await engine.dispose()
+
+
+@pytest.fixture
+async def user_uuid(db):
+    user_uuid = str(uuid.uuid4())
+    await db.execute(insert(User).values(uuid=user_uuid, username=f"idem-{user_uuid}", hash_password="-"))
+    return user_uuid
+
+
+async def test_expired_key_is_replaced(db, user_uuid):
+    # Запись истекла, но retention её ещё не удалил
+    expired_at = datetime.now(timezone.utc) - timedelta(minutes=1)
+    assert await crud_idempotency.add_idempotency_key(db, user_uuid, "key", "old", 200, {"old": True}, expired_at)
+    assert await crud_idempotency.get_idempotency_key(db, user_uuid, "key") is None
+
+    await idempotency_service.remember(db, user_uuid, "key", "new", 200, {"new": True})
+    await db.commit()
+
+    record = await crud_idempotency.get_idempotency_key(db, user_uuid, "key")
+    assert (record.request_hash, record.response) == ("new", {"new": True})
+    assert record.expires_at > datetime.now(timezone.utc)
+
+
+async def test_live_key_is_not_overwritten(db, user_uuid):
+    await idempotency_service.remember(db, user_uuid, "key", "first", 200, {"first": True})
+    with pytest.raises(idempotency_service.IdempotencyKeyInUse):
+        await idempotency_service.remember(db, user_uuid, "key", "second", 200, {"second": True})
+
+    record = await crud_idempotency.get_idempotency_key(db, user_uuid, "key")
+    assert record.request_hash == "first"
@@ -0,0 +1,346 @@
+# tests/test_query_plans.py
+"""
+Регрессия планов запросов: каждый запрос app/*/crud и app/medicines/api/sync.py
+выполняется на тестовой БД, затем для него снимается EXPLAIN при
+enable_seqscan = off. Seq Scan по большой таблице при таком запрете значит,
+что подходящего индекса нет вовсе — на малых тестовых данных планировщик
+иначе выбрал бы его и при наличии индекса.
+
+Нужна PostgreSQL с применёнными миграциями (alembic upgrade head):
+    TEST_DATABASE_URL=postgresql+asyncpg://... pytest tests/test_query_plans.py
+Без TEST_DATABASE_URL тесты пропускаются. Всё выполняется в одной транзакции
+с откатом — commit внутри crud фиксирует лишь точку сохранения.
+DDL разделов (ensure/drop_expired_intake_partitions) не проверяется.
+"""
+import json
+import os
+import uuid
+from datetime import datetime, time, timedelta, timezone
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import event, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from app.auth.crud import friend as crud_friend
+from app.auth.crud import invitation as crud_invitation
+from app.auth.crud import user as crud_user
+from app.auth.models.invitation import InvitationCode
+from app.auth.models.user import User
+from app.medicines.api.sync import _intake_history_query, _medications_query
+from app.medicines.crud import analytics as crud_analytics
+from app.medicines.crud import archive as crud_archive
+from app.medicines.crud import data_version as crud_data_version
+from app.medicines.crud import idempotency as crud_idempotency
+from app.medicines.crud import intake as crud_intake
+from app.medicines.crud import medication as crud_medication
+from app.medicines.crud import missed_dose as crud_missed_dose
+from app.medicines.crud import reminders as crud_reminders
+from app.medicines.crud import retention as crud_retention
+from app.medicines.crud import tombstone as crud_tombstone
+from app.medicines.crud.change_feed import snapshot_xmin
+from app.medicines.crud.events import notify_patient_event
+from app.medicines.crud.partitions import DEFAULT_PARTITION, PARENT, PARTITION_NAME, list_intake_partitions
+from app.medicines.models.intake import IntakeHistory
+from app.medicines.models.medication import Medication
+from app.medicines.models.missed_dose import MissedDose
+from app.medicines.models.tombstone import SyncTombstone
+from app.medicines.services.retention_service import retention_policies
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = [
+    pytest.mark.anyio,
+    pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL не задан"),
+]
+
+# Таблицы, растущие с числом пользователей; разделы intake_history сводятся к родителю
+LARGE_TABLES = frozenset({
+    "users", "medications", "intake_history", "sync_tombstones",
+    "invitation_codes", "idempotency_keys", "missed_doses", "daily_adherence",
+})
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+TODAY = NOW.date()
+
+
+def _table_of(relation: str) -> str:
+    if relation == DEFAULT_PARTITION or PARTITION_NAME.match(relation):
+        return PARENT
+    return relation
+
+
+def _seq_scans(plan: dict) -> set[str]:
+    found = set()
+    if plan["Node Type"] == "Seq Scan":
+        found.add(_table_of(plan["Relation Name"]))
+    for child in plan.get("Plans", ()):
+        found |= _seq_scans(child)
+    return found
+
+
+async def explain_calls(db: AsyncSession, call) -> dict[str, set[str]]:
+    """
+    Выполняет call(db), перехватывая его SQL, и возвращает
+    {оператор: большие таблицы, читаемые Seq Scan}.
+    """
+    connection = await db.connection()
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().split(None, 1)[0].upper() in EXPLAINABLE:
+            statements.append((statement, parameters))
+
+    event.listen(connection.sync_connection, "before_cursor_execute", capture)
+    try:
+        await call(db)
+    finally:
+        event.remove(connection.sync_connection, "before_cursor_execute", capture)
+    assert statements, "вызов не выполнил ни одного запроса"
+
+    scans = {}
+    for statement, parameters in statements:
+        result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        document = result.scalar_one()
+        if isinstance(document, str):
+            document = json.loads(document)
+        scans[statement] = _seq_scans(document[0]["Plan"]) & LARGE_TABLES
+    return scans
+
+
+@pytest.fixture
+async def db():
+    engine = create_async_engine(TEST_DATABASE_URL)
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        await connection.execute(text("SET LOCAL enable_seqscan = off"))
+        session = AsyncSession(
+            bind=connection,
+            join_transaction_mode="create_savepoint",
+            expire_on_commit=False,
+        )
+        try:
+            yield session
+        finally:
+            await session.close()
+            await transaction.rollback()
+    await engine.dispose()
+
+
+@pytest.fixture
+async def seed(db):
+    """Пациент с мед-другом, препарат, приём, пропуск, след удаления, код и ключ."""
+    friend, patient = str(uuid.uuid4()), str(uuid.uuid4())
+    await db.execute(insert(User).values(uuid=friend, username=f"plan-{friend}", hash_password="-"))
+    await db.execute(insert(User).values(
+        uuid=patient, username=f"plan-{patient}", hash_password="-", relation_id=friend
+    ))
+    medication_id = (await db.execute(
+        insert(Medication)
+        .values(
+            patient_id=patient, name="plan", form="tablet", start_date=TODAY - timedelta(days=7),
+            schedule_type="daily", times_per_day=[time(9)],
+        )
+        .returning(Medication.id)
+    )).scalar_one()
+    scheduled_time = datetime.combine(TODAY, time(9), tzinfo=timezone.utc)
+    intake_id = (await db.execute(
+        insert(IntakeHistory)
+        .values(medication_id=medication_id, scheduled_time=scheduled_time, taken_time=scheduled_time, status="taken")
+        .returning(IntakeHistory.id)
+    )).scalar_one()
+    await db.execute(insert(MissedDose).values(
+        medication_id=medication_id, patient_id=patient, scheduled_time=scheduled_time - timedelta(days=1)
+    ))
+    await db.execute(insert(SyncTombstone).values(entity_type="medication", entity_id=0, patient_id=patient))
+    code = uuid.uuid4().hex[:8]
+    await db.execute(insert(InvitationCode).values(
+        id=str(uuid.uuid4()), code=code, med_friend_id=friend, expires_at=NOW + timedelta(hours=1)
+    ))
+    await crud_idempotency.add_idempotency_key(db, patient, "plan", "-", 200, {}, NOW + timedelta(hours=1))
+    await db.flush()
+    return SimpleNamespace(
+        friend=friend,
+        patient=patient,
+        medication_id=medication_id,
+        intake_id=intake_id,
+        scheduled_time=scheduled_time,
+        code=code,
+        xid=await snapshot_xmin(db),
+    )
+
+
+async def _friend_reads(db, seed):
+    await crud_friend.get_patient_by_friend_id(db, seed.friend)
+    await crud_friend.get_friend_by_id(db, seed.friend)
+    await crud_friend.get_patient_id_for_current_friend(db, seed.friend)
+    patient = await crud_user.get_user_by_uuid(db, seed.patient)
+    await crud_friend.update_patient_relation(db, patient, seed.friend)
+
+
+async def _invitations(db, seed):
+    await crud_invitation.code_exists(db, seed.code)
+    invitation = await crud_invitation.get_invitation_by_code_db(db, seed.code)
+    await crud_invitation.create_invitation_code_db(db, uuid.uuid4().hex[:8], seed.friend, NOW + timedelta(hours=1))
+    await crud_invitation.delete_invitation_code_db(db, invitation.id)
+
+
+async def _users(db, seed):
+    await crud_user.create_user(db, f"plan-{uuid.uuid4()}")
+    await crud_user.create_users_bulk(db, [f"plan-{uuid.uuid4()}", f"plan-{uuid.uuid4()}"])
+    await crud_user.get_user_by_uuid(db, seed.patient)
+    await crud_user.bump_token_version(db, seed.patient)
+
+
+async def _data_version(db, seed):
+    await crud_data_version.bump_data_version(db, [seed.patient, seed.friend])
+    await crud_data_version.get_data_version(db, seed.patient)
+    await crud_data_version.get_patient_data_version_for_friend(db, seed.friend)
+
+
+async def _analytics(db, seed):
+    await crud_analytics.rebuild_daily_adherence(db, TODAY - timedelta(days=30))
+    await crud_analytics.get_intake_status_counts(db, seed.patient, "week", TODAY - timedelta(days=30), TODAY)
+
+
+async def _archive(db, seed):
+    await db.execute(crud_archive.expiring_intakes_query(NOW - timedelta(days=365)))
+    await db.execute(crud_archive.purged_medication_intakes_query(NOW - timedelta(days=365), NOW - timedelta(days=730)))
+    await db.execute(crud_archive.expiring_medications_query(NOW - timedelta(days=730)))
+
+
+async def _idempotency(db, seed):
+    await crud_idempotency.get_idempotency_key(db, seed.patient, "plan")
+    await crud_idempotency.add_idempotency_key(db, seed.patient, "plan-2", "-", 200, {}, NOW + timedelta(hours=1))
+    await db.flush()
+
+
+async def _intakes(db, seed):
+    await crud_intake.create_or_update_intake_history(db, {
+        "medication_id": seed.medication_id,
+        "scheduled_time": seed.scheduled_time,
+        "taken_time": seed.scheduled_time,
+        "status": "skipped",
+        "notes": None,
+    }, seed.patient)
+    await crud_intake.get_intake_history_by_patient_id(db, seed.patient, limit=50)
+    await crud_intake.get_intake_history_by_patient_id(
+        db,
+        seed.patient,
+        date_from=NOW - timedelta(days=30),
+        date_to=NOW + timedelta(days=1),
+        medication_id=seed.medication_id,
+        after=(seed.scheduled_time + timedelta(seconds=1), seed.intake_id),
+        limit=50,
+    )
+
+
+async def _medications(db, seed):
+    medication = await crud_medication.create_medication(db, seed.patient, {
+        "name": "plan-2", "form": "drop", "start_date": TODAY,
+        "schedule_type": "weekly_days", "week_days": [0, 3], "times_per_day": [time(8)],
+    })
+    await crud_medication.get_medications_by_patient_id(db, seed.patient)
+    await crud_medication.get_medications_by_patient_id(
+        db, seed.patient, date_from=TODAY, date_to=TODAY + timedelta(days=7), after_id=0, limit=50
+    )
+    await crud_medication.get_medication_schedules(db, seed.patient, TODAY, TODAY + timedelta(days=7))
+    await crud_medication.delete_medication(db, medication.id, seed.patient)
+
+
+async def _detect_missed_doses(db, seed):
+    await crud_missed_dose.detect_missed_doses(db, NOW - timedelta(days=1), NOW)
+
+
+async def _missed_doses(db, seed):
+    await crud_missed_dose.lock_watermark(db, "plan", NOW - timedelta(days=1))
+    await crud_missed_dose.set_watermark(db, "plan", NOW)
+    await crud_missed_dose.get_missed_doses_by_patient_id(db, seed.patient, limit=50)
+    await crud_missed_dose.get_missed_doses_by_patient_id(
+        db,
+        seed.patient,
+        date_from=NOW - timedelta(days=30),
+        date_to=NOW,
+        after=(NOW, 0),
+        limit=50,
+    )
+
+
+async def _reminders(db, seed):
+    await crud_reminders.get_active_schedules_page(db, TODAY, TODAY + timedelta(days=1), None, 500)
+    await crud_reminders.get_active_schedules_page(db, TODAY, TODAY + timedelta(days=1), seed.medication_id, 500)
+    await crud_reminders.get_schedules_changed_after(db, seed.xid, None, 500)
+    await crud_reminders.get_schedules_changed_after(db, seed.xid, (seed.xid, 0), 500)
+    await crud_reminders.get_medications_deleted_after(db, seed.xid, None, 500)
+    await crud_reminders.get_medications_deleted_after(db, seed.xid, (seed.xid, 0), 500)
+
+
+async def _retention(db, seed):
+    for policy in retention_policies():
+        predicate = policy.predicate(policy.cutoff(NOW))
+        await crud_retention.count_backlog(db, policy.table, policy.key_columns, predicate, None)
+        last_key, _, _ = await crud_retention.delete_batch(
+            db, policy.table, policy.key_columns, predicate, None, 100, policy.patient_column
+        )
+        if policy.keyset:
+            # Продолжение прохода — с условием по ключу
+            start_key = last_key or [column.type.python_type() for column in policy.key_columns]
+            await crud_retention.delete_batch(
+                db, policy.table, policy.key_columns, predicate, start_key, 100, policy.patient_column
+            )
+        else:
+            last_key = None
+        await crud_retention.save_checkpoint(db, policy.entity, NOW, last_key, 0)
+        await crud_retention.get_checkpoint(db, policy.entity)
+        await crud_retention.delete_checkpoint(db, policy.entity)
+
+
+async def _service_queries(db, seed):
+    await list_intake_partitions(db)
+    await notify_patient_event(db, seed.patient, "plan", {})
+
+
+async def _sync_pull(db, seed):
+    await db.execute(_medications_query(seed.patient, None, None))
+    await db.execute(_intake_history_query(seed.patient, None, None))
+    await db.execute(_medications_query(seed.patient, seed.xid, None))
+    await db.execute(_intake_history_query(seed.patient, seed.xid, None))
+    await db.execute(_medications_query(seed.patient, None, NOW - timedelta(days=1)))
+    await db.execute(_intake_history_query(seed.patient, None, NOW - timedelta(days=1)))
+    await crud_tombstone.get_tombstones_after(db, seed.patient, seed.xid)
+
+
+# Вызов -> большие таблицы, которые он читает целиком намеренно
+CASES = {
+    "friend": (_friend_reads, frozenset()),
+    "invitation": (_invitations, frozenset()),
+    "user": (_users, frozenset()),
+    "data_version": (_data_version, frozenset()),
+    # Пересчёт сводки читает все разделы истории начиная с since
+    "analytics": (_analytics, frozenset({"intake_history", "daily_adherence"})),
+    "archive": (_archive, frozenset()),
+    "idempotency": (_idempotency, frozenset()),
+    "intake": (_intakes, frozenset()),
+    "medication": (_medications, frozenset()),
+    # Развёртка окна — по всем препаратам, активным в нём
+    "detect_missed_doses": (_detect_missed_doses, frozenset({"medications"})),
+    "missed_dose": (_missed_doses, frozenset()),
+    "reminders": (_reminders, frozenset()),
+    "retention": (_retention, frozenset()),
+    "service": (_service_queries, frozenset()),
+    "sync_pull": (_sync_pull, frozenset()),
+}
+
+
+@pytest.mark.parametrize("name", list(CASES))
+async def test_no_seq_scan_on_large_tables(db, seed, name):
+    call, allowed = CASES[name]
+    scans = await explain_calls(db, lambda session: call(session, seed))
+    offending = {
+        statement: tables - allowed
+        for statement, tables in scans.items()
+        if tables - allowed
+    }
+    assert not offending, "\n\n".join(
+        f"Seq Scan по {', '.join(sorted(tables))}:\n{statement}"
+        for statement, tables in offending.items()
+    )
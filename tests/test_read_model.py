@@ -0,0 +1,36 @@
+# tests/test_read_model.py
+from datetime import date, datetime, time, timezone
+from app.medicines.crud.intake import INTAKE_READ_COLUMNS
+from app.medicines.crud.medication import MEDICATION_READ_COLUMNS
+from app.medicines.schemas.schemas import MedicationResponse
+from app.medicines.services.read_model import PatientReadModel
+
+NOW = datetime(2026, 3, 1, 9, tzinfo=timezone.utc)
+
+
+def medication_row(id_: int) -> dict:
+    return {
+        "id": id_, "patient_id": "p", "name": f"Препарат {id_}", "form": "tablet", "instructions": None,
+        "start_date": date(2026, 1, 1), "end_date": None, "schedule_type": "daily",
+        "week_days": None, "interval_days": None, "times_per_day": [time(9)],
+        "created_at": NOW, "updated_at": NOW, "change_seq": id_, "change_xid": 100 + id_,
+    }
+
+
+def intake_row(id_: int) -> dict:
+    return {
+        "id": id_, "medication_id": 1, "scheduled_time": NOW, "taken_time": NOW, "status": "taken",
+        "notes": None, "created_at": NOW, "updated_at": NOW, "change_seq": id_, "change_xid": 100 + id_,
+    }
+
+
+def test_friend_columns_match_response_fields():
+    assert tuple(column.key for column in MEDICATION_READ_COLUMNS) == tuple(MedicationResponse.model_fields)
+
+
+def test_snapshot_pages_have_the_same_fields_as_crud_queries():
+    model = PatientReadModel(1, 1, [medication_row(1), medication_row(2)], [intake_row(1)])
+    medications = model.medications_page(after_id=1)
+    assert [row["id"] for row in medications] == [2]
+    assert list(medications[0]) == [column.key for column in MEDICATION_READ_COLUMNS]
+    assert list(model.intakes_page()[0]) == [column.key for column in INTAKE_READ_COLUMNS]
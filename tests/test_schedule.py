@@ -0,0 +1,112 @@
+# tests/test_schedule.py
+import random
+from datetime import date, datetime, time, timedelta, timezone
+from types import SimpleNamespace
+import pytest
+from app.medicines.services import schedule
+from app.medicines.services.schedule import expand_schedules
+
+
+def make_schedule(
+    schedule_type=schedule.DAILY,
+    start_date=date(2026, 3, 1),
+    end_date=None,
+    week_days=None,
+    interval_days=None,
+    times_per_day=(time(9),),
+):
+    return SimpleNamespace(
+        schedule_type=schedule_type,
+        start_date=start_date,
+        end_date=end_date,
+        week_days=week_days,
+        interval_days=interval_days,
+        times_per_day=list(times_per_day),
+    )
+
+
+def utc(day: date, hour: int, minute: int = 0) -> datetime:
+    return datetime.combine(day, time(hour, minute), tzinfo=timezone.utc)
+
+
+@pytest.fixture(params=["python", "numpy"])
+def branch(request, monkeypatch):
+    """Обе ветки развёртки через expand_schedules."""
+    if request.param == "numpy":
+        if schedule.np is None:
+            pytest.skip("NumPy не установлен")
+        monkeypatch.setattr(schedule, "VECTORIZE_MIN_CELLS", 0)
+    else:
+        monkeypatch.setattr(schedule, "np", None)
+    return request.param
+
+
+def test_daily_sorts_and_deduplicates_times_per_day(branch):
+    med = make_schedule(times_per_day=[time(20), time(8), time(8, 0, 0, 500)])
+    doses = expand_schedules([med], date(2026, 3, 1), date(2026, 3, 2))
+    assert doses == [[
+        utc(date(2026, 3, 1), 8), utc(date(2026, 3, 1), 20),
+        utc(date(2026, 3, 2), 8), utc(date(2026, 3, 2), 20),
+    ]]
+
+
+def test_course_bounds_are_inclusive_and_clip_period(branch):
+    med = make_schedule(start_date=date(2026, 3, 3), end_date=date(2026, 3, 5))
+    doses = expand_schedules([med], date(2026, 3, 1), date(2026, 3, 10))
+    assert [dose.date() for dose in doses[0]] == [date(2026, 3, 3), date(2026, 3, 4), date(2026, 3, 5)]
+
+
+def test_weekly_days_counts_monday_as_zero(branch):
+    # 2026-03-02 — понедельник
+    med = make_schedule(schedule.WEEKLY_DAYS, start_date=date(2026, 3, 1), week_days=[0, 4])
+    doses = expand_schedules([med], date(2026, 3, 1), date(2026, 3, 14))
+    assert [dose.date() for dose in doses[0]] == [
+        date(2026, 3, 2), date(2026, 3, 6), date(2026, 3, 9), date(2026, 3, 13),
+    ]
+
+
+def test_every_x_days_steps_from_course_start(branch):
+    med = make_schedule(schedule.EVERY_X_DAYS, start_date=date(2026, 2, 27), interval_days=3)
+    doses = expand_schedules([med], date(2026, 3, 1), date(2026, 3, 10))
+    assert [dose.date() for dose in doses[0]] == [date(2026, 3, 2), date(2026, 3, 5), date(2026, 3, 8)]
+
+
+@pytest.mark.parametrize("interval_days", [None, 0, -2])
+def test_every_x_days_without_valid_interval_is_daily(branch, interval_days):
+    med = make_schedule(schedule.EVERY_X_DAYS, interval_days=interval_days)
+    doses = expand_schedules([med], date(2026, 3, 1), date(2026, 3, 3))
+    assert len(doses[0]) == 3
+
+
+def test_keeps_schedule_order_and_empty_results(branch):
+    before = make_schedule(start_date=date(2026, 1, 1), end_date=date(2026, 1, 31))
+    no_times = make_schedule(times_per_day=[])
+    active = make_schedule()
+    doses = expand_schedules([before, no_times, active], date(2026, 3, 1), date(2026, 3, 1))
+    assert doses == [[], [], [utc(date(2026, 3, 1), 9)]]
+
+
+def test_empty_period_returns_empty_list_per_schedule():
+    assert expand_schedules([make_schedule(), make_schedule()], date(2026, 3, 2), date(2026, 3, 1)) == [[], []]
+    assert expand_schedules([], date(2026, 3, 1), date(2026, 3, 2)) == []
+
+
+@pytest.mark.skipif(schedule.np is None, reason="NumPy не установлен")
+def test_vectorized_matches_python_branch():
+    rng = random.Random(7)
+    date_from, date_to = date(2026, 1, 1), date(2026, 4, 30)
+    schedules = []
+    for _ in range(200):
+        kind = rng.choice([schedule.DAILY, schedule.WEEKLY_DAYS, schedule.EVERY_X_DAYS])
+        start = date_from + timedelta(days=rng.randint(-60, 100))
+        schedules.append(make_schedule(
+            kind,
+            start_date=start,
+            end_date=None if rng.random() < 0.5 else start + timedelta(days=rng.randint(0, 90)),
+            week_days=rng.sample(range(7), rng.randint(0, 7)),
+            interval_days=rng.randint(-1, 6),
+            times_per_day=[time(rng.randint(0, 23), rng.choice([0, 30])) for _ in range(rng.randint(0, 3))],
+        ))
+    first, last = date_from.toordinal(), date_to.toordinal()
+    expected = [schedule._expand_one(s, first, last) for s in schedules]
+    assert schedule._expand_vectorized(schedules, first, last) == expected
@@ -0,0 +1,82 @@
+# tests/test_timing_wheel.py
+import random
+from app.core.timing_wheel import TimingWheel
+
+
+def test_item_fires_on_its_tick_not_before():
+    wheel = TimingWheel(start=0)
+    wheel.add(5.5, "a")
+    assert wheel.advance(4.9) == []
+    assert wheel.advance(5.0) == ["a"]
+    assert wheel.advance(100) == []
+    assert len(wheel) == 0
+
+
+def test_due_items_fire_on_next_advance():
+    wheel = TimingWheel(start=10)
+    wheel.add(3, "past")
+    wheel.add(10, "now")
+    assert len(wheel) == 2
+    assert wheel.advance(10) == ["past", "now"]
+    assert len(wheel) == 0
+
+
+def test_one_advance_returns_items_in_tick_order():
+    wheel = TimingWheel(start=0, slots=4, levels=2)
+    for when in (40, 3, 17, 9, 2, 64, 15):
+        wheel.add(when, when)
+    assert wheel.advance(1000) == [2, 3, 9, 15, 17, 40, 64]
+
+
+def test_cascade_from_upper_levels_fires_exactly_on_time():
+    # slots=4, levels=3: уровни по 1, 4 и 16 тиков, охват — 64 тика
+    wheel = TimingWheel(start=0, slots=4, levels=3)
+    times = list(range(1, 64))
+    for when in times:
+        wheel.add(when, when)
+    fired = {}
+    for now in range(1, 64):
+        for item in wheel.advance(now):
+            fired[item] = now
+    assert fired == {when: when for when in times}
+
+
+def test_overflow_beyond_all_levels_is_placed_back_in_time():
+    # Охват 4 ** 2 = 16 тиков: 37 и 100 ждут в переполнении
+    wheel = TimingWheel(start=0, slots=4, levels=2)
+    wheel.add(100, "late")
+    wheel.add(37, "far")
+    wheel.add(15, "near")
+    fired = {}
+    for now in range(1, 120):
+        for item in wheel.advance(now):
+            fired[item] = now
+    assert fired == {"near": 15, "far": 37, "late": 100}
+
+
+def test_skips_empty_ticks_and_keeps_relative_placement():
+    wheel = TimingWheel(start=0, slots=4, levels=2)
+    assert wheel.advance(1_000_000) == []
+    wheel.add(1_000_010, "after-skip")
+    assert wheel.advance(1_000_009) == []
+    assert wheel.advance(1_000_010) == ["after-skip"]
+
+
+def test_matches_brute_force_on_random_schedule():
+    rng = random.Random(3)
+    wheel = TimingWheel(start=0, tick_seconds=0.5, slots=8, levels=2)
+    pending: list[tuple[int, int]] = []
+    now, item = 0.0, 0
+    for _ in range(3000):
+        for _ in range(rng.randint(0, 3)):
+            when = now + rng.choice([rng.uniform(-5, 5), rng.uniform(0, 40), rng.uniform(0, 400)])
+            wheel.add(when, item)
+            pending.append((int(when // 0.5), item))
+            item += 1
+        now += rng.choice([0.5, 0.5, 1.3, 7, 60])
+        due = wheel.advance(now)
+        target = int(now // 0.5)
+        expected = [item for tick, item in pending if tick <= target]
+        pending = [(tick, item) for tick, item in pending if tick > target]
+        assert sorted(due) == sorted(expected)
+        assert len(wheel) == len(pending)